@@ -0,0 +1,252 @@
+import argparse
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, text
+
+# Offline execution backend: the raw Olist CSVs (or Parquet copies) in an embedded DuckDB
+# file, queried through the same SQLAlchemy API as RDS. Selected with PIPELINE_BACKEND=duckdb
+# (see quick.generate_engine). Needs `pip install duckdb duckdb_engine`.
+ROOT_DIR = Path(__file__).resolve().parent
+sys.path.append(str(ROOT_DIR / "rds-set-up"))   # feature_build, indexes (no DB config at import)
+
+DATA_DIR = ROOT_DIR / "db_csvs"   # same folder rds-set-up/load_data.py reads
+DUCKDB_PATH = Path(os.environ.get("DUCKDB_PATH", DATA_DIR / "olist.duckdb"))
+CREATE_TABLES_SQL = ROOT_DIR / "rds-set-up" / "create_tables.sql"
+
+DATA_FILES = {
+    "customers": "olist_customers_dataset",
+    "sellers": "olist_sellers_dataset",
+    "orders": "olist_orders_dataset",
+    "order_items": "olist_order_items_dataset",
+    "products": "olist_products_dataset",
+    "geolocation": "olist_geolocation_dataset",
+    "order_payments": "olist_order_payments_dataset",
+    "order_reviews": "olist_order_reviews_dataset",
+    "product_category_name_translation": "product_category_name_translation",
+}
+DEDUPE_KEYS = {"order_reviews": "review_id"}   # same as load_data.dedupe_on
+
+# One row per loaded table; manifest.table_versions reads it in place of pg_stat_user_tables
+LOAD_LOG_SQL = """
+    CREATE TABLE IF NOT EXISTS pipeline_load_log (
+        table_name VARCHAR PRIMARY KEY,
+        loaded_at TIMESTAMP,
+        row_count BIGINT
+    )
+"""
+
+# Postgres behaviour the queries rely on, as DuckDB macros
+MACROS = [
+    # DATE_PART('day', interval) is the interval's whole-day field in Postgres
+    """CREATE OR REPLACE MACRO pg_date_part_day(x) AS
+       CASE WHEN typeof(x) = 'INTERVAL' THEN trunc(epoch(x) / 86400) ELSE date_part('day', x) END""",
+]
+
+# (pattern, replacement) applied to every statement before DuckDB sees it
+TRANSLATIONS = [
+    # MODE() WITHIN GROUP (ORDER BY x) -> MODE(x)
+    (re.compile(r"MODE\(\)\s+WITHIN\s+GROUP\s*\(\s*ORDER\s+BY\s+([^()]+?)\s*\)", re.I), r"MODE(\1)"),
+    # EXTRACT(EPOCH FROM <interval>) -> EPOCH(<interval>), seconds as a double
+    (re.compile(r"EXTRACT\(\s*EPOCH\s+FROM\s+", re.I), "EPOCH("),
+    (re.compile(r"DATE_PART\(\s*'day'\s*,", re.I), "pg_date_part_day("),
+    # planner statistics are collected automatically
+    (re.compile(r"^\s*ANALYZE\s+\w+\s*;?\s*$", re.I), "SELECT 1"),
+]
+
+
+def translate_sql(sql: str) -> str:
+    """Rewrite the Postgres-only constructs used in queries/ into DuckDB SQL."""
+    for pattern, replacement in TRANSLATIONS:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    return translate_sql(statement), parameters
+
+
+def _install_macros(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for macro in MACROS:
+        cursor.execute(macro)
+    cursor.close()
+
+
+def source_file(table: str, data_dir: Path = None) -> Path:
+    """Raw file for a table, preferring a Parquet copy over the CSV."""
+    data_dir = Path(data_dir or DATA_DIR)
+    for suffix in (".parquet", ".csv"):
+        path = data_dir / f"{DATA_FILES[table]}{suffix}"
+        if path.exists():
+            return path
+    raise FileNotFoundError(f"No {DATA_FILES[table]}.parquet/.csv in {data_dir}")
+
+
+def _reader(path: Path) -> str:
+    if path.suffix == ".parquet":
+        return f"read_parquet('{path.as_posix()}')"
+    return f"read_csv('{path.as_posix()}', header = true)"
+
+
+def table_ddl() -> dict:
+    """{table: CREATE TABLE statement} from create_tables.sql, foreign keys removed."""
+    ddl = CREATE_TABLES_SQL.read_text()
+    ddl = re.sub(r"--[^\n]*", "", ddl)
+    ddl = re.sub(r"\s+REFERENCES\s+\w+\s*\(\s*\w+\s*\)", "", ddl, flags=re.I)
+    ddl = re.sub(r"\bFLOAT\b", "DOUBLE", ddl)   # Postgres FLOAT is double precision, DuckDB's is 4 bytes
+    return {m.group(1): m.group(0) for m in re.finditer(r"CREATE TABLE (\w+) \(.*?\);", ddl, re.S)}
+
+
+def load_table(conn, table: str, ddl: dict, data_dir: Path = None) -> int:
+    """Replace one table with its raw file; returns the row count."""
+    path = source_file(table, data_dir)
+    source = f"SELECT * FROM {_reader(path)}"
+    key = DEDUPE_KEYS.get(table)
+    if key:
+        # first row per key in file order
+        source = f"""
+            SELECT * EXCLUDE (_row) FROM (SELECT *, row_number() OVER () AS _row FROM {_reader(path)})
+            QUALIFY row_number() OVER (PARTITION BY {key} ORDER BY _row) = 1
+        """
+    conn.exec_driver_sql(f"DROP TABLE IF EXISTS {table}")
+    conn.exec_driver_sql(ddl[table])
+    conn.exec_driver_sql(f"INSERT INTO {table} BY NAME {source}")
+    return conn.exec_driver_sql(f"SELECT COUNT(*) FROM {table}").scalar()
+
+
+def build_geo_tables(conn):
+    """geolocation_filtered and zip_centroids, as load_data.load_geo_location builds them."""
+    conn.exec_driver_sql("""
+        CREATE OR REPLACE TABLE geolocation_filtered AS
+        SELECT DISTINCT geolocation_zip_code_prefix, geolocation_lat, geolocation_lng
+        FROM geolocation
+        WHERE geolocation_zip_code_prefix IN (SELECT customer_zip_code_prefix FROM customers)
+    """)
+    conn.exec_driver_sql("""
+        CREATE OR REPLACE TABLE zip_centroids AS
+        SELECT
+            geolocation_zip_code_prefix,
+            AVG(geolocation_lat) AS avg_lat,
+            AVG(geolocation_lng) AS avg_lng,
+            COUNT(*)             AS n_points
+        FROM geolocation_filtered
+        GROUP BY geolocation_zip_code_prefix
+    """)
+
+
+def _log_load(conn, table: str, rows: int):
+    conn.execute(text("""
+        INSERT INTO pipeline_load_log VALUES (:table, now(), :rows)
+        ON CONFLICT (table_name) DO UPDATE SET loaded_at = EXCLUDED.loaded_at, row_count = EXCLUDED.row_count
+    """), {"table": table, "rows": rows})
+
+
+def load_csvs(engine, tables=None, data_dir: Path = None) -> dict:
+    """
+    Load the raw files into DuckDB with the create_tables.sql column types, then build
+    geolocation_filtered, zip_centroids and the churn feature tables.
+    Returns {table: seconds}.
+    """
+    import feature_build
+
+    ddl = table_ddl()
+    timings = {}
+    with engine.begin() as conn:
+        conn.exec_driver_sql(LOAD_LOG_SQL)
+        # no foreign keys in DuckDB, so tables can be replaced in any order
+        for table in tables or DATA_FILES:
+            start = time.perf_counter()
+            rows = load_table(conn, table, ddl, data_dir)
+            timings[table] = time.perf_counter() - start
+            _log_load(conn, table, rows)
+            print(f"Loaded {table}: {rows} rows in {timings[table]:.2f}s")
+
+        start = time.perf_counter()
+        build_geo_tables(conn)
+        timings["geolocation_filtered"] = time.perf_counter() - start
+        for table in ("geolocation_filtered", "zip_centroids"):
+            _log_load(conn, table, conn.exec_driver_sql(f"SELECT COUNT(*) FROM {table}").scalar())
+
+    feature_build.refresh_churn_features(engine, full=True)
+    with engine.begin() as conn:
+        for table in ("customer_order_agg", "feature_build_state"):
+            _log_load(conn, table, conn.exec_driver_sql(f"SELECT COUNT(*) FROM {table}").scalar())
+    print(f"DuckDB load finished in {sum(timings.values()):.2f}s → {engine.url.database}")
+    return timings
+
+
+def _open(path: Path, **engine_kwargs):
+    engine = create_engine(f"duckdb:///{path.as_posix()}", **engine_kwargs)
+    event.listen(engine, "connect", _install_macros)
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute, retval=True)
+    return engine
+
+
+def _remove_database(path: Path):
+    for p in (path, path.with_name(path.name + ".wal")):
+        p.unlink(missing_ok=True)
+
+
+def generate_engine(path: Path = None, load: bool = True, **engine_kwargs):
+    """
+    SQLAlchemy engine on the DuckDB file (default DUCKDB_PATH) with the dialect translator
+    installed. load=True loads the raw files the first time the database is opened; the load
+    goes to <path>.part and is renamed into place once complete, so a failed load never
+    leaves a half-filled file behind for the next run to treat as loaded.
+    """
+    path = Path(path or DUCKDB_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    print(f"Opening DuckDB database {path}")
+    if path.exists() or not load:
+        return _open(path, **engine_kwargs)
+
+    part = path.with_name(path.name + ".part")
+    _remove_database(part)   # left by a killed load
+    engine = _open(part, **engine_kwargs)
+    try:
+        load_csvs(engine)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("CHECKPOINT")   # everything in the file, nothing left in the .wal
+    except BaseException:
+        engine.dispose()
+        _remove_database(part)
+        raise
+    engine.dispose()
+    os.replace(part, path)
+    return _open(path, **engine_kwargs)
+
+
+def benchmark(paths=None, compare_rds: bool = True) -> dict:
+    """Time every query on DuckDB and, with compare_rds, on RDS; print them side by side."""
+    import indexes
+
+    engine = generate_engine()
+    local = indexes.time_queries(engine, paths)
+    engine.dispose()
+    if not compare_rds:
+        for name in sorted(local, key=local.get, reverse=True):
+            print(f"{name:35} {local[name]:9.2f}s")
+        return {"duckdb": local}
+
+    from quick import generate_engine as generate_rds_engine
+    remote = indexes.time_queries(generate_rds_engine(backend="postgres"), paths)
+    indexes.print_comparison(remote, local, "rds", "duckdb")
+    return {"duckdb": local, "rds": remote}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline DuckDB backend for the queries/ workload")
+    parser.add_argument("action", choices=["load", "benchmark"])
+    parser.add_argument("--tables", nargs="+", choices=list(DATA_FILES), help="tables to (re)load (default: all)")
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    parser.add_argument("--no-rds", action="store_true", help="benchmark DuckDB only")
+    args = parser.parse_args()
+
+    if args.action == "load":
+        load_csvs(generate_engine(load=False), args.tables, args.data_dir)
+    else:
+        benchmark(compare_rds=not args.no_rds)
@@ -49,4 +49,7 @@ SELECT
 FROM orders o
 LEFT JOIN order_items     oi ON o.order_id = oi.order_id
 LEFT JOIN order_payments  p  ON o.order_id = p.order_id
-GROUP BY o.order_id, o.customer_id;
+-- every selected orders column is listed: Postgres accepts the primary key alone, DuckDB does not
+GROUP BY o.order_id, o.customer_id,
+         o.order_purchase_timestamp, o.order_approved_at, o.order_delivered_carrier_date,
+         o.order_delivered_customer_date, o.order_estimated_delivery_date;
@@ -7,12 +7,5 @@ SELECT
 FROM orders o
 JOIN customers c
        ON o.customer_id = c.customer_id        -- link each order to its customer
-LEFT JOIN (
-    SELECT
-        geolocation_zip_code_prefix,
-        AVG(geolocation_lat) AS avg_lat,
-        AVG(geolocation_lng) AS avg_lng
-    FROM geolocation_filtered
-    GROUP BY geolocation_zip_code_prefix
-) g
+LEFT JOIN zip_centroids g                      -- per-zip averages, rebuilt by load_data.py
        ON c.customer_zip_code_prefix = g.geolocation_zip_code_prefix;
@@ -1,27 +1,195 @@
+import atexit
+import json
+import os
+import threading
+import time
+from functools import lru_cache
 
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
 
-def generate_engine():
-    print("Generating DB engine...")
-    import os
-    from sqlalchemy import create_engine
-    import json
+# Process-wide engine provider. Every caller of generate_engine() with the same settings
+# shares one engine and its connection pool, so extraction, loading and the tests open a
+# handful of connections per process instead of one pool per call.
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "creds", "db_config.json")
 
-    config_txt = os.path.join(os.path.dirname(__file__), "creds", "db_config.json")
-    print(f"Loading DB config from {config_txt}")
-    with open(config_txt) as f:
-        config = json.load(f)
+# --- Pool config (env vars override; keep pool_size + max_overflow, times the number of
+# processes, under the RDS instance's max_connections) ---
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 5))
+POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))           # seconds to wait for a free connection
+POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))           # reconnect before RDS idles us out
+PRE_PING = os.environ.get("DB_PRE_PING", "1") != "0"                  # test each connection on checkout
+STATEMENT_TIMEOUT_MS = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", 0))   # 0 = no limit
 
-    DB_HOST = config["DB_HOST"]
-    DB_PORT = config["DB_PORT"]
-    DB_NAME = config["DB_NAME"]
-    DB_USER = config["DB_USER"]
-    DB_PASS = config["DB_PASS"]
+_ENGINES = {}   # (backend, settings) -> engine
+_LOCK = threading.Lock()
 
-    print(f"Connecting to DB {DB_NAME} at {DB_HOST}:{DB_PORT} as user {DB_USER}")
-    engine = create_engine(
-        f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+class PoolMetrics:
+    """Checkout counts and wait times for one pool (survives engine.dispose())."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0            # checkouts that had to wait for a connection
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0         # no connection free within pool_timeout
+        self.errors = 0           # new connection failed (DB down, auth, ...)
+        self.peak_checked_out = 0
+
+    def record(self, seconds: float, checked_out: int, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self.peak_checked_out = max(self.peak_checked_out, checked_out)
+            if seconds > 0.001:
+                self.waits += 1
+                self.wait_seconds += seconds
+                self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts, "waits": self.waits, "timeouts": self.timeouts,
+                "errors": self.errors,
+                "wait_seconds": round(self.wait_seconds, 4),
+                "max_wait_seconds": round(self.max_wait_seconds, 4),
+                "peak_checked_out": self.peak_checked_out,
+            }
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeout:
+            self.metrics.record(time.perf_counter() - start, self.checkedout(), timed_out=True)
+            raise
+        except Exception:
+            self.metrics.record_error()
+            raise
+        self.metrics.record(time.perf_counter() - start, self.checkedout())
+        return conn
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+@lru_cache(maxsize=1)
+def load_db_config() -> dict:
+    print(f"Loading DB config from {CONFIG_PATH}")
+    with open(CONFIG_PATH) as f:
+        return json.load(f)
+
+
+def database_url(config: dict = None) -> str:
+    config = config or load_db_config()
+    return (f"postgresql+psycopg2://{config['DB_USER']}:{config['DB_PASS']}"
+            f"@{config['DB_HOST']}:{config['DB_PORT']}/{config['DB_NAME']}")
+
+
+def _postgres_engine(pool_size, max_overflow, pool_timeout, pool_recycle, pre_ping, statement_timeout_ms,
+                     **engine_kwargs):
+    config = load_db_config()
+    connect_args = dict(engine_kwargs.pop("connect_args", {}))
+    if statement_timeout_ms:
+        connect_args["options"] = f"-c statement_timeout={int(statement_timeout_ms)}"
+    print(f"Connecting to DB {config['DB_NAME']} at {config['DB_HOST']}:{config['DB_PORT']} "
+          f"as user {config['DB_USER']} (pool {pool_size}+{max_overflow})")
+    return create_engine(
+        database_url(config),
+        poolclass=MeteredQueuePool,
+        pool_size=pool_size, max_overflow=max_overflow, pool_timeout=pool_timeout,
+        pool_recycle=pool_recycle, pool_pre_ping=pre_ping,
+        connect_args=connect_args,
+        **engine_kwargs
     )
-    print("Connection Sucessful")
-    return engine
 
 
+def generate_engine(backend=None, pool_size=None, max_overflow=None, pool_timeout=None, pool_recycle=None,
+                    pre_ping=None, statement_timeout_ms=None, **engine_kwargs):
+    """
+    Shared SQLAlchemy engine for creds/db_config.json (built on first use, then reused).
+    Pool settings default to the module constants; callers asking for different settings
+    (e.g. a pool sized to their worker count) get their own shared engine.
+    Other keyword arguments are passed to create_engine.
+    backend (default: the PIPELINE_BACKEND env var, else "postgres") may be "duckdb"
+    to run offline against the local database built by duckdb_backend.py.
+    Engines are disposed at interpreter exit; callers should not dispose them.
+    """
+    backend = backend or os.environ.get("PIPELINE_BACKEND", "postgres")
+    requested = {
+        "pool_size": pool_size, "max_overflow": max_overflow, "pool_timeout": pool_timeout,
+        "pool_recycle": pool_recycle, "pre_ping": pre_ping, "statement_timeout_ms": statement_timeout_ms,
+    }
+    settings = {k: default if requested[k] is None else requested[k] for k, default in _default_settings().items()}
+    key = (backend, tuple(sorted(settings.items())), repr(sorted(engine_kwargs.items())))
+    with _LOCK:
+        if key not in _ENGINES:
+            if backend == "duckdb":
+                from duckdb_backend import generate_engine as generate_duckdb_engine
+                _ENGINES[key] = generate_duckdb_engine(**engine_kwargs)
+            else:
+                print("Generating DB engine...")
+                _ENGINES[key] = _postgres_engine(**settings, **engine_kwargs)
+                print("Connection Sucessful")
+        return _ENGINES[key]
+
+
+def _default_settings() -> dict:
+    return {
+        "pool_size": POOL_SIZE, "max_overflow": MAX_OVERFLOW, "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE, "pre_ping": PRE_PING, "statement_timeout_ms": STATEMENT_TIMEOUT_MS,
+    }
+
+
+def _pool_name(backend, settings, engine_kwargs) -> str:
+    """backend:size+overflow, plus every setting that differs from the defaults (unique per engine)."""
+    settings = dict(settings)
+    defaults = _default_settings()
+    extras = [f"{k}={v}" for k, v in settings.items()
+              if k not in ("pool_size", "max_overflow") and v != defaults[k]]
+    if engine_kwargs != "[]":
+        extras.append(engine_kwargs)
+    name = f"{backend}:{settings['pool_size']}+{settings['max_overflow']}"
+    return f"{name} ({', '.join(extras)})" if extras else name
+
+
+def pool_metrics() -> dict:
+    """Checkout/wait metrics and current usage for every shared engine's pool."""
+    out = {}
+    for (backend, settings, engine_kwargs), engine in list(_ENGINES.items()):
+        pool = engine.pool
+        name = _pool_name(backend, settings, engine_kwargs)
+        stats = {"checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+                 "size": pool.size() if hasattr(pool, "size") else None}
+        if isinstance(pool, MeteredQueuePool):
+            stats.update(pool.metrics.summary())
+        out[name] = stats
+    return out
+
+
+@atexit.register
+def dispose_engines():
+    with _LOCK:
+        for engine in _ENGINES.values():
+            engine.dispose()
+        _ENGINES.clear()
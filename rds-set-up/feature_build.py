@@ -0,0 +1,112 @@
+import argparse
+import os
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+# Incremental per-customer aggregates for queries/ML/churn_features.sql.
+# Only customers with orders newer than the watermark are recomputed, so a daily refresh
+# costs as much as the new orders, not the whole orders ⨝ order_items history.
+FEATURE_TABLES_SQL = os.path.join(os.path.dirname(__file__), "feature_tables.sql")
+STATE_NAME = "customer_order_agg"
+LOOKBACK_DAYS = 3   # re-read orders this far behind the watermark to catch late-arriving items
+SOURCE_TABLES = ("orders", "order_items")   # a reload of either needs a full rebuild
+
+# Every aggregate is recomputed from the customer's full order history, so
+# COUNT(DISTINCT ...) stays exact without keeping per-product state.
+UPSERT_SQL = """
+    INSERT INTO customer_order_agg (
+        customer_id, total_orders, total_spent, avg_order_value,
+        distinct_products, first_order_date, last_order_date, updated_at
+    )
+    SELECT
+        o.customer_id,
+        COUNT(o.order_id),
+        SUM(oi.price),
+        AVG(oi.price),
+        COUNT(DISTINCT oi.product_id),
+        MIN(o.order_purchase_timestamp),
+        MAX(o.order_purchase_timestamp),
+        now()
+    FROM orders o
+    JOIN order_items oi ON o.order_id = oi.order_id
+    WHERE o.customer_id IN (
+        SELECT customer_id FROM orders WHERE order_purchase_timestamp > :since
+    )
+    GROUP BY o.customer_id
+    ON CONFLICT (customer_id) DO UPDATE SET
+        total_orders = EXCLUDED.total_orders,
+        total_spent = EXCLUDED.total_spent,
+        avg_order_value = EXCLUDED.avg_order_value,
+        distinct_products = EXCLUDED.distinct_products,
+        first_order_date = EXCLUDED.first_order_date,
+        last_order_date = EXCLUDED.last_order_date,
+        updated_at = EXCLUDED.updated_at
+"""
+
+
+def create_feature_tables(engine):
+    with open(FEATURE_TABLES_SQL) as f, engine.begin() as conn:
+        conn.exec_driver_sql(f.read())
+
+
+def read_state(conn):
+    return conn.execute(
+        text("SELECT watermark, anchor_date FROM feature_build_state WHERE name = :name"),
+        {"name": STATE_NAME},
+    ).first()
+
+
+def refresh_churn_features(engine, anchor_date: date = None, full: bool = False):
+    """
+    Bring customer_order_agg up to date and store the anchor date churn_features.sql measures from.
+    full=True (or no watermark yet, or orders older than the watermark were reloaded) rebuilds
+    every customer. anchor_date defaults to the day of the latest order, not today.
+    Returns {"customers", "full", "watermark", "anchor_date", "seconds"}.
+    """
+    create_feature_tables(engine)
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        state = read_state(conn)
+        latest = conn.execute(text("SELECT MAX(order_purchase_timestamp) FROM orders")).scalar()
+        # a reload that shrank orders leaves the watermark ahead of the data
+        full = full or state is None or state.watermark is None or latest is None or latest < state.watermark
+        if full:
+            conn.execute(text("TRUNCATE customer_order_agg"))
+            since = date.min
+        else:
+            since = state.watermark - timedelta(days=LOOKBACK_DAYS)
+        customers = conn.execute(text(UPSERT_SQL), {"since": since}).rowcount
+
+        anchor_date = anchor_date or (latest.date() if latest else date.today())
+        conn.execute(text("""
+            INSERT INTO feature_build_state (name, watermark, anchor_date, updated_at)
+            VALUES (:name, :watermark, :anchor, now())
+            ON CONFLICT (name) DO UPDATE SET
+                watermark = EXCLUDED.watermark,
+                anchor_date = EXCLUDED.anchor_date,
+                updated_at = EXCLUDED.updated_at
+        """), {"name": STATE_NAME, "watermark": latest, "anchor": anchor_date})
+        if full:
+            conn.exec_driver_sql("ANALYZE customer_order_agg")
+
+    seconds = time.perf_counter() - start
+    mode = "full rebuild" if full else f"since {since}"
+    print(f"customer_order_agg: {customers} customer(s) updated ({mode}) in {seconds:.2f}s, "
+          f"watermark {latest}, anchor {anchor_date}")
+    return {"customers": customers, "full": full, "watermark": latest,
+            "anchor_date": anchor_date, "seconds": seconds}
+
+
+if __name__ == "__main__":
+    from load_data import generate_engine
+
+    parser = argparse.ArgumentParser(description="Refresh the incremental churn feature tables")
+    parser.add_argument("--full", action="store_true", help="rebuild every customer")
+    parser.add_argument("--anchor", type=date.fromisoformat,
+                        help="date recency/churn are measured from, YYYY-MM-DD (default: latest order)")
+    args = parser.parse_args()
+
+    engine = generate_engine()
+    refresh_churn_features(engine, args.anchor, args.full)
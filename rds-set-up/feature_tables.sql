@@ -0,0 +1,21 @@
+-- Incremental feature tables maintained by feature_build.py (not extracted; queries/ reads them)
+
+-- One row per customer with at least one order item; recomputed for customers with new orders
+CREATE TABLE IF NOT EXISTS customer_order_agg (
+    customer_id VARCHAR PRIMARY KEY,
+    total_orders INT,              -- order_items rows, as in the original churn_features.sql
+    total_spent NUMERIC,
+    avg_order_value NUMERIC,
+    distinct_products INT,
+    first_order_date TIMESTAMP,
+    last_order_date TIMESTAMP,
+    updated_at TIMESTAMPTZ DEFAULT now()
+);
+
+-- Watermark and anchor date per feature table
+CREATE TABLE IF NOT EXISTS feature_build_state (
+    name VARCHAR PRIMARY KEY,
+    watermark TIMESTAMP,           -- latest order_purchase_timestamp folded in
+    anchor_date DATE,              -- "today" for recency / churn
+    updated_at TIMESTAMPTZ DEFAULT now()
+);
@@ -0,0 +1,163 @@
+import argparse
+import time
+from pathlib import Path
+
+from sqlalchemy import text
+
+# Secondary indexes for the joins/groupings in queries/.
+# create_tables.sql only declares primary keys; these are managed here so bulk loads
+# can drop them first and rebuild them once the data is in.
+# (name, table, columns, covering columns)
+INDEXES = [
+    ("idx_orders_customer_id", "orders", ["customer_id"], []),
+    ("idx_order_items_order_id", "order_items", ["order_id"], []),
+    ("idx_order_items_product_id", "order_items", ["product_id"], []),
+    ("idx_order_items_seller_id", "order_items", ["seller_id"], []),
+    ("idx_order_payments_order_id", "order_payments", ["order_id"], []),
+    ("idx_order_reviews_order_id", "order_reviews", ["order_id"], []),
+    ("idx_customers_unique_id", "customers", ["customer_unique_id"], []),
+    ("idx_customers_zip", "customers", ["customer_zip_code_prefix"], []),
+]
+
+# No longer used by any query (the geo queries read zip_centroids); dropped by create_indexes
+RETIRED_INDEXES = ["idx_geolocation_filtered_zip"]
+
+QUERIES_DIR = Path(__file__).resolve().parent.parent / "queries"
+
+
+def _existing_indexes(conn, table):
+    """{index name: key columns} for every index already on table (PKs included)."""
+    rows = conn.execute(text("""
+        SELECT c.relname AS name, array_agg(a.attname ORDER BY k.ord) AS cols
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        CROSS JOIN LATERAL unnest(i.indkey) WITH ORDINALITY AS k(attnum, ord)
+        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+        WHERE i.indrelid = to_regclass(:table)
+        GROUP BY c.relname
+    """), {"table": table}).fetchall()
+    return {r.name: list(r.cols) for r in rows}
+
+
+def _table_exists(conn, table):
+    return conn.execute(text("SELECT to_regclass(:table) IS NOT NULL"), {"table": table}).scalar()
+
+
+def _selected(tables):
+    return [ix for ix in INDEXES if tables is None or ix[1] in tables]
+
+
+def drop_indexes(engine, tables=None):
+    """Drop the managed indexes (optionally only on tables) before a bulk load."""
+    with engine.begin() as conn:
+        for name, table, _, _ in _selected(tables):
+            conn.execute(text(f'DROP INDEX IF EXISTS "{name}"'))
+            print(f"Dropped index {name} on {table}")
+
+
+def create_indexes(engine, tables=None):
+    """
+    Build the managed indexes and ANALYZE their tables.
+    Skips an index when an existing one (e.g. a primary key) already starts with the same columns.
+    Returns {index name: seconds}.
+    """
+    timings = {}
+    analyzed = set()
+    with engine.begin() as conn:
+        for name in RETIRED_INDEXES:
+            conn.execute(text(f'DROP INDEX IF EXISTS "{name}"'))
+        for name, table, columns, include in _selected(tables):
+            if not _table_exists(conn, table):
+                print(f"Skipping {name}: table {table} does not exist")
+                continue
+            existing = _existing_indexes(conn, table)
+            if name in existing:
+                continue
+            if any(cols[:len(columns)] == columns for cols in existing.values()):
+                print(f"Skipping {name}: {table}({', '.join(columns)}) is already indexed")
+                continue
+            cols = ", ".join(f'"{c}"' for c in columns)
+            sql = f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ({cols})'
+            if include:
+                sql += " INCLUDE (" + ", ".join(f'"{c}"' for c in include) + ")"
+            start = time.perf_counter()
+            conn.execute(text(sql))
+            timings[name] = time.perf_counter() - start
+            print(f"Built index {name} in {timings[name]:.2f}s")
+            analyzed.add(table)
+        for table in sorted(analyzed):
+            conn.execute(text(f'ANALYZE "{table}"'))
+    return timings
+
+
+def time_queries(engine, paths=None):
+    """Run each query once, fetching every row, and return {name: seconds}."""
+    paths = paths or sorted(QUERIES_DIR.rglob("*.sql"))
+    timings = {}
+    for path in paths:
+        name = f"{path.parent.name}_{path.stem}"
+        try:
+            with engine.connect() as conn:
+                start = time.perf_counter()
+                conn.execute(text(path.read_text())).fetchall()
+                timings[name] = time.perf_counter() - start
+        except Exception as e:
+            print(f"Query {name} failed: {e}")
+    return timings
+
+
+def print_comparison(before, after, label_before="before", label_after="after"):
+    print(f"{'query':35} {label_before:>10} {label_after:>10} {'change':>8}")
+    for name in sorted(before, key=before.get, reverse=True):
+        if name in after:
+            change = (after[name] - before[name]) / before[name] * 100 if before[name] else 0.0
+            print(f"{name:35} {before[name]:9.2f}s {after[name]:9.2f}s {change:+7.0f}%")
+    print(f"{'total':35} {sum(before.values()):9.2f}s {sum(after.values()):9.2f}s")
+
+
+def benchmark_indexes(engine, paths=None):
+    """Time the queries without, then with, the managed indexes and print the difference."""
+    drop_indexes(engine)
+    without = time_queries(engine, paths)
+    build = create_indexes(engine)
+    with_indexes = time_queries(engine, paths)
+    print(f"Index build took {sum(build.values()):.2f}s")
+    print_comparison(without, with_indexes, "no index", "indexed")
+    return {"without": without, "with": with_indexes, "build": build}
+
+
+def benchmark_load(tables=None, workers=None):
+    """
+    Load the tables twice, first with the indexes kept in place during the COPYs, then with
+    them dropped and rebuilt after, and print per-table and total times side by side.
+    """
+    import load_data
+
+    workers = workers or load_data.LOAD_WORKERS
+    engine = load_data.generate_engine()
+    create_indexes(engine)
+    runs = {}
+    for label, defer in (("in place", False), ("deferred", True)):
+        result = load_data.load_tables(tables, workers, defer_indexes=defer)
+        runs[label] = dict(result["seconds"], **{"(index build)": result["index_seconds"]})
+    print_comparison(runs["in place"], runs["deferred"], "in place", "deferred")
+    return runs
+
+
+if __name__ == "__main__":
+    from load_data import generate_engine
+
+    parser = argparse.ArgumentParser(description="Manage secondary indexes for the queries/ workload")
+    parser.add_argument("action", choices=["create", "drop", "benchmark", "benchmark-load"])
+    parser.add_argument("--tables", nargs="+", help="only indexes on these tables (benchmark-load: tables to load)")
+    args = parser.parse_args()
+
+    engine = generate_engine()
+    if args.action == "create":
+        create_indexes(engine, args.tables)
+    elif args.action == "drop":
+        drop_indexes(engine, args.tables)
+    elif args.action == "benchmark-load":
+        benchmark_load(args.tables)
+    else:
+        benchmark_indexes(engine)
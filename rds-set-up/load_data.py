@@ -1,104 +1,409 @@
 
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import inspect
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+import argparse
 import os
+import io
 import json
+import sys
+import time
 import traceback
-with open("creds/db_config.json") as f:
-    config = json.load(f)
 
-    DB_HOST = config["DB_HOST"]
-    DB_PORT = config["DB_PORT"]
-    DB_NAME = config["DB_NAME"]
-    DB_USER = config["DB_USER"]
-    DB_PASS = config["DB_PASS"]
-def main():
-   
+import indexes
+import feature_build
 
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from quick import generate_engine   # shared engine/pool for creds/db_config.json
 
+COPY_CHUNKSIZE = 100_000   # CSV rows parsed and sent per COPY
+GEO_CHUNKSIZE = 200_000    # geolocation rows per chunk (~1M rows in the file)
+# Columns the geo queries use; lat/lng stay float64 so COPY writes the source values back exactly
+GEO_DTYPES = {
+    "geolocation_zip_code_prefix": "int32",
+    "geolocation_lat": "float64",
+    "geolocation_lng": "float64",
+}
 
-    engine = create_engine(
-        f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}", echo=True
-    )
+# --- CSV file paths ---
+BASE_DIR = os.path.dirname(__file__)
+DATA_DIR = os.path.join(BASE_DIR, "..", "db_csvs")
 
-    # --- 2. CSV file paths ---
-
-    BASE_DIR = os.path.dirname(__file__)
-    DATA_DIR = os.path.join(BASE_DIR, "..", "db_csvs")
-
-    DATA_FILES = {
-        # "customers": os.path.join(DATA_DIR, "olist_customers_dataset.csv"),
-        # "sellers": os.path.join(DATA_DIR, "olist_sellers_dataset.csv"),
-        # "orders": os.path.join(DATA_DIR, "olist_orders_dataset.csv"),
-        # "order_items": os.path.join(DATA_DIR, "olist_order_items_dataset.csv"),
-        # "products": os.path.join(DATA_DIR, "olist_products_dataset.csv"),
-
-        "geolocation": os.path.join(DATA_DIR, "olist_geolocation_dataset.csv"),
-        # "order_payments": os.path.join(DATA_DIR, "olist_order_payments_dataset.csv"),
-        # "order_reviews": os.path.join(DATA_DIR, "olist_order_reviews_dataset.csv"),
-        # "product_category_name_translation": os.path.join(DATA_DIR, "product_category_name_translation.csv")
-    }
-
-    # --- 3. Load each dataset ---
-    for table_name, file_path in DATA_FILES.items():
-        print(f"Loading {table_name} from {file_path} ...")
-        
-        # Load CSV into DataFrame
-        df = pd.read_csv(file_path)
-        if table_name == "order_reviews":
-            # Drop duplicates in order_reviews based on review_id
-            df = df.drop_duplicates(subset=["review_id"])
-        
-        # Upload to Postgres
-        print(f"Uploading {len(df)} rows to {table_name} ...")
-        try:
-            df.to_sql(
-                table_name,
-                engine,
-                if_exists="replace",   # 🔑 Drop + recreate table
-                index=False,
-                method="multi",        # batch insert
-                chunksize=10_000       # send 10k rows per statement
-            )
-            print(f"Uploaded {len(df)} rows to {table_name}")
-        except Exception as e:
-            print(f"Error loading {table_name}: {e}")
-            traceback.print_exc()
-        print("-" * 40)
+DATA_FILES = {
+    "customers": os.path.join(DATA_DIR, "olist_customers_dataset.csv"),
+    "sellers": os.path.join(DATA_DIR, "olist_sellers_dataset.csv"),
+    "orders": os.path.join(DATA_DIR, "olist_orders_dataset.csv"),
+    "order_items": os.path.join(DATA_DIR, "olist_order_items_dataset.csv"),
+    "products": os.path.join(DATA_DIR, "olist_products_dataset.csv"),
+    "geolocation": os.path.join(DATA_DIR, "olist_geolocation_dataset.csv"),
+    "order_payments": os.path.join(DATA_DIR, "olist_order_payments_dataset.csv"),
+    "order_reviews": os.path.join(DATA_DIR, "olist_order_reviews_dataset.csv"),
+    "product_category_name_translation": os.path.join(DATA_DIR, "product_category_name_translation.csv"),
+}
 
+# Foreign keys from create_tables.sql (order_items.product_id is a logical reference)
+DEPENDS_ON = {
+    "orders": ["customers"],
+    "order_items": ["orders", "sellers", "products"],
+    "order_payments": ["orders"],
+    "order_reviews": ["orders"],
+}
 
-def load_geo_location():
-    # Load geolocation data
-    print("Loading geolocation data ...")
-    engine = create_engine(
-        f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}", echo=True
-    )
-# customers.csv should contain the key column you match on
-    cust = pd.read_csv("db_csvs/olist_customers_dataset.csv")
-    cust_zips = set(cust["customer_zip_code_prefix"].unique())
+STATE_FILE = os.path.join(BASE_DIR, ".load_state.json")   # tables loaded by the last run
+LOAD_WORKERS = 4
+
+
+def copy_frames_to_table(table_name, chunks, engine, transform=None, schema=None, truncate=True):
+    """
+    Replace table_name with the rows of an iterable of DataFrames using COPY FROM STDIN.
+    Each chunk is rendered to an in-memory CSV buffer and streamed with psycopg2's
+    copy_expert, all in one transaction, so only one chunk is in memory at a time.
+    An existing table (e.g. from create_tables.sql) keeps its DDL and is truncated with
+    CASCADE, so FK children are emptied too; otherwise it is created from the dtypes of
+    schema (default: the first chunk). truncate=False appends to an existing table the
+    caller has already emptied (load_tables truncates all its tables up front).
+    transform(chunk) -> chunk can filter/clean rows before they are sent.
+    Returns {"rows", "seconds", "rows_per_sec"}.
+    """
+    start = time.perf_counter()
+    rows = 0
+    exists = inspect(engine).has_table(table_name)
+    raw = engine.raw_connection()
+    try:
+        for i, chunk in enumerate(chunks):
+            if transform is not None:
+                chunk = transform(chunk)
+            if i == 0:
+                if not exists:
+                    # same column types as the old to_sql path, but no rows
+                    template = schema if schema is not None else chunk
+                    template.head(0).to_sql(table_name, engine, if_exists="replace", index=False)
+                elif truncate:
+                    with raw.cursor() as cur:
+                        cur.execute(f'TRUNCATE "{table_name}" CASCADE')
+                # else: already emptied by the caller, COPY appends and the DDL stays as it is
+                columns = ", ".join(f'"{c}"' for c in chunk.columns)
+                copy_sql = f'COPY "{table_name}" ({columns}) FROM STDIN WITH (FORMAT csv)'
+            buffer = io.StringIO()
+            chunk.to_csv(buffer, index=False, header=False)
+            buffer.seek(0)
+            with raw.cursor() as cur:
+                cur.copy_expert(copy_sql, buffer)
+            rows += len(chunk)
+        raw.commit()
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+
+    seconds = time.perf_counter() - start
+    rate = rows / seconds if seconds > 0 else 0.0
+    print(f"COPY {table_name}: {rows} rows in {seconds:.1f}s ({rate:,.0f} rows/sec)")
+    return {"rows": rows, "seconds": seconds, "rows_per_sec": rate}
 
-    geo_iter = pd.read_csv("db_csvs/olist_geolocation_dataset.csv", chunksize=100_000)
 
-    filtered_chunks = []
-    for chunk in geo_iter:
-        mask = chunk["geolocation_zip_code_prefix"].isin(cust_zips)
-        filtered_chunks.append(chunk[mask])
+def copy_csv_to_table(table_name, file_path, engine, chunksize=COPY_CHUNKSIZE, transform=None, truncate=True):
+    """
+    Replace table_name with a CSV file, read and COPY'd chunksize rows at a time.
+    Values are passed through as the original text (no int → float "1.0" round trip),
+    and column types for a new table are inferred from the first chunksize rows.
+    """
+    schema = pd.read_csv(file_path, nrows=chunksize)
+    chunks = pd.read_csv(file_path, chunksize=chunksize, dtype=str, keep_default_na=False, na_values=[""])
+    return copy_frames_to_table(table_name, chunks, engine, transform, schema=schema, truncate=truncate)
 
-    geo_filtered = pd.concat(filtered_chunks, ignore_index=True)
-    print(len(geo_filtered))   # should be close to 99k (plus duplicates)
 
-    # Insert only the filtered rows
-    geo_filtered.to_sql(
-        "geolocation_filtered",
+def dedupe_on(column):
+    """transform for copy_csv_to_table that drops repeated keys across all chunks."""
+    seen = set()
+
+    def _transform(chunk):
+        chunk = chunk.drop_duplicates(subset=[column])
+        chunk = chunk[~chunk[column].isin(seen)]
+        seen.update(chunk[column])
+        return chunk
+
+    return _transform
+
+
+def insert_csv_to_table(table_name, file_path, engine):
+    """Old loader: whole CSV in memory, then multi-row INSERTs through to_sql."""
+    # Load CSV into DataFrame
+    df = pd.read_csv(file_path)
+    if table_name == "order_reviews":
+        # Drop duplicates in order_reviews based on review_id
+        df = df.drop_duplicates(subset=["review_id"])
+
+    # Upload to Postgres
+    print(f"Uploading {len(df)} rows to {table_name} ...")
+    df.to_sql(
+        table_name,
         engine,
-        if_exists="replace",
+        if_exists="replace",   # 🔑 Drop + recreate table
         index=False,
-        method="multi",
-        chunksize=10_000
+        method="multi",        # batch insert
+        chunksize=10_000       # send 10k rows per statement
     )
+    print(f"Uploaded {len(df)} rows to {table_name}")
+
+
+def load_table(table_name, engine, method="copy", truncate=True):
+    """Load one table from its CSV; returns the seconds it took."""
+    print(f"Loading {table_name} from {DATA_FILES[table_name]} ...")
+    start = time.perf_counter()
+    if method == "copy":
+        transform = dedupe_on("review_id") if table_name == "order_reviews" else None
+        copy_csv_to_table(table_name, DATA_FILES[table_name], engine, transform=transform, truncate=truncate)
+    else:
+        insert_csv_to_table(table_name, DATA_FILES[table_name], engine)
+    return time.perf_counter() - start
+
+
+def load_stages(tables):
+    """Group tables into stages: every table comes after the tables it references."""
+    remaining = list(tables)
+    stages = []
+    while remaining:
+        stage = [t for t in remaining if not any(d in remaining for d in DEPENDS_ON.get(t, []))]
+        stages.append(stage)
+        remaining = [t for t in remaining if t not in stage]
+    return stages
+
+
+def dependents_of(table_name):
+    """Tables that (transitively) reference table_name."""
+    found = set()
+    for child, parents in DEPENDS_ON.items():
+        if table_name in parents:
+            found |= {child} | dependents_of(child)
+    return found
+
+
+def tables_to_reload(tables, loaded=()):
+    """
+    The tables not already loaded, plus every table that references one of them
+    (emptying a parent empties its children), in DATA_FILES order.
+    """
+    todo = {t for t in tables if t not in loaded}
+    for table_name in list(todo):
+        todo |= dependents_of(table_name)
+    return [t for t in DATA_FILES if t in todo]
+
+
+def truncate_tables(engine, tables):
+    """
+    Empty the existing tables among `tables` in one TRUNCATE (no CASCADE: every
+    referencing table must be in the list, as tables_to_reload guarantees).
+    """
+    existing = [t for t in tables if inspect(engine).has_table(t)]
+    if existing:
+        with engine.begin() as conn:
+            conn.exec_driver_sql("TRUNCATE " + ", ".join(f'"{t}"' for t in existing))
+        print(f"Truncated {existing}")
+
+
+def _read_state():
+    if not os.path.exists(STATE_FILE):
+        return {"loaded": []}
+    with open(STATE_FILE) as f:
+        return json.load(f)
+
+
+def _write_state(state):
+    with open(STATE_FILE, "w") as f:
+        json.dump(state, f, indent=2)
+
+
+def load_tables(tables=None, workers=LOAD_WORKERS, resume=False, method="copy", defer_indexes=True):
+    """
+    Load the selected tables (default: all of DATA_FILES) in foreign-key order.
+    Tables that reference a selected table are reloaded too, since emptying the parent
+    empties them. Everything being reloaded is truncated up front in one statement, so
+    the COPYs only take row locks and tables in the same stage really load in parallel,
+    each on its own connection.
+    Successful tables are recorded in STATE_FILE; with resume=True they are skipped,
+    so a failed run can be finished without reloading what already worked.
+    A table whose parent failed is skipped for this run (and left empty).
+    With defer_indexes=True the secondary indexes in indexes.py are dropped first and
+    rebuilt once the data is in (primary/foreign keys from create_tables.sql are kept).
+    Reloading orders or order_items (directly or through a parent) rebuilds the churn aggregates.
+    Returns {"loaded", "failed", "seconds": {table: load seconds}, "load_seconds", "index_seconds"}
+    (indexes.benchmark_load compares deferred and in-place index builds with it).
+    """
+    selected = list(tables or DATA_FILES)
+    unknown = [t for t in selected if t not in DATA_FILES]
+    if unknown:
+        raise ValueError(f"Unknown tables {unknown}, expected some of {list(DATA_FILES)}")
+
+    state = _read_state() if resume else {"loaded": []}
+    reload = tables_to_reload(selected, state["loaded"])
+    for table_name in selected:
+        if table_name not in reload:
+            print(f"Skipping {table_name} (loaded by a previous run)")
+    added = [t for t in reload if t not in selected]
+    if added:
+        print(f"Also reloading {added}: they reference a table being reloaded")
+    state["loaded"] = [t for t in state["loaded"] if t not in reload]
+    _write_state(state)
+    # raw COPY connection + one for DDL per worker
+    engine = generate_engine(pool_size=workers, max_overflow=workers)
+
+    if defer_indexes:
+        indexes.drop_indexes(engine, reload)
+    truncate_tables(engine, reload)
+
+    failed = set()
+    seconds = {}
+    start = time.perf_counter()
+    for stage in load_stages(reload):
+        todo = []
+        for table_name in stage:
+            if any(p in failed for p in DEPENDS_ON.get(table_name, [])):
+                print(f"Skipping {table_name}: a table it references failed")
+                failed.add(table_name)
+            else:
+                todo.append(table_name)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {t: pool.submit(load_table, t, engine, method, False) for t in todo}
+        for table_name, future in futures.items():
+            try:
+                seconds[table_name] = future.result()
+            except Exception as e:
+                print(f"Error loading {table_name}: {e}")
+                traceback.print_exc()
+                failed.add(table_name)
+                continue
+            state["loaded"].append(table_name)
+            _write_state(state)
+        print("-" * 40)
+    load_seconds = time.perf_counter() - start
+
+    index_seconds = 0.0
+    if defer_indexes:
+        index_seconds = sum(indexes.create_indexes(engine, reload).values())
+        print(f"Loaded in {load_seconds:.2f}s, indexes built in {index_seconds:.2f}s")
+    else:
+        print(f"Loaded in {load_seconds:.2f}s")
+
+    # the aggregates' source tables were truncated, so rebuild them from whatever is loaded now
+    if set(feature_build.SOURCE_TABLES) & set(reload):
+        feature_build.refresh_churn_features(engine, full=True)
+
+    if failed:
+        print(f"Failed or skipped: {sorted(failed)}. Fix and re-run with --resume.")
+    else:
+        print(f"Loaded {len(reload)} table(s).")
+    return {"loaded": state["loaded"], "failed": sorted(failed), "seconds": seconds,
+            "load_seconds": load_seconds, "index_seconds": index_seconds}
+
+
+def main(method="copy"):
+    """
+    Load every table in DATA_FILES, one at a time.
+    method="copy" streams CSVs with COPY FROM STDIN, method="insert" uses the old to_sql path.
+    """
+    return load_tables(workers=1, method=method)
+
+
+# One row per zip prefix, read by queries/*/geo_location.sql.
+# Built into a side table and swapped in, so readers never see it half-built.
+ZIP_CENTROIDS_SQL = """
+    CREATE TABLE zip_centroids_new AS
+    SELECT
+        geolocation_zip_code_prefix,
+        AVG(geolocation_lat) AS avg_lat,
+        AVG(geolocation_lng) AS avg_lng,
+        COUNT(*)             AS n_points
+    FROM geolocation_filtered
+    GROUP BY geolocation_zip_code_prefix
+"""
+
+
+def refresh_zip_centroids(engine):
+    """Rebuild zip_centroids from geolocation_filtered (run after every geo load)."""
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE IF EXISTS zip_centroids_new")
+        conn.exec_driver_sql(ZIP_CENTROIDS_SQL)
+        conn.exec_driver_sql(
+            "ALTER TABLE zip_centroids_new ADD PRIMARY KEY (geolocation_zip_code_prefix)"
+        )
+        conn.exec_driver_sql("DROP TABLE IF EXISTS zip_centroids")
+        conn.exec_driver_sql("ALTER TABLE zip_centroids_new RENAME TO zip_centroids")
+        conn.exec_driver_sql(
+            "ALTER INDEX IF EXISTS zip_centroids_new_pkey RENAME TO zip_centroids_pkey"
+        )
+        conn.exec_driver_sql("ANALYZE zip_centroids")
+        rows = conn.exec_driver_sql("SELECT COUNT(*) FROM zip_centroids").scalar()
+    print(f"Refreshed zip_centroids: {rows} zip prefixes in {time.perf_counter() - start:.2f}s")
+    return rows
+
+
+def sorted_zips(file_path=None, column="customer_zip_code_prefix"):
+    """Sorted, unique zip prefixes from one column of a CSV (default: customers)."""
+    zips = pd.read_csv(file_path or DATA_FILES["customers"], usecols=[column], dtype={column: "int32"})
+    return np.unique(zips[column].to_numpy())
+
+
+def in_sorted(values, sorted_keys):
+    """Vectorized membership test against a sorted key array (binary search per value)."""
+    if len(sorted_keys) == 0:
+        return np.zeros(len(values), dtype=bool)
+    pos = np.searchsorted(sorted_keys, values).clip(max=len(sorted_keys) - 1)
+    return sorted_keys[pos] == values
+
+
+def geo_chunks(zips, file_path=None, chunksize=GEO_CHUNKSIZE):
+    """
+    Yield geolocation rows whose zip prefix is in zips (sorted array), chunk by chunk.
+    Only GEO_DTYPES columns are parsed, and repeated (zip, lat, lng) points are dropped
+    within and across chunks. Across chunks only a sorted array of 64-bit row hashes
+    is kept, so memory stays at one chunk plus 8 bytes per distinct point.
+    """
+    seen = np.empty(0, dtype=np.uint64)
+    reader = pd.read_csv(file_path or DATA_FILES["geolocation"], usecols=list(GEO_DTYPES),
+                         dtype=GEO_DTYPES, chunksize=chunksize)
+    for chunk in reader:
+        chunk = chunk[in_sorted(chunk["geolocation_zip_code_prefix"].to_numpy(), zips)]
+        hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        hashes, first = np.unique(hashes, return_index=True)
+        new = ~np.isin(hashes, seen, assume_unique=True)
+        seen = np.union1d(seen, hashes[new])
+        yield chunk.iloc[np.sort(first[new])]
+
+
+def load_geo_location(engine=None, chunksize=GEO_CHUNKSIZE):
+    """
+    Rebuild geolocation_filtered (points in zips some customer lives in) and zip_centroids.
+    Each filtered chunk is COPY'd as soon as it is ready; nothing is concatenated.
+    """
+    print("Loading geolocation data ...")
+    engine = engine or generate_engine()
+    zips = sorted_zips()
+    stats = copy_frames_to_table("geolocation_filtered", geo_chunks(zips, chunksize=chunksize), engine)
+    refresh_zip_centroids(engine)
+    return stats
+
 
 if __name__ == "__main__":
-    # main()
-    load_geo_location()
-    # raise RuntimeError("This script is not intended to be run directly.")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Load the Olist CSVs into Postgres")
+    parser.add_argument("--tables", nargs="+", choices=list(DATA_FILES), help="tables to load (default: all); tables referencing them are reloaded too")
+    parser.add_argument("--workers", type=int, default=LOAD_WORKERS, help="tables loaded in parallel")
+    parser.add_argument("--resume", action="store_true", help="skip tables the last run already loaded")
+    parser.add_argument("--method", choices=["copy", "insert"], default="copy")
+    parser.add_argument("--geo", action="store_true", help="only rebuild geolocation_filtered and zip_centroids")
+    parser.add_argument("--centroids", action="store_true", help="only refresh zip_centroids")
+    parser.add_argument("--keep-indexes", action="store_true",
+                        help="keep secondary indexes in place during the load instead of rebuilding them after")
+    args = parser.parse_args()
+
+    if args.geo:
+        load_geo_location()
+    elif args.centroids:
+        refresh_zip_centroids(generate_engine())
+    else:
+        load_tables(args.tables, args.workers, args.resume, args.method, defer_indexes=not args.keep_indexes)
\ No newline at end of file
@@ -0,0 +1,181 @@
+import argparse
+import logging
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+RESULTS_DIR = Path(__file__).resolve().parents[3]   # results/
+sys.path.append(str(RESULTS_DIR))
+sys.path.append(str(RESULTS_DIR.parent))             # repo root, for quick.generate_engine
+sys.path.append(str(RESULTS_DIR.parent / "rds-set-up"))   # load_data.copy_frames_to_table
+import feature_store
+import schemas
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# --- Config ---
+MODEL_DIR = RESULTS_DIR / "ML" / "models"      # where logistic_regression.py / random_forrest.py save
+OUTPUT_DIR = RESULTS_DIR / "ML" / "scores"
+CHUNK_SIZE = 50_000                            # rows scored per predict_proba call
+MODEL_KINDS = ["logistic_regression", "random_forest"]
+ID_COLUMN = "customer_id"
+
+
+def latest_model(kind: str = None, model_dir: Path = MODEL_DIR) -> Path:
+    """Newest saved pipeline (optionally of one kind), by the timestamp in its file name."""
+    kinds = [kind] if kind else MODEL_KINDS
+    candidates = [p for k in kinds for p in Path(model_dir).glob(f"{k}_*.joblib")]
+    if not candidates:
+        raise FileNotFoundError(f"No {' / '.join(kinds)} model in {model_dir}; train one first")
+    return max(candidates, key=lambda p: p.stem.rsplit("_", 2)[-2:])
+
+
+def model_columns(pipeline) -> list:
+    """Columns the pipeline was fit on (the training frame minus customer_id and churned)."""
+    if hasattr(pipeline, "feature_names_in_"):
+        return list(pipeline.feature_names_in_)
+    preprocessor = pipeline.named_steps["preprocessor"]
+    return [c for _, _, cols in preprocessor.transformers for c in cols]
+
+
+def feature_chunks(columns: list, source: Path = None, chunk_size: int = CHUNK_SIZE):
+    """
+    Yield ML_churn_features rows chunk_size at a time, reading only `columns`.
+    source may be a CSV or Parquet file; None means the latest "churn" feature-store snapshot.
+    """
+    if source is None:
+        source = feature_store.resolve_snapshot("churn")
+    source = Path(source)
+    if source.suffix == ".parquet":
+        parquet = pq.ParquetFile(source)
+        for batch in parquet.iter_batches(batch_size=chunk_size, columns=columns):
+            yield schemas.apply_schema(batch.to_pandas())
+    else:
+        yield from schemas.read_csv(source, columns, chunksize=chunk_size)
+
+
+def score_chunks(pipeline, chunks, model_name: str):
+    """Yield (customer_id, churn_probability, churn_predicted, model, scored_at) frames."""
+    columns = model_columns(pipeline)
+    scored_at = pd.Timestamp.now()
+    for chunk in chunks:
+        proba = pipeline.predict_proba(chunk[columns])[:, 1]
+        yield pd.DataFrame({
+            ID_COLUMN: chunk[ID_COLUMN].to_numpy(),
+            "churn_probability": proba,
+            "churn_predicted": (proba >= 0.5).astype("int8"),
+            "model": model_name,
+            "scored_at": scored_at,
+        })
+
+
+def _swap_in(engine, staging: str, table: str):
+    """Replace table with the fully written staging table in one transaction."""
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f'DROP TABLE IF EXISTS "{table}"')
+        conn.exec_driver_sql(f'ALTER TABLE "{staging}" RENAME TO "{table}"')
+    logger.info("Swapped %s in as %s", staging, table)
+
+
+def batch_score(model_path: Path = None, source: Path = None, out_path: Path = None,
+                fmt: str = "parquet", chunk_size: int = CHUNK_SIZE, table: str = None,
+                engine=None) -> dict:
+    """
+    Score every customer with a saved churn pipeline in bounded memory.
+    The model is loaded once; features are read chunk_size rows at a time and each chunk of
+    scores is appended to out_path (Parquet or CSV) and, with table=..., COPY'd into
+    <table>_staging, which replaces the table only once every chunk is in, so a failed run
+    leaves the previous scores in place. engine defaults to the shared quick engine.
+    Returns {"rows", "seconds", "rows_per_sec", "model", "output"}.
+    """
+    model_path = Path(model_path) if model_path else latest_model()
+    pipeline = joblib.load(model_path)
+    logger.info("Loaded model %s", model_path)
+
+    if out_path is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        out_path = OUTPUT_DIR / f"churn_scores_{timestamp}.{fmt}"
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_name(out_path.name + ".part")
+
+    staging = f"{table}_staging" if table else None
+    if table and engine is None:
+        from quick import generate_engine
+        engine = generate_engine()
+
+    columns = [ID_COLUMN] + model_columns(pipeline)
+    rows = 0
+    start = time.perf_counter()
+
+    def written(out):
+        """Score chunks, appending each to the output file before passing it on."""
+        nonlocal rows
+        writer = None
+        try:
+            for scores in score_chunks(pipeline, feature_chunks(columns, source, chunk_size), model_path.stem):
+                if fmt == "parquet":
+                    batch = pa.Table.from_pandas(scores, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(out, batch.schema, compression="zstd")
+                    writer.write_table(batch)
+                else:
+                    out.write(scores.to_csv(index=False, header=rows == 0).encode())
+                rows += len(scores)
+                logger.info("Scored %d rows", rows)
+                yield scores
+        finally:
+            if writer is not None:
+                writer.close()
+
+    try:
+        with open(tmp_path, "wb") as out:
+            chunks = written(out)
+            try:
+                if table:
+                    import load_data
+
+                    with engine.begin() as conn:
+                        conn.exec_driver_sql(f'DROP TABLE IF EXISTS "{staging}"')   # leftover of a failed run
+                    load_data.copy_frames_to_table(staging, chunks, engine)
+                else:
+                    for _ in chunks:
+                        pass
+            finally:
+                chunks.close()   # closes the file writer even when the COPY stopped early
+        if table and rows:
+            _swap_in(engine, staging, table)
+        elif table:
+            logger.warning("No rows scored, %s left unchanged", table)
+        tmp_path.replace(out_path)
+    except Exception:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    seconds = time.perf_counter() - start
+    rate = rows / seconds if seconds > 0 else 0.0
+    logger.info("Scored %d customers in %.2fs (%.0f rows/sec) → %s", rows, seconds, rate, out_path)
+    return {"rows": rows, "seconds": seconds, "rows_per_sec": rate,
+            "model": str(model_path), "output": str(out_path)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score customers with the latest saved churn model")
+    parser.add_argument("--model", type=Path, help="joblib pipeline (default: newest in results/ML/models)")
+    parser.add_argument("--kind", choices=MODEL_KINDS, help="newest model of this kind")
+    parser.add_argument("--source", type=Path, help="ML_churn_features CSV/Parquet (default: feature store)")
+    parser.add_argument("--out", type=Path, help="output file (default: results/ML/scores/churn_scores_<ts>)")
+    parser.add_argument("--format", choices=["parquet", "csv"], default="parquet")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--table", help="also write the scores to this Postgres table")
+    args = parser.parse_args()
+
+    model = args.model or latest_model(args.kind)
+    batch_score(model, args.source, args.out, args.format, args.chunk_size, args.table)
@@ -2,19 +2,16 @@
 import pytest
 import pandas as pd
 from sklearn.pipeline import Pipeline
-from pre_proccess import train_churn_model
+from pre_proccess import prepare_churn_data
 import logging
 #cmd line to run this test: pytest -v results/ML/churn_prediction/data_tests.py
 CSV_PATH = "C:/Users/hayde/2025-skill-build/Brazil Retail/results/csvs_in/ML_churn_features.csv"
 
 def test_preprocessing_and_class_balance():
-    results = train_churn_model(CSV_PATH, model="logistic_regression")
-    pipeline = results["pipeline"]
+    # same cached split + fitted preprocessor the models train on, nothing is refit here
+    results = prepare_churn_data(CSV_PATH)
     X_train, y_train = results["X_train"], results["y_train"]
-
-    # Fit only the preprocessing part
-    preprocessor = pipeline.named_steps["preprocessor"]
-    Xt = preprocessor.fit_transform(X_train)
+    Xt = results["Xt_train"]
 
     # --- Check 1: No NaNs in transformed data ---
     assert not pd.DataFrame(Xt).isnull().values.any(), "NaN values found after preprocessing!"
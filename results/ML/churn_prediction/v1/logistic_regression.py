@@ -20,19 +20,19 @@ def logistic_regression_model(csv_path: str, save_path: str):
     pipeline = results["pipeline"]
     X_train = results["X_train"]
     y_train = results["y_train"]
-    X_test = results["X_test"]
     y_test = results["y_test"]
     logger.info("Preview of training data:\n%s", pd.DataFrame(X_train).head())
     logger.info("Preview of training churn:\n%s", pd.DataFrame(y_train).head())
     try:
-        pipeline.fit(X_train, y_train)
+        # the preprocessor comes fitted from the cached artifact; only the classifier is trained
+        pipeline.named_steps["classifier"].fit(results["Xt_train"], y_train)
     except Exception as e:
         logger.error("Error occurred while training the model: %s", e)
         return
 
     # Predictions
 
-    y_pred = pipeline.predict(X_test)
+    y_pred = pipeline.named_steps["classifier"].predict(results["Xt_test"])
 
     # Evaluation
     report = {"classification": classification_report(y_test, y_pred), "confusion_matrix": confusion_matrix(y_test, y_pred)}
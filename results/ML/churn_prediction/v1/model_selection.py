@@ -0,0 +1,147 @@
+import argparse
+import logging
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import pandas as pd
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import roc_auc_score, f1_score
+from sklearn.model_selection import GridSearchCV, StratifiedKFold
+from sklearn.pipeline import Pipeline
+
+from pre_proccess import prepare_churn_data, build_preprocessor
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# --- Config ---
+N_SPLITS = 5
+RANDOM_STATE = 42
+SCORING = {"roc_auc": "roc_auc", "f1": "f1", "accuracy": "accuracy"}
+REFIT_METRIC = "roc_auc"
+CACHE_DIR = Path(__file__).resolve().parent / ".preprocess_cache"   # fitted preprocessors, per fold
+
+# model family -> (classifier, grid over its "classifier__" params)
+SEARCH_SPACES = {
+    "logistic_regression": (
+        LogisticRegression(max_iter=1000, class_weight="balanced"),
+        {"classifier__C": [0.01, 0.1, 1.0, 10.0]},
+    ),
+    "random_forest": (
+        # one core per forest: the search itself fans out over every core
+        RandomForestClassifier(random_state=RANDOM_STATE, class_weight="balanced", n_jobs=1),
+        {
+            "classifier__n_estimators": [200, 400],
+            "classifier__max_depth": [None, 10, 20],
+            "classifier__min_samples_leaf": [1, 5],
+        },
+    ),
+}
+
+
+def search_family(family: str, preprocessor, X_train, y_train, memory, n_jobs: int = -1) -> GridSearchCV:
+    """
+    Stratified k-fold grid search for one model family.
+    Pipeline(memory=...) caches the fitted preprocessor per fold, so each fold's
+    ColumnTransformer is fit once and reused by every candidate in the grid.
+    """
+    classifier, grid = SEARCH_SPACES[family]
+    pipeline = Pipeline(
+        steps=[("preprocessor", clone(preprocessor)), ("classifier", clone(classifier))],
+        memory=memory,
+    )
+    search = GridSearchCV(
+        pipeline, grid,
+        cv=StratifiedKFold(n_splits=N_SPLITS, shuffle=True, random_state=RANDOM_STATE),
+        scoring=SCORING, refit=REFIT_METRIC, n_jobs=n_jobs, return_train_score=False,
+    )
+    start = time.perf_counter()
+    search.fit(X_train, y_train)
+    logger.info("%s: %d candidates x %d folds in %.1fs, best %s=%.4f with %s",
+                family, len(search.cv_results_["params"]), N_SPLITS, time.perf_counter() - start,
+                REFIT_METRIC, search.best_score_, search.best_params_)
+    return search
+
+
+def leaderboard_rows(family: str, search: GridSearchCV, X_test, y_test) -> list:
+    """One row per candidate: CV mean/std per metric, fit/score times, and held-out scores for the best."""
+    results = search.cv_results_
+    best_proba = search.predict_proba(X_test)[:, 1]
+    rows = []
+    for i, params in enumerate(results["params"]):
+        row = {
+            "model": family,
+            "params": {k.replace("classifier__", ""): v for k, v in params.items()},
+            "mean_fit_time_s": results["mean_fit_time"][i],
+            "mean_score_time_s": results["mean_score_time"][i],
+        }
+        for metric in SCORING:
+            row[f"cv_{metric}_mean"] = results[f"mean_test_{metric}"][i]
+            row[f"cv_{metric}_std"] = results[f"std_test_{metric}"][i]
+        is_best = i == search.best_index_
+        row["test_roc_auc"] = roc_auc_score(y_test, best_proba) if is_best else None
+        row["test_f1"] = f1_score(y_test, best_proba >= 0.5) if is_best else None
+        rows.append(row)
+    return rows
+
+
+def select_churn_model(csv_path, save_path: Path, families=None, n_jobs: int = -1, save_best: bool = False) -> pd.DataFrame:
+    """
+    Search every family in SEARCH_SPACES and write csvs/churn_model_leaderboard.csv
+    (next to logistic_regression_results.csv), best CV score first.
+    save_best=True also saves the winning pipeline to models/ like the single-model scripts do.
+    """
+    families = families or list(SEARCH_SPACES)
+    data = prepare_churn_data(csv_path)   # same cached split as the single-model scripts
+    preprocessor = build_preprocessor()
+    X_train, y_train, X_test, y_test = data["X_train"], data["y_train"], data["X_test"], data["y_test"]
+
+    memory = joblib.Memory(location=str(CACHE_DIR), verbose=0)
+    rows, searches = [], {}
+    try:
+        for family in families:
+            searches[family] = search_family(family, preprocessor, X_train, y_train, memory, n_jobs)
+            rows += leaderboard_rows(family, searches[family], X_test, y_test)
+    finally:
+        memory.clear(warn=False)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    board = pd.DataFrame(rows).sort_values(f"cv_{REFIT_METRIC}_mean", ascending=False).reset_index(drop=True)
+    board.insert(0, "rank", range(1, len(board) + 1))
+    board.insert(1, "timestamp", timestamp)
+
+    csv_dir = Path(save_path) / "csvs"
+    csv_dir.mkdir(parents=True, exist_ok=True)
+    board.to_csv(csv_dir / "churn_model_leaderboard.csv", index=False)
+    logger.info("Leaderboard written to %s\n%s", csv_dir / "churn_model_leaderboard.csv",
+                board[["rank", "model", "params", f"cv_{REFIT_METRIC}_mean", "mean_fit_time_s"]].head(10))
+
+    if save_best:
+        family = board.loc[0, "model"]
+        best = searches[family].best_estimator_.set_params(memory=None)
+        model_dir = Path(save_path) / "models"
+        model_dir.mkdir(parents=True, exist_ok=True)
+        for file in model_dir.glob(f"{family}_*.joblib"):
+            logger.info("Removing old model file: %s", file)
+            file.unlink()
+        model_path = model_dir / f"{family}_{timestamp}.joblib"
+        joblib.dump(best, model_path)
+        logger.info("Best model (%s) saved to %s", family, model_path)
+    return board
+
+
+if __name__ == "__main__":
+    BASE_DIR = Path(__file__).resolve().parents[2]   # results/
+    parser = argparse.ArgumentParser(description="Cross-validated grid search over the churn models")
+    parser.add_argument("--csv", type=Path, default=BASE_DIR / "csvs_in" / "ML_churn_features.csv")
+    parser.add_argument("--families", nargs="+", choices=list(SEARCH_SPACES))
+    parser.add_argument("--n-jobs", type=int, default=-1, help="worker processes (-1 = every core)")
+    parser.add_argument("--save-best", action="store_true", help="save the winner to results/ML/models")
+    args = parser.parse_args()
+    logger.info("Searching on %d cores", os.cpu_count() if args.n_jobs == -1 else args.n_jobs)
+    select_churn_model(args.csv, BASE_DIR / "ML", args.families, args.n_jobs, args.save_best)
@@ -1,36 +1,110 @@
 import pandas as pd
+import sklearn
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier
+import hashlib
+import joblib
+import json
 import logging
+import os
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[3]))   # results/, for feature_store
+import feature_store
+import schemas
+from manifest import file_checksum
 
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# --- Preprocessing artifacts ---
+# The split and the fitted ColumnTransformer are cached per (input file hash, feature lists,
+# seed, test size, sklearn version), in memory and as a joblib file, so the LR / RF scripts,
+# model_selection.py and data_tests.py all reuse one split and one set of transformed matrices.
+ARTIFACT_DIR = Path(__file__).resolve().parent / ".artifacts"
+ARTIFACT_VERSION = 1          # bump when the preprocessing code changes
+RANDOM_STATE = 42
+TEST_SIZE = 0.2
+
+# columns the data must have (recency and customer_state are checked but not used, see below)
+REQUIRED_COLUMNS = [
+    "customer_state", "total_orders", "total_spent", "avg_order_value",
+    "distinct_products", "frequency", "recency", "churned",
+]
+CATEGORICAL_FEATURES = [] #"customer_state" - dropped
+#NOTE dropped recency - similar calculations as churned
+NUMERIC_FEATURES = [
+    "total_orders", "total_spent", "avg_order_value",
+    "distinct_products", "frequency"
+]
+
+_ARTIFACTS = {}   # artifact key -> artifact, for this process
+_HASHES = {}      # source path -> {"output_sha256", "output_size", "output_mtime"}
+
+
+def build_preprocessor(categorical_features=CATEGORICAL_FEATURES, numeric_features=NUMERIC_FEATURES):
+    return ColumnTransformer(
+        transformers=[
+            ("cat", OneHotEncoder(handle_unknown="ignore"), categorical_features),
+            ("num", StandardScaler(), numeric_features)
+        ]
+    )
+
+
+def _source_hash(path: Path) -> str:
+    """sha256 of the input, re-hashed only when its size or mtime changes."""
+    stat = path.stat()
+    digest = file_checksum(path, _HASHES.get(str(path)))
+    _HASHES[str(path)] = {"output_sha256": digest, "output_size": stat.st_size, "output_mtime": stat.st_mtime}
+    return digest
+
+
+def artifact_key(source_hash: str, seed: int = RANDOM_STATE, test_size: float = TEST_SIZE,
+                 categorical_features=CATEGORICAL_FEATURES, numeric_features=NUMERIC_FEATURES) -> str:
+    spec = {
+        "version": ARTIFACT_VERSION, "sklearn": sklearn.__version__, "source": source_hash,
+        "seed": seed, "test_size": test_size,
+        "categorical": list(categorical_features), "numeric": list(numeric_features),
+    }
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _load_frame(path: Path) -> pd.DataFrame:
+    logger.info(f"Loading data from {path}")
+    return schemas.read_frame(path)  # registry dtypes: float32 ratios, int8 churned, pyarrow ids
 
-def train_churn_model(csv_path: str, model: str, features:dict=None):
-    # Define features
-    categorical_features = ["customer_state"]
-    numeric_features = [
-        "total_orders", "total_spent", "avg_order_value",
-        "distinct_products", "frequency", "recency"
-    ]
-    
-    # --- Load Data ---
-    logger.info(f"Loading data from {csv_path}")
-    df = pd.read_csv(csv_path)
-
-    
 
+def prepare_churn_data(csv_path=None, seed: int = RANDOM_STATE, test_size: float = TEST_SIZE,
+                       refresh: bool = False) -> dict:
+    """
+    Split ML_churn_features and fit the preprocessor on the training rows, once per input version.
+    csv_path=None uses the latest "churn" feature-store snapshot.
+    Returns {"key", "source", "X_train", "X_test", "y_train", "y_test",
+             "preprocessor" (fitted), "Xt_train", "Xt_test", "feature_names"}.
+    refresh=True ignores both caches and rebuilds the artifact.
+    """
+    path = Path(csv_path) if csv_path else feature_store.resolve_snapshot("churn")
+    key = artifact_key(_source_hash(path), seed, test_size)
+    if not refresh and key in _ARTIFACTS:
+        return _ARTIFACTS[key]
+
+    artifact_path = ARTIFACT_DIR / f"churn_{key}.joblib"
+    if not refresh and artifact_path.exists():
+        logger.info(f"Reusing preprocessing artifact {artifact_path.name}")
+        _ARTIFACTS[key] = joblib.load(artifact_path)
+        return _ARTIFACTS[key]
+
+    df = _load_frame(path)
     # Drop identifier
     df = df.drop(columns=["customer_id"])
-    required_columns = categorical_features + numeric_features + [ "churned"]
-    missing_columns = [col for col in required_columns if col not in df.columns]
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
     if missing_columns:
         logger.error(f"Missing columns in data: {missing_columns}")
         raise ValueError(f"Missing columns in data: {missing_columns}")
@@ -39,62 +113,66 @@ def train_churn_model(csv_path: str, model: str, features:dict=None):
     X = df.drop(columns=["churned"])
     y = df["churned"].astype(int)  # Ensure target is integer type
 
-    # Define column types
-    categorical_features = [] #"customer_state" - dropped
-
-    #NOTE dropped recency - similar calculations as churned
-    numeric_features = [
-        "total_orders", "total_spent", "avg_order_value",
-        "distinct_products", "frequency"
-    ]
-
-    # --- Preprocessing ---
-    preprocessor = ColumnTransformer(
-        transformers=[
-            ("cat", OneHotEncoder(handle_unknown="ignore"), categorical_features),
-            ("num", StandardScaler(), numeric_features)
-        ]
-    )
-
     # --- Split ---
     X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
+        X, y, test_size=test_size, random_state=seed, stratify=y
     )
+
+    # --- Preprocessing (fit on the training rows only) ---
+    preprocessor = build_preprocessor()
+    Xt_train = preprocessor.fit_transform(X_train)
+    Xt_test = preprocessor.transform(X_test)
+
+    artifact = {
+        "key": key, "source": str(path),
+        "X_train": X_train, "X_test": X_test, "y_train": y_train, "y_test": y_test,
+        "preprocessor": preprocessor, "Xt_train": Xt_train, "Xt_test": Xt_test,
+        "feature_names": list(preprocessor.get_feature_names_out()),
+    }
+    ARTIFACT_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = artifact_path.with_name(artifact_path.name + ".part")
+    joblib.dump(artifact, tmp_path)
+    os.replace(tmp_path, artifact_path)
+    logger.info(f"Saved preprocessing artifact {artifact_path.name}")
+    _ARTIFACTS[key] = artifact
+    return artifact
+
+
+def train_churn_model(csv_path: str, model: str, features:dict=None):
+    """
+    Pipeline for `model` plus the cached split (see prepare_churn_data).
+    The pipeline's preprocessor is already fitted; fit only the classifier on Xt_train,
+    e.g. pipeline.named_steps["classifier"].fit(results["Xt_train"], results["y_train"]).
+    csv_path=None reads the latest "churn" snapshot from the feature store instead of a file.
+    """
     # --- Model Training ---
     if model not in ["logistic_regression", "random_forest"]:
         logger.error("Model must be 'logistic_regression' or 'random_forest'")
         raise ValueError("Model must be 'logistic_regression' or 'random_forest'")
 
+    data = prepare_churn_data(csv_path)
+
     if model == "logistic_regression":
         # Logistic Regression Pipeline
         logger.info("Setting up Logistic Regression pipeline")
-        pipeline = Pipeline(steps=[
-            ("preprocessor", preprocessor),
-            ("classifier", LogisticRegression(max_iter=1000, class_weight="balanced"))
-        ])
-        logger.info("Logistic Regression pipeline created")
-        return {
-            "pipeline": pipeline,
-            "X_train": X_train,
-            "X_test": X_test,
-            "y_train": y_train,
-            "y_test": y_test,
-        }
-    
-
-    # --- Random Forest Pipeline ---
-    if model == "random_forest":
+        classifier = LogisticRegression(max_iter=1000, class_weight="balanced")
+    else:
+        # --- Random Forest Pipeline ---
         logger.info("Setting up Random Forest pipeline")
-        pipeline = Pipeline(steps=[
-            ("preprocessor", preprocessor),
-            ("classifier", RandomForestClassifier(n_estimators=200, random_state=42, class_weight="balanced"))
-        ])
-        logger.info("Random Forest pipeline created")
-        return {
-            "pipeline": pipeline,
-            "X_train": X_train,
-            "X_test": X_test,
-            "y_train": y_train,
-            "y_test": y_test,
-        }
+        classifier = RandomForestClassifier(n_estimators=200, random_state=42, class_weight="balanced")
 
+    pipeline = Pipeline(steps=[
+        ("preprocessor", data["preprocessor"]),
+        ("classifier", classifier)
+    ])
+    logger.info(f"{model} pipeline created (artifact {data['key']})")
+    return {
+        "pipeline": pipeline,
+        "X_train": data["X_train"],
+        "X_test": data["X_test"],
+        "y_train": data["y_train"],
+        "y_test": data["y_test"],
+        "Xt_train": data["Xt_train"],
+        "Xt_test": data["Xt_test"],
+        "artifact_key": data["key"],
+    }
@@ -5,11 +5,24 @@ from sklearn.metrics import accuracy_score, roc_auc_score, classification_report
 from xgboost import XGBClassifier
 import matplotlib.pyplot as plt
 import logging
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))   # results/, for feature_store
+import feature_store
 
 logging.basicConfig(level=logging.INFO)
 
 # ---------- 1. Load Data ----------
-df = pd.read_csv("results/csvs_in/orders_curated.csv")
+# only the columns used below, from the latest "order" snapshot (ingested from orders_curated on first use)
+df = feature_store.read_features("order", columns=[
+    "days_est_vs_actual", "freight_ratio_outlier", "neg_days_to_carrier", "neg_days_carrier_to_customer",
+    "hours_to_approval", "days_to_carrier", "order_items_value", "freight_value", "freight_ratio",
+    "distinct_sellers", "distinct_products", "total_items", "max_installments",
+])
 
 # ---------- 2. Target ----------
 logging.info("Creating target variable 'late_delivery'")
@@ -52,6 +65,17 @@ logging.info("Accuracy: %f", accuracy_score(y_test, pred))
 logging.info("ROC AUC: %f", roc_auc_score(y_test, prob))
 logging.info("\nClassification Report:\n%s", classification_report(y_test, pred))
 
+# ---------- 7b. Save Model ----------
+# next to the churn pipelines, so prediction_server.py can load it without retraining
+model_dir = Path(__file__).resolve().parents[1] / "models"
+model_dir.mkdir(parents=True, exist_ok=True)
+for file in model_dir.glob("delivery_xgboost_*.joblib"):
+    logging.info("Removing old model file: %s", file)
+    file.unlink()
+model_path = model_dir / f"delivery_xgboost_{datetime.now().strftime('%Y%m%d_%H%M%S')}.joblib"
+joblib.dump(model, model_path)
+logging.info("Model saved to %s", model_path)
+
 # ---------- 8. Feature Importance ----------
 feat_imp = pd.Series(model.feature_importances_, index=base_features).sort_values()
 plt.figure(figsize=(8,6))
@@ -0,0 +1,256 @@
+import argparse
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import joblib
+import numpy as np
+import pandas as pd
+
+ML_DIR = Path(__file__).resolve().parent
+sys.path.append(str(ML_DIR.parent))                               # results/, for feature_store
+sys.path.append(str(ML_DIR / "churn_prediction" / "v1"))          # batch_score helpers
+import feature_store
+from batch_score import latest_model, model_columns
+
+logger = logging.getLogger(__name__)
+
+# --- Config ---
+HOST = "127.0.0.1"
+PORT = 8080
+MAX_BATCH = 256          # requests folded into one predict_proba call
+MAX_WAIT_MS = 2          # how long the first request in a batch waits for company
+LATENCY_WINDOW = 10_000  # recent requests kept per endpoint for the percentiles
+
+# model name -> saved-model prefix in results/ML/models and the feature group it reads
+# (churn prefix None = newest of the logistic regression / random forest pipelines)
+MODELS = {
+    "churn": {"prefix": None, "group": "churn"},
+    "delivery": {"prefix": "delivery_xgboost", "group": "order"},
+}
+
+
+def _feature_names(model) -> list:
+    """Input columns of a sklearn pipeline or an XGBClassifier fit on a DataFrame."""
+    if hasattr(model, "feature_names_in_") or hasattr(model, "named_steps"):
+        return model_columns(model)
+    return list(model.get_booster().feature_names)
+
+
+class LatencyTracker:
+    """Rolling request latencies for one endpoint."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            samples = np.array(self._samples)
+        if samples.size == 0:
+            return {"count": self.count, "p50_ms": None, "p99_ms": None}
+        p50, p99 = np.percentile(samples, [50, 99]) * 1000
+        return {"count": self.count, "p50_ms": round(p50, 3), "p99_ms": round(p99, 3)}
+
+
+class WarmModel:
+    """
+    One model plus its features, both held in memory.
+    Features come from the latest feature-store snapshot (only the model's columns), indexed
+    by entity id so a lookup is a hash probe instead of a file read.
+    """
+
+    def __init__(self, name: str, model_path: Path = None):
+        spec = MODELS[name]
+        self.name = name
+        self.model_path = Path(model_path) if model_path else latest_model(spec["prefix"])
+        self.model = joblib.load(self.model_path)
+        self.columns = _feature_names(self.model)
+        features = feature_store.read_features(spec["group"], columns=self.columns)
+        self.key = feature_store.FEATURE_GROUPS[spec["group"]]["key"]
+        self.features = features.set_index(self.key)[self.columns]
+        if name == "delivery":
+            self.features = self.features.fillna(0)   # same as delivery_prediction.py
+        self.positions = pd.Index(self.features.index)
+        logger.info("Loaded %s model %s with %d feature rows", name, self.model_path.name, len(self.features))
+
+    def predict(self, ids: list) -> dict:
+        """{id: probability} for the ids that have features; unknown ids are left out."""
+        pos = self.positions.get_indexer(ids)
+        found = pos >= 0
+        if not found.any():
+            return {}
+        rows = self.features.iloc[pos[found]]
+        proba = self.model.predict_proba(rows)[:, 1]
+        return dict(zip(np.asarray(ids, dtype=object)[found], proba.tolist()))
+
+
+class MicroBatcher:
+    """
+    Collects concurrent single-id requests and scores them with one predict_proba call.
+    A batch closes when it reaches MAX_BATCH ids or MAX_WAIT_MS after its first request.
+    """
+
+    def __init__(self, model: WarmModel, max_batch: int = MAX_BATCH, max_wait_ms: float = MAX_WAIT_MS):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.batch_sizes = deque(maxlen=LATENCY_WINDOW)
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, name=f"batcher-{model.name}", daemon=True).start()
+
+    def submit(self, entity_id: str) -> Future:
+        future = Future()
+        self._queue.put((entity_id, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.batch_sizes.append(len(batch))
+            try:
+                scores = self.model.predict([entity_id for entity_id, _ in batch])
+                for entity_id, future in batch:
+                    future.set_result(scores.get(entity_id))
+            except Exception as e:
+                logger.error("Batch of %d %s predictions failed: %s", len(batch), self.model.name, e)
+                for _, future in batch:
+                    future.set_exception(e)
+
+
+class PredictionService:
+    """In-process API: warm models, micro-batching and latency metrics. The HTTP server wraps this."""
+
+    def __init__(self, names=None, model_paths: dict = None):
+        model_paths = model_paths or {}
+        self.batchers = {}
+        for name in names or MODELS:
+            try:
+                self.batchers[name] = MicroBatcher(WarmModel(name, model_paths.get(name)))
+            except FileNotFoundError as e:
+                logger.warning("Not serving %s: %s", name, e)
+        self.latency = {name: LatencyTracker() for name in self.batchers}
+
+    def predict(self, name: str, entity_id: str, timeout: float = 5.0):
+        """Probability for one customer/order id, or None when it has no features."""
+        if name not in self.batchers:
+            raise KeyError(name)
+        start = time.perf_counter()
+        try:
+            return self.batchers[name].submit(entity_id).result(timeout)
+        finally:
+            self.latency[name].record(time.perf_counter() - start)
+
+    def predict_many(self, name: str, ids: list) -> dict:
+        """Direct batch call (no queueing) for callers that already have a list of ids."""
+        start = time.perf_counter()
+        try:
+            return self.batchers[name].model.predict(list(ids))
+        finally:
+            self.latency[name].record(time.perf_counter() - start)
+
+    def metrics(self) -> dict:
+        out = {}
+        for name, batcher in self.batchers.items():
+            sizes = list(batcher.batch_sizes)
+            out[name] = {
+                **self.latency[name].summary(),
+                "model": batcher.model.model_path.name,
+                "mean_batch_size": round(sum(sizes) / len(sizes), 2) if sizes else None,
+            }
+        return out
+
+
+def make_handler(service: PredictionService):
+    class Handler(BaseHTTPRequestHandler):
+        # GET /churn?id=<customer_id>, GET /delivery?id=<order_id>,
+        # POST /churn {"ids": [...]}, GET /metrics, GET /health
+
+        def _send(self, status: int, body: dict):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            name = url.path.strip("/")
+            if name == "health":
+                return self._send(200, {"status": "ok", "models": list(service.batchers)})
+            if name == "metrics":
+                return self._send(200, service.metrics())
+            if name not in service.batchers:
+                return self._send(404, {"error": f"unknown endpoint {url.path}"})
+            entity_id = parse_qs(url.query).get("id", [None])[0]
+            if not entity_id:
+                return self._send(400, {"error": "missing ?id="})
+            try:
+                proba = service.predict(name, entity_id)
+            except Exception as e:
+                return self._send(500, {"error": str(e)})
+            if proba is None:
+                return self._send(404, {"id": entity_id, "error": "no features for this id"})
+            return self._send(200, {"id": entity_id, "probability": proba})
+
+        def do_POST(self):
+            name = urlparse(self.path).path.strip("/")
+            if name not in service.batchers:
+                return self._send(404, {"error": f"unknown endpoint {self.path}"})
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                scores = service.predict_many(name, body["ids"])
+            except (ValueError, KeyError, TypeError) as e:
+                return self._send(400, {"error": f"expected {{\"ids\": [...]}}: {e}"})
+            return self._send(200, {"probabilities": scores})
+
+        def log_message(self, format, *args):
+            logger.debug(format, *args)
+
+    return Handler
+
+
+def serve(host: str = HOST, port: int = PORT, names=None):
+    service = PredictionService(names)
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    logger.info("Serving %s on http://%s:%d", list(service.batchers), host, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Serve churn / late-delivery probabilities over HTTP")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--models", nargs="+", choices=list(MODELS), help="default: every model that has been trained")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.models)
@@ -1,9 +1,11 @@
 import os
+import time
 import logging
 import pandas as pd
 import boto3
 from pathlib import Path
 from sqlalchemy import text
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import sys
 from pathlib import Path
 
@@ -11,14 +13,39 @@ from pathlib import Path
 ROOT_DIR = Path(__file__).resolve().parent.parent
 sys.path.append(str(ROOT_DIR))
 
-from quick import generate_engine
-from s3_methods import connect_s3
+from quick import generate_engine, pool_metrics
+from s3_methods import connect_s3, list_objects, object_info, forget_object
+import manifest as mf
+import query_profiler as qp
+import schemas
+from s3_transfer import upload_files, download_files, FILE_WORKERS, CODECS, codec_of
 
 # --- CONFIG ---
 LOCAL_OUTPUT_DIR = Path("results/csvs_out")
 LOCAL_INPUT_DIR = Path("results/csvs_in")
 BUCKET_NAME = "brazil-retail-results"
 BASE_DIR = Path(__file__).resolve().parent   # directory of main.py (results/)
+MAX_WORKERS = 4   # concurrent queries for extract_and_save_queries_parallel
+STREAM_CHUNK_SIZE = 50_000   # rows fetched per round trip when streaming
+S3_PREFIX = "results/output_csvs/"
+
+# --- OUTPUT FORMATS ---
+# csv stays the default; parquet keeps exact dtypes and allows column-projected reads
+OUTPUT_FORMAT = "csv"
+FORMAT_SUFFIXES = {"csv": ".csv", "parquet": ".parquet"}
+PARQUET_COMPRESSION = "zstd"
+
+# --- COMPRESSION ---
+# None | "gzip" | "zstd": CSVs are compressed while uploading (parquet is already compressed)
+COMPRESSION = None
+# False keeps .csv.gz/.csv.zst as downloaded (load_csv_as_df reads them directly),
+# True decompresses the stream into a plain .csv while downloading
+DECOMPRESS_ON_DOWNLOAD = False
+
+# --- PROFILING ---
+# True times each query's execute/fetch/write stages and saves EXPLAIN (ANALYZE, BUFFERS)
+# plans to results/profiles (see query_profiler.py); EXPLAIN ANALYZE runs every query twice
+PROFILE = os.environ.get("EXTRACT_PROFILE") == "1"
 
 
 # --- LOGGING SETUP ---
@@ -34,8 +61,37 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def output_path(name: str, fmt: str = OUTPUT_FORMAT, folder: Path = LOCAL_OUTPUT_DIR) -> Path:
+    """Local file for query output `name` in the given format."""
+    if fmt not in FORMAT_SUFFIXES:
+        raise ValueError(f"Unknown output format {fmt!r}, expected one of {list(FORMAT_SUFFIXES)}")
+    return folder / f"{name}{FORMAT_SUFFIXES[fmt]}"
+
+
+def format_of(path) -> str:
+    """Output format of a file, from its suffix."""
+    suffix = Path(path).suffix.lower()
+    for fmt, fmt_suffix in FORMAT_SUFFIXES.items():
+        if suffix == fmt_suffix:
+            return fmt
+    raise ValueError(f"Unsupported output file {path}")
+
+
+def output_files(folder: Path):
+    """All pipeline outputs (any supported format) in folder."""
+    return sorted(f for f in folder.glob("*") if f.suffix.lower() in FORMAT_SUFFIXES.values())
+
+
+def write_frame(df: pd.DataFrame, path: Path, fmt: str):
+    if fmt == "parquet":
+        df.to_parquet(path, index=False, compression=PARQUET_COMPRESSION)
+    else:
+        df.to_csv(path, index=False)
+
+
 # 1. Extract → run queries and save results as CSV
-def extract_and_save_query(name, path, engine):
+def extract_and_save_query(name, path, engine, fmt: str = OUTPUT_FORMAT, profile: bool = PROFILE):
+    """Run one query into output_path(name, fmt). Returns the rows written, or None if it failed."""
     LOCAL_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
    
@@ -43,70 +99,275 @@ def extract_and_save_query(name, path, engine):
 
     logger.info("Starting extract_and_save_queries")
 
+    csv_path = output_path(name, fmt)
     try:
         sql = Path(path).read_text()
+        if profile:
+            stats = qp.profile_query(name, sql, engine, lambda df: write_frame(df, csv_path, fmt) or csv_path)
+            return stats["rows"]
         df = pd.read_sql_query(text(sql), engine)
-        csv_path = LOCAL_OUTPUT_DIR / f"{name}.csv"
-        df.to_csv(csv_path, index=False)
+        write_frame(df, csv_path, fmt)
         logger.info("Saved %s (%d rows) → %s", name, len(df), csv_path)
+        return len(df)
     except Exception as e:
             logger.error("Failed to run query %s at %s: %s", name, path, e)
-    return {name: csv_path}
+    return None
 
 
-# 2. Load → upload CSVs to S3
-def upload_file_to_s3(local_file, s3):
-    logger.info("Uploading %s to S3 bucket %s", local_file, BUCKET_NAME)
+class _ChunkWriter:
+    """
+    Appends DataFrame chunks to one CSV or Parquet file.
+    The Parquet schema is fixed when the file is opened, so chunks are held back while any
+    column has only been NULL so far (Arrow types it `null`) and written once a later chunk
+    gives it a real type, or at close if it never gets one.
+    """
+
+    def __init__(self, path: Path, fmt: str):
+        self.path = path
+        self.fmt = fmt
+        self._file = None
+        self._parquet = None
+        self._pending = []   # Arrow tables waiting for every column to have a type
+
+    def write(self, chunk: pd.DataFrame):
+        if self.fmt == "parquet":
+            import pyarrow as pa
+
+            if self._parquet is None:
+                self._pending.append(pa.Table.from_pandas(chunk, preserve_index=False))
+                schema = pa.unify_schemas([t.schema for t in self._pending])   # null widens to the later type
+                if not any(pa.types.is_null(field.type) for field in schema):
+                    self._flush(schema)
+            else:
+                table = pa.Table.from_pandas(chunk, schema=self._parquet.schema, preserve_index=False)
+                self._parquet.write_table(table)
+        else:
+            if self._file is None:
+                self._file = open(self.path, "w", newline="")
+                chunk.to_csv(self._file, index=False)
+            else:
+                chunk.to_csv(self._file, index=False, header=False)
+
+    def _flush(self, schema):
+        import pyarrow.parquet as pq
+
+        self._parquet = pq.ParquetWriter(self.path, schema, compression=PARQUET_COMPRESSION)
+        for table in self._pending:
+            self._parquet.write_table(table.cast(schema))
+        self._pending = []
+
+    def close(self):
+        if self._parquet is None and self._pending:
+            import pyarrow as pa
+
+            self._flush(pa.unify_schemas([t.schema for t in self._pending]))
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._file is not None:
+            self._file.close()
 
-    key = f"results/output_csvs/{Path(local_file).name}"
+
+def stream_query_to_file(name, path, engine, fmt: str = OUTPUT_FORMAT, chunk_size: int = STREAM_CHUNK_SIZE):
+    """
+    Like extract_and_save_query, but never holds the whole result in memory.
+    Rows come through a server-side (named) cursor chunk_size at a time and each
+    chunk is appended to the CSV/Parquet file as soon as it arrives.
+    Returns the rows written, or None if it failed.
+    """
+    LOCAL_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    logger.info("Streaming query %s in chunks of %d rows", name, chunk_size)
+
+    csv_path = output_path(name, fmt)
+    tmp_path = csv_path.with_name(csv_path.name + ".part")
     try:
-        s3.upload_file(str(local_file), BUCKET_NAME, key)
-        logger.info("Uploaded %s → s3://%s/%s", local_file, BUCKET_NAME, key)
+        sql = Path(path).read_text()
+        rows = 0
+        writer = _ChunkWriter(tmp_path, fmt)
+        # stream_results=True makes psycopg2 use a named cursor, so the server keeps the result set
+        try:
+            with engine.connect().execution_options(stream_results=True, max_row_buffer=chunk_size) as conn:
+                for chunk in pd.read_sql_query(text(sql), conn, chunksize=chunk_size):
+                    writer.write(chunk)
+                    rows += len(chunk)
+        finally:
+            writer.close()
+        tmp_path.replace(csv_path)   # only publish complete files
+        logger.info("Streamed %s (%d rows) → %s", name, rows, csv_path)
+        return rows
     except Exception as e:
-        logger.error("Error uploading %s: %s", local_file, e)
+        logger.error("Failed to stream query %s at %s: %s", name, path, e)
+        tmp_path.unlink(missing_ok=True)
+    return None
+
+
+# 2. Load → upload CSVs to S3
+CONTENT_TYPES = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+def codec_for(local_file, compression=COMPRESSION):
+    """Codec used for a local output on upload: only CSVs get compressed."""
+    return compression if compression and format_of(local_file) == "csv" else None
+
+def s3_key_for(local_file, compression=None) -> str:
+    key = f"{S3_PREFIX}{Path(local_file).name}"
+    codec = codec_for(local_file, compression)
+    return key + CODECS[codec][0] if codec else key
+
+def strip_codec(name: str) -> str:
+    """x.csv.gz → x.csv"""
+    codec = codec_of(name)
+    return name[: -len(CODECS[codec][0])] if codec else name
+
+def upload_extra_args(local_file) -> dict:
+    return {"ContentType": CONTENT_TYPES[format_of(local_file)]}
+
+def _drop_other_encodings(s3, local_file, key):
+    """After switching compression, remove the copy stored under the old key."""
+    variants = {s3_key_for(local_file)} | {s3_key_for(local_file, codec) for codec in CODECS}
+    for other in variants - {key}:
+        if object_info(s3, BUCKET_NAME, other) is not None:
+            s3.delete_object(Bucket=BUCKET_NAME, Key=other)
+            forget_object(BUCKET_NAME, other)
+            logger.info("Removed s3://%s/%s (replaced by %s)", BUCKET_NAME, other, key)
+
+def upload_outputs(s3, files, compression=COMPRESSION, max_workers: int = FILE_WORKERS) -> dict:
+    """Upload local outputs in parallel, compressing CSVs on the fly when compression is set."""
+    keys = {file: s3_key_for(file, compression) for file in files}
+    stats = upload_files(
+        s3, BUCKET_NAME, list(keys.items()), max_workers,
+        extra_args_for=upload_extra_args,
+        compression=lambda file: codec_for(file, compression),
+    )
+    for file in stats["succeeded"]:
+        try:
+            _drop_other_encodings(s3, file, keys[file])
+        except Exception as e:
+            logger.error("Could not clean up old copies of %s: %s", file, e)
+    return stats
+
+def upload_file_to_s3(local_file, s3, compression=COMPRESSION):
+    logger.info("Uploading %s to S3 bucket %s", local_file, BUCKET_NAME)
+    stats = upload_outputs(s3, [Path(local_file)], compression)
+    return not stats["failed"]
 
 
 # 3. Download → sync CSVs from S3 to local results/csvs_in
-def download_file_from_s3(key, s3):
+def is_output_key(key: str, fmt: str = None) -> bool:
+    """True for S3 keys holding a pipeline output (optionally only of format fmt), compressed or not."""
+    suffixes = [FORMAT_SUFFIXES[fmt]] if fmt else FORMAT_SUFFIXES.values()
+    return any(strip_codec(key.lower()).endswith(suffix) for suffix in suffixes)
+
+def local_input_path(key: str, decompress: bool = DECOMPRESS_ON_DOWNLOAD) -> Path:
+    filename = Path(key).name
+    return LOCAL_INPUT_DIR / (strip_codec(filename) if decompress else filename)
+
+def _drop_local_encodings(local_path: Path, manifest: dict = None):
+    """After a download, remove local copies of the same output in another encoding."""
+    plain = local_path.with_name(strip_codec(local_path.name))
+    for other in [plain] + [plain.with_name(plain.name + suffix) for suffix, _ in CODECS.values()]:
+        if other != local_path and other.exists():
+            other.unlink()
+            if manifest is not None:
+                manifest["outputs"].pop(other.name, None)
+            logger.info("Removed %s (replaced by %s)", other, local_path.name)
+
+def download_file_from_s3(key, s3, decompress: bool = DECOMPRESS_ON_DOWNLOAD):
     LOCAL_INPUT_DIR.mkdir(parents=True, exist_ok=True)
-    try:
-            filename = Path(key).name
-            local_path = LOCAL_INPUT_DIR / filename
-
-            s3.download_file(BUCKET_NAME, key, str(local_path))
-            logger.info("⬇Downloaded %s → %s", key, local_path)
-    except Exception as e:
-        logger.error("Failed to download from S3: %s", e)
+    local_path = local_input_path(key, decompress)
+    stats = download_files(s3, BUCKET_NAME, [(key, local_path)], decompress=decompress)
+    if stats["failed"]:
+        return False
+    _drop_local_encodings(local_path)
+    return True
 
 #read/write all quries
-def extract_and_save_queries():
+def _extract(name, path, engine, stream=False, fmt=OUTPUT_FORMAT, profile=PROFILE):
+    """Rows written by whichever extractor applies (None on failure)."""
+    # profiling times the in-memory path, so it takes precedence over streaming
+    if stream and not profile:
+        return stream_query_to_file(name, path, engine, fmt)
+    return extract_and_save_query(name, path, engine, fmt, profile)
+
+def extract_and_save_queries(stream: bool = False, fmt: str = OUTPUT_FORMAT, profile: bool = PROFILE):
   query_files = list(Path("queries").rglob("*.sql"))
   results = {}
   engine= generate_engine()
   for path in query_files:
       name = f"{path.parent.name}_{path.stem}"
-      result = extract_and_save_query(name, path, engine)
-      results.update(result)
+      _extract(name, path, engine, stream, fmt, profile)
+      results[name] = output_path(name, fmt)
+  if profile:
+      qp.write_report()
   return results
-def exd_key(key: str, path: str):
+
+def _timed_extract(name, path, engine, stream=False, fmt=OUTPUT_FORMAT, profile=PROFILE):
+    start = time.perf_counter()
+    rows = _extract(name, path, engine, stream, fmt, profile)
+    return name, rows, time.perf_counter() - start
+
+def extract_and_save_queries_parallel(max_workers: int = MAX_WORKERS, stream: bool = False,
+                                      fmt: str = OUTPUT_FORMAT, profile: bool = PROFILE):
+    """
+    Same as extract_and_save_queries, but runs the queries on a bounded thread pool
+    sharing one pooled engine (one connection per worker, reused by later calls).
+    A failing query is logged and skipped, the others keep running.
+    stream=True writes each result through stream_query_to_file.
+    profile=True records per-query timings and plans and writes the ranked report.
+    """
+    query_files = list(Path("queries").rglob("*.sql"))
+    results = {}
+    timings = {}
+    engine = generate_engine(pool_size=max_workers, max_overflow=0)
+
+    logger.info("Extracting %d queries with %d workers", len(query_files), max_workers)
+    run_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(_timed_extract, f"{path.parent.name}_{path.stem}", path, engine, stream, fmt, profile): path
+            for path in query_files
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                name, _, elapsed = future.result()
+            except Exception as e:
+                logger.error("Query worker failed for %s: %s", path, e)
+                continue
+            results[name] = output_path(name, fmt)
+            timings[name] = elapsed
+            logger.info("Query %s finished in %.2fs", name, elapsed)
+    total = time.perf_counter() - run_start
+
+    for name, elapsed in sorted(timings.items(), key=lambda kv: kv[1], reverse=True):
+        logger.info("  %-35s %8.2fs", name, elapsed)
+    logger.info(
+        "Extracted %d queries in %.2fs (sum of query times %.2fs)",
+        len(timings), total, sum(timings.values())
+    )
+    logger.info("Connection pools: %s", pool_metrics())
+    if profile:
+        qp.write_report()
+    return results
+
+def exd_key(key: str, path: str, fmt: str = OUTPUT_FORMAT):
     """
-    Run a single SQL query (from path), save as CSV with 'key' as the filename,
+    Run a single SQL query (from path), save as CSV (or fmt) with 'key' as the filename,
     upload to S3, and download it back locally.
     """
-    engine = generate_engine()   # DB engine for SQLAlchemy
+    engine = generate_engine()   # shared DB engine, built on the first call
     s3 = connect_s3()            # boto3 S3 client
 
     name = Path(key).stem  # remove .csv extension if passed
     try:
         # 1. Run SQL & save locally
-        result = extract_and_save_query(name, path, engine)
+        extract_and_save_query(name, path, engine, fmt)
+        local_csv = output_path(name, fmt)
+        result = {name: local_csv}
 
         # 2. Upload the CSV to S3
-        local_csv = LOCAL_OUTPUT_DIR / f"{name}.csv"
         upload_file_to_s3(local_csv, s3)
 
         # 3. Download it back from S3
-        s3_key = f"results/output_csvs/{local_csv.name}"
+        s3_key = s3_key_for(local_csv, COMPRESSION)
         download_file_from_s3(s3_key, s3)
 
         return result
@@ -116,73 +377,154 @@ def exd_key(key: str, path: str):
     
 
 
-def upload_to_s3():
+def upload_to_s3(max_workers: int = FILE_WORKERS, compression=COMPRESSION):
     s3=connect_s3()
-    for file in LOCAL_OUTPUT_DIR.glob("*.csv"):
-        upload_file_to_s3(file, s3)
+    return upload_outputs(s3, output_files(LOCAL_OUTPUT_DIR), compression, max_workers)
 
-def download_from_s3():
+def download_from_s3(fmt: str = None, max_workers: int = FILE_WORKERS,
+                     decompress: bool = DECOMPRESS_ON_DOWNLOAD):
     s3=connect_s3()
-    files=s3.list_objects_v2(Bucket=BUCKET_NAME, Prefix="results/output_csvs/")
-    for file in files.get('Contents', []):
-        download_file_from_s3(file['Key'], s3)
-
-#only for new queries
-def is_new_file(file,s3):
-    logger.info("Checking if %s is new in S3", file.name)
+    LOCAL_INPUT_DIR.mkdir(parents=True, exist_ok=True)
+    files = {
+        key: local_input_path(key, decompress)
+        for key in list_objects(s3, BUCKET_NAME, S3_PREFIX) if is_output_key(key, fmt)
+    }
+    stats = download_files(s3, BUCKET_NAME, list(files.items()), max_workers, decompress=decompress)
+    for key in stats["succeeded"]:
+        _drop_local_encodings(files[key])
+    return stats
+
+def extract_and_save_new_queries(fmt: str = OUTPUT_FORMAT):
+    """
+    Re-run only the queries whose output is stale according to the build manifest:
+    no entry yet, the .sql text changed, or a table it reads changed since the last extract.
+    """
     s3 = connect_s3()
-    s3_key = f"results/output_csvs/{file.name}"
-   
-    try:
-        s3.head_object(Bucket=BUCKET_NAME, Key=s3_key)
-        return False  # File exists in S3
-    except s3.exceptions.ClientError as e:
-        if e.response['Error']['Code'] == '404':
-            return True  # File does not exist in S3
-        else:
-            logger.error("Error checking file in S3: %s", e)
-            return False
+    manifest_path = LOCAL_OUTPUT_DIR / mf.MANIFEST_NAME
+    manifest = mf.load_manifest(manifest_path)
+    if not manifest["outputs"]:
+        # fresh checkout: start from what the last run published
+        manifest = mf.load_remote_manifest(s3, BUCKET_NAME)
 
-def extract_and_save_new_queries():
-    s3 = connect_s3()
     query_files = list(Path("queries").rglob("*.sql"))
     results = {}
     engine = generate_engine()
+    all_versions = mf.table_versions(engine)
     for path in query_files:
         name = f"{path.parent.name}_{path.stem}"
-        if is_new_file(LOCAL_OUTPUT_DIR / f"{name}.csv", s3):
-            logger.info("Extracting and saving NEW query %s", name)
-            result = extract_and_save_query(name, path, engine)
-            results.update(result)
+        out_path = output_path(name, fmt)
+        sql = path.read_text()
+        sql_hash = mf.sha256_text(sql)
+        versions = {t: all_versions.get(t) for t in mf.tables_read(sql)}
+
+        reason = mf.stale_reason(manifest["outputs"].get(out_path.name), sql_hash, versions)
+        if reason is None:
+            logger.info("Skipping %s (up to date)", name)
+            continue
+        logger.info("Extracting %s: %s", name, reason)
+        rows = extract_and_save_query(name, path, engine, fmt)
+        if rows is not None:
+            mf.record_output(manifest, name, out_path, sql_hash, versions, rows)
+            results[name] = out_path
+    mf.save_manifest(manifest, manifest_path)
     return results
 
-def upload_new_to_s3():
+def upload_new_to_s3(compression=COMPRESSION):
+    """Upload outputs whose checksum differs from what was last uploaded, then publish the manifest."""
     s3 = connect_s3()
-    for file in LOCAL_OUTPUT_DIR.glob("*.csv"):
-        if is_new_file(file,s3):
-            logger.info("Uploading NEW %s to S3", file.name)
-            upload_file_to_s3(file, s3)
-
-def download_new_from_s3():
+    manifest_path = LOCAL_OUTPUT_DIR / mf.MANIFEST_NAME
+    manifest = mf.load_manifest(manifest_path)
+    changed = {}
+    for file in output_files(LOCAL_OUTPUT_DIR):
+        entry = manifest["outputs"].setdefault(file.name, {})
+        checksum = mf.file_checksum(file, entry)
+        if entry.get("uploaded_sha256") == checksum:
+            continue
+        logger.info("Uploading CHANGED %s to S3", file.name)
+        changed[file] = checksum
+
+    stats = upload_outputs(s3, list(changed), compression)
+    for file in stats["succeeded"]:
+        stat = file.stat()
+        manifest["outputs"][file.name].update({
+            "output_sha256": changed[file], "output_size": stat.st_size,
+            "output_mtime": stat.st_mtime, "uploaded_sha256": changed[file],
+            "uploaded_key": s3_key_for(file, compression),
+        })
+    mf.save_manifest(manifest, manifest_path)
+    if stats["succeeded"]:
+        mf.save_remote_manifest(manifest, s3, BUCKET_NAME)
+    logger.info("Uploaded %d changed file(s)", len(stats["succeeded"]))
+
+def _is_current(local_path: Path, record: dict, published: str) -> bool:
+    """Local copy matches the published checksum (recorded at download time, or by hashing)."""
+    stat = local_path.stat()
+    if record and record.get("source_sha256") == published \
+            and record.get("output_size") == stat.st_size and record.get("output_mtime") == stat.st_mtime:
+        return True
+    return codec_of(local_path.name) is None and mf.file_checksum(local_path, record) == published
+
+def download_new_from_s3(decompress: bool = DECOMPRESS_ON_DOWNLOAD):
+    """Download outputs whose published checksum differs from the local copy in LOCAL_INPUT_DIR."""
     s3=connect_s3()
-    files=s3.list_objects_v2(Bucket=BUCKET_NAME, Prefix="results/output_csvs/")
-    for file in files.get('Contents', []):
-        local_path = LOCAL_INPUT_DIR / Path(file['Key']).name
-        if not local_path.exists():
-            logger.info("Downloading NEW %s from S3", file['Key'])
-            download_file_from_s3(file['Key'], s3)
-def exd_new():
-    extract_and_save_new_queries()
-    upload_new_to_s3()
-    download_new_from_s3()
+    remote = mf.load_remote_manifest(s3, BUCKET_NAME)
+    local_manifest_path = LOCAL_INPUT_DIR / mf.MANIFEST_NAME
+    local = mf.load_manifest(local_manifest_path)
+    LOCAL_INPUT_DIR.mkdir(parents=True, exist_ok=True)
+
+    changed = {}
+    for key in list_objects(s3, BUCKET_NAME, S3_PREFIX):
+        if not is_output_key(key):
+            continue
+        local_path = local_input_path(key, decompress)
+        published = remote["outputs"].get(strip_codec(Path(key).name), {}).get("uploaded_sha256")
+        record = local["outputs"].get(local_path.name)
+        if local_path.exists():
+            if published is None:
+                continue   # not tracked by the manifest: keep the old "exists locally" rule
+            if _is_current(local_path, record, published):
+                continue
+        logger.info("Downloading CHANGED %s from S3", key)
+        changed[key] = (local_path, published)
+
+    stats = download_files(s3, BUCKET_NAME, [(key, path) for key, (path, _) in changed.items()],
+                           decompress=decompress)
+    for key in stats["succeeded"]:
+        local_path, published = changed[key]
+        stat = local_path.stat()
+        local["outputs"][local_path.name] = {
+            "output_sha256": mf.sha256_file(local_path),
+            "source_sha256": published,
+            "output_size": stat.st_size, "output_mtime": stat.st_mtime,
+        }
+        _drop_local_encodings(local_path, local)
+    mf.save_manifest(local, local_manifest_path)
+
+def exd_new(fmt: str = OUTPUT_FORMAT, compression=COMPRESSION, decompress: bool = DECOMPRESS_ON_DOWNLOAD):
+    extract_and_save_new_queries(fmt)
+    upload_new_to_s3(compression)
+    download_new_from_s3(decompress)
 
 # 4. Create DataFrame loader
-def load_csv_as_df(name: str) -> pd.DataFrame:
-    """Load a specific CSV (by filename without extension) into a pandas DataFrame"""
+def load_csv_as_df(name: str, columns: list = None) -> pd.DataFrame:
+    """
+    Load a specific output file (CSV or Parquet, picked by suffix) into a pandas DataFrame.
+    columns limits the read to those columns; Parquet skips the others on disk.
+    A .csv that was downloaded compressed (.csv.gz / .csv.zst) is decompressed while parsing.
+    Column dtypes come from schemas.COLUMN_TYPES.
+    """
     logging.info("Loading %s.csv into DataFrame", name)
     file_path = name
+    if not Path(file_path).exists():
+        for suffix, _ in CODECS.values():
+            if Path(f"{file_path}{suffix}").exists():
+                file_path = f"{file_path}{suffix}"
+                break
     try:
-        df = pd.read_csv(file_path)
+        if Path(file_path).suffix.lower() == FORMAT_SUFFIXES["parquet"]:
+            df = schemas.read_parquet(file_path, columns=columns)
+        else:
+            df = schemas.read_csv(file_path, columns=columns)
     except FileNotFoundError:
         logger.error("File not found: %s", file_path)
         return pd.DataFrame()  # Return an empty DataFrame on error
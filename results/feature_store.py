@@ -0,0 +1,200 @@
+import argparse
+import logging
+import os
+import shutil
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import schemas
+
+logger = logging.getLogger(__name__)
+
+# --- Config ---
+BASE_DIR = Path(__file__).resolve().parent   # results/
+STORE_DIR = BASE_DIR / "feature_store"
+SOURCE_DIR = BASE_DIR / "csvs_in"            # where download_from_s3 puts the curated outputs
+ROW_GROUP_SIZE = 8_192                       # rows per Parquet row group; smaller = cheaper point lookups
+COMPRESSION = "zstd"
+
+# feature group -> entity key and the curated output it is built from (extract_store file name)
+FEATURE_GROUPS = {
+    "customer": {"key": "customer_unique_id", "source": "customers_curated"},
+    "order": {"key": "order_id", "source": "orders_curated"},
+    "product": {"key": "product_id", "source": "products_curated"},
+    "churn": {"key": "customer_id", "source": "ML_churn_features"},
+}
+
+# Layout: STORE_DIR/<group>/snapshot=<YYYY-MM-DD>/features.parquet, rows sorted by the key,
+# so row-group min/max statistics let a lookup skip every group that cannot hold the id.
+
+
+def _group(group: str) -> dict:
+    if group not in FEATURE_GROUPS:
+        raise ValueError(f"Unknown feature group {group!r}, expected one of {list(FEATURE_GROUPS)}")
+    return FEATURE_GROUPS[group]
+
+
+def snapshot_path(group: str, snapshot: str, store_dir: Path = None) -> Path:
+    return Path(store_dir or STORE_DIR) / group / f"snapshot={snapshot}" / "features.parquet"
+
+
+def snapshots(group: str, store_dir: Path = None) -> list:
+    """Snapshot dates (YYYY-MM-DD strings) available for a group, oldest first."""
+    _group(group)
+    group_dir = Path(store_dir or STORE_DIR) / group
+    if not group_dir.exists():
+        return []
+    return sorted(
+        p.name.split("=", 1)[1] for p in group_dir.glob("snapshot=*")
+        if (p / "features.parquet").exists()
+    )
+
+
+def source_path(group: str, source_dir: Path = None) -> Path:
+    """Curated output for a group, preferring the Parquet extract over the CSV."""
+    name = _group(group)["source"]
+    source_dir = Path(source_dir or SOURCE_DIR)
+    for suffix in (".parquet", ".csv", ".csv.gz", ".csv.zst"):
+        path = source_dir / f"{name}{suffix}"
+        if path.exists():
+            return path
+    raise FileNotFoundError(f"No {name} output in {source_dir}")
+
+
+def ingest(group: str, snapshot: str = None, source: Path = None, store_dir: Path = None) -> Path:
+    """
+    Write one snapshot of a feature group from its curated output.
+    Rows are sorted by the entity key and written as zstd Parquet in ROW_GROUP_SIZE groups.
+    Re-ingesting the same snapshot date replaces it. Returns the Parquet path.
+    """
+    key = _group(group)["key"]
+    snapshot = snapshot or date.today().isoformat()
+    source = Path(source) if source else source_path(group)
+
+    df = schemas.read_frame(source)   # snapshots keep the registry dtypes in their Parquet schema
+    if key not in df.columns:
+        raise ValueError(f"{source} has no {key} column for feature group {group}")
+    dupes = df[key].duplicated()
+    if dupes.any():
+        logger.warning("%s: dropping %d rows with a repeated %s", group, int(dupes.sum()), key)
+        df = df[~dupes]
+    df = df.sort_values(key, kind="stable").reset_index(drop=True)
+
+    out_path = snapshot_path(group, snapshot, store_dir)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_name(out_path.name + ".part")
+    pq.write_table(
+        pa.Table.from_pandas(df, preserve_index=False), tmp_path,
+        row_group_size=ROW_GROUP_SIZE, compression=COMPRESSION, write_statistics=True,
+    )
+    os.replace(tmp_path, out_path)
+    logger.info("Ingested %s snapshot %s: %d rows from %s → %s", group, snapshot, len(df), source, out_path)
+    return out_path
+
+
+def ingest_all(snapshot: str = None, source_dir: Path = None, store_dir: Path = None) -> dict:
+    """Ingest every group whose curated output exists. Returns {group: path}."""
+    written = {}
+    for group in FEATURE_GROUPS:
+        try:
+            written[group] = ingest(group, snapshot, source_path(group, source_dir), store_dir)
+        except FileNotFoundError as e:
+            logger.warning("Skipping %s: %s", group, e)
+    return written
+
+
+def _source_is_newer(group: str, path: Path, source_dir: Path = None) -> bool:
+    """True when the group's curated output changed after the snapshot at path was written."""
+    try:
+        return source_path(group, source_dir).stat().st_mtime > path.stat().st_mtime
+    except FileNotFoundError:
+        return False
+
+
+def resolve_snapshot(group: str, snapshot: str = None, store_dir: Path = None, source_dir: Path = None) -> Path:
+    """
+    Path of the requested (default: latest) snapshot. The latest is (re-)ingested as today's
+    when the group has none yet or its curated output is newer than the snapshot, so readers
+    pick up a fresh download without an explicit ingest.
+    """
+    if snapshot is None:
+        available = snapshots(group, store_dir)
+        if not available:
+            logger.info("No %s snapshot yet, ingesting from %s", group, source_dir or SOURCE_DIR)
+            return ingest(group, source=source_path(group, source_dir), store_dir=store_dir)
+        latest = snapshot_path(group, available[-1], store_dir)
+        if _source_is_newer(group, latest, source_dir):
+            logger.info("%s output is newer than snapshot %s, re-ingesting", group, available[-1])
+            return ingest(group, source=source_path(group, source_dir), store_dir=store_dir)
+        return latest
+    path = snapshot_path(group, snapshot, store_dir)
+    if not path.exists():
+        raise FileNotFoundError(f"No {group} snapshot {snapshot} in {Path(store_dir or STORE_DIR)}")
+    return path
+
+
+def _columns(group: str, columns) -> list:
+    """Requested columns with the entity key first; None means every column."""
+    if columns is None:
+        return None
+    key = _group(group)["key"]
+    return [key] + [c for c in columns if c != key]
+
+
+def read_features(group: str, columns: list = None, snapshot: str = None,
+                  filters=None, store_dir: Path = None) -> pd.DataFrame:
+    """
+    Batch read of a feature group. Only `columns` (plus the key) are read from disk;
+    filters are pyarrow predicates pushed down to the row groups,
+    e.g. [("customer_state", "==", "SP")].
+    """
+    path = resolve_snapshot(group, snapshot, store_dir)
+    return pd.read_parquet(path, columns=_columns(group, columns), filters=filters)
+
+
+def get_features(group: str, ids, columns: list = None, snapshot: str = None,
+                 store_dir: Path = None) -> pd.DataFrame:
+    """
+    Point lookup: feature rows for the given entity ids, indexed by the key.
+    Ids that are not in the snapshot are missing from the result.
+    """
+    key = _group(group)["key"]
+    ids = list(ids)
+    if not ids:
+        return read_features(group, columns, snapshot, store_dir=store_dir).head(0).set_index(key)
+    df = read_features(group, columns, snapshot, filters=[(key, "in", ids)], store_dir=store_dir)
+    return df.set_index(key)
+
+
+def prune(group: str, keep: int = 3, store_dir: Path = None) -> list:
+    """Delete all but the newest `keep` snapshots of a group. Returns the removed dates."""
+    removed = snapshots(group, store_dir)[:-keep] if keep > 0 else snapshots(group, store_dir)
+    for snapshot in removed:
+        shutil.rmtree(snapshot_path(group, snapshot, store_dir).parent)
+        logger.info("Removed %s snapshot %s", group, snapshot)
+    return removed
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Local feature store over the curated outputs")
+    parser.add_argument("action", choices=["ingest", "list", "prune"])
+    parser.add_argument("--groups", nargs="+", choices=list(FEATURE_GROUPS), default=list(FEATURE_GROUPS))
+    parser.add_argument("--snapshot", help="snapshot date YYYY-MM-DD (default: today)")
+    parser.add_argument("--keep", type=int, default=3, help="snapshots kept per group by prune")
+    args = parser.parse_args()
+
+    for group in args.groups:
+        if args.action == "ingest":
+            try:
+                ingest(group, args.snapshot)
+            except FileNotFoundError as e:
+                logger.warning("Skipping %s: %s", group, e)
+        elif args.action == "list":
+            print(group, snapshots(group))
+        else:
+            prune(group, args.keep)
@@ -2,14 +2,18 @@ import pandas as pd
 import folium
 from folium.plugins import HeatMap
 import logging
+import sys
 from pathlib import Path
 from folium.plugins import MarkerCluster
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))   # results/, for schemas
+import schemas
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 # --- Step 1: Load CSV ---
 CSV_PATH = "results/csvs_in/orders_geo_location.csv"
-df = pd.read_csv(CSV_PATH)
+df = schemas.read_csv(CSV_PATH)
 
 # If you have NaNs, drop them
 df = df.dropna(subset=["order_lat", "order_lng"])
@@ -1,10 +1,14 @@
 import logging
 from KPIs.total_revenue import generate_kpi
 import extract_store
+import feature_store
 
 
 logging.basicConfig(level=logging.INFO)
 
 if __name__ == "__main__":
    extract_store.exd_new()
-   # extract_store.exd_key("ML_churn_features.csv","queries/ML/churn_features.sql")
\ No newline at end of file
+   feature_store.ingest_all()   # snapshot the downloaded curated outputs for the ML scripts
+   # extract_store.exd_key("ML_churn_features.csv","queries/ML/churn_features.sql")
+   # extract_store.extract_and_save_queries_parallel(max_workers=4)
+   # extract_store.extract_and_save_queries(profile=True)   # timings + plans → results/profiles/report.txt
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import logging
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Build manifest for incremental refreshes.
+# One entry per output file:
+#   {"query": name, "sql_sha256": ..., "tables": {table: version},
+#    "output_sha256": ..., "output_size": ..., "output_mtime": ..., "rows": ...,
+#    "uploaded_sha256": ..., "extracted_at": ...}
+# Table versions come from pg_stat_user_tables, whose counters are statistics, not data:
+# pg_stat_reset() or a failover to a replica resets them, which marks every output stale
+# (one full re-extract, never a missed change unless the counters land on the same values).
+MANIFEST_NAME = "manifest.json"
+MANIFEST_S3_KEY = "results/manifest.json"
+
+# Tables from rds-set-up/create_tables.sql plus the ones load_data.py builds
+KNOWN_TABLES = {
+    "customers", "geolocation", "geolocation_filtered", "zip_centroids", "sellers", "orders",
+    "order_items", "order_payments", "order_reviews", "products",
+    "product_category_name_translation", "customer_order_agg", "feature_build_state",
+}
+
+_TABLE_REF = re.compile(r"\b(?:from|join)\s+([a-z_][a-z0-9_]*)", re.IGNORECASE)
+
+
+def sha256_text(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def sha256_file(path, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_checksum(path: Path, record: dict = None) -> str:
+    """
+    sha256 of path, reusing record["output_sha256"] when size and mtime still match,
+    so unchanged files are not re-hashed on every run.
+    """
+    stat = path.stat()
+    if record and record.get("output_size") == stat.st_size and record.get("output_mtime") == stat.st_mtime:
+        return record["output_sha256"]
+    return sha256_file(path)
+
+
+def tables_read(sql: str) -> list:
+    """Base tables a query reads (FROM/JOIN targets that are real tables, not CTEs)."""
+    return sorted({t.lower() for t in _TABLE_REF.findall(sql)} & KNOWN_TABLES)
+
+
+def table_versions(engine, tables=None) -> dict:
+    """
+    Cheap version stamp per table from pg_stat_user_tables.
+    The relid changes when a load drops and recreates a table; the tuple counters
+    change on any insert/update/delete. On the DuckDB backend the stamp is the
+    load time and row count duckdb_backend.py records in pipeline_load_log.
+    """
+    if engine.dialect.name == "duckdb":
+        query = text("SELECT table_name AS relname, loaded_at, row_count FROM pipeline_load_log")
+    else:
+        query = text("""
+            SELECT relname, relid, n_tup_ins, n_tup_upd, n_tup_del
+            FROM pg_stat_user_tables
+        """)
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(query).fetchall()
+    except Exception as e:
+        logger.error("Could not read table versions: %s", e)
+        return {}
+    if engine.dialect.name == "duckdb":
+        versions = {r.relname: f"{r.loaded_at.isoformat()}:{r.row_count}" for r in rows}
+    else:
+        versions = {r.relname: f"{r.relid}:{r.n_tup_ins}:{r.n_tup_upd}:{r.n_tup_del}" for r in rows}
+    if tables is not None:
+        versions = {t: versions.get(t) for t in tables}
+    return versions
+
+
+def load_manifest(path: Path) -> dict:
+    if not Path(path).exists():
+        return {"outputs": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: dict, path: Path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    tmp.replace(path)
+
+
+def load_remote_manifest(s3, bucket: str, key: str = MANIFEST_S3_KEY) -> dict:
+    try:
+        body = s3.get_object(Bucket=bucket, Key=key)["Body"].read()
+    except s3.exceptions.NoSuchKey:
+        return {"outputs": {}}
+    except Exception as e:
+        logger.error("Could not read manifest s3://%s/%s: %s", bucket, key, e)
+        return {"outputs": {}}
+    return json.loads(body)
+
+
+def save_remote_manifest(manifest: dict, s3, bucket: str, key: str = MANIFEST_S3_KEY):
+    s3.put_object(
+        Bucket=bucket, Key=key,
+        Body=json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"),
+        ContentType="application/json",
+    )
+    logger.info("Saved manifest → s3://%s/%s", bucket, key)
+
+
+def stale_reason(entry: dict, sql_hash: str, versions: dict):
+    """Why an output needs re-extracting, or None when it is up to date."""
+    if entry is None:
+        return "no manifest entry"
+    if entry.get("sql_sha256") != sql_hash:
+        return "query text changed"
+    changed = [t for t, v in versions.items() if v is None or entry.get("tables", {}).get(t) != v]
+    if changed:
+        return f"upstream tables changed: {changed}"
+    return None
+
+
+def record_output(manifest: dict, query: str, out_path: Path, sql_hash: str, versions: dict, rows: int):
+    stat = out_path.stat()
+    entry = manifest["outputs"].get(out_path.name, {})
+    entry.update({
+        "query": query,
+        "sql_sha256": sql_hash,
+        "tables": versions,
+        "output_sha256": sha256_file(out_path),
+        "output_size": stat.st_size,
+        "output_mtime": stat.st_mtime,
+        "rows": rows,
+        "extracted_at": datetime.now(timezone.utc).isoformat(),
+    })
+    manifest["outputs"][out_path.name] = entry
+    return entry
@@ -0,0 +1,174 @@
+import argparse
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# --- Config ---
+BASE_DIR = Path(__file__).resolve().parent   # results/
+PROFILE_DIR = BASE_DIR / "profiles"          # <query>.json per profiled query, plus the report
+TOP_NODES = 5                                # worst plan nodes listed per query in the report
+
+# One JSON per query:
+#   {"query", "profiled_at", "wall_s", "execute_s", "fetch_s", "serialize_s", "rows", "bytes",
+#    "planning_ms", "db_execution_ms", "nodes": [worst plan nodes], "plan": EXPLAIN output}
+# execute/fetch/serialize are measured on the client: execute = until the driver returns
+# (psycopg2 buffers the whole result, so this includes the transfer), fetch = building the
+# DataFrame, serialize = writing the output file. db_execution_ms is the server's own figure
+# from EXPLAIN ANALYZE, which runs the query a second time.
+
+
+def explain_analyze(conn, sql: str):
+    """EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) output for one statement, or None off Postgres."""
+    if conn.dialect.name != "postgresql":
+        logger.info("Skipping EXPLAIN ANALYZE on %s", conn.dialect.name)
+        return None
+    statement = sql.strip().rstrip(";")
+    plan = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}")).scalar()
+    return json.loads(plan) if isinstance(plan, str) else plan
+
+
+def plan_nodes(plan) -> list:
+    """
+    Every node of an EXPLAIN JSON plan with its exclusive time (its own time minus its
+    children's), slowest first. Times are per loop in the plan, so both are multiplied by loops.
+    """
+    nodes = []
+
+    def total_ms(node):
+        return node.get("Actual Total Time", 0.0) * node.get("Actual Loops", 1)
+
+    def walk(node, depth):
+        children = node.get("Plans", [])
+        nodes.append({
+            "node": node.get("Node Type"),
+            "relation": node.get("Relation Name") or node.get("CTE Name") or node.get("Index Name"),
+            "depth": depth,
+            "exclusive_ms": round(max(total_ms(node) - sum(total_ms(c) for c in children), 0.0), 3),
+            "total_ms": round(total_ms(node), 3),
+            "rows": node.get("Actual Rows", 0) * node.get("Actual Loops", 1),
+            "plan_rows": node.get("Plan Rows"),
+            "loops": node.get("Actual Loops", 1),
+            "shared_hit_blocks": node.get("Shared Hit Blocks", 0),
+            "shared_read_blocks": node.get("Shared Read Blocks", 0),
+            "temp_written_blocks": node.get("Temp Written Blocks", 0),
+        })
+        for child in children:
+            walk(child, depth + 1)
+
+    walk(plan[0]["Plan"], 0)
+    return sorted(nodes, key=lambda n: n["exclusive_ms"], reverse=True)
+
+
+def save_profile(profile: dict, profile_dir: Path = None) -> Path:
+    profile_dir = Path(profile_dir or PROFILE_DIR)
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    path = profile_dir / f"{profile['query']}.json"
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(profile, f, indent=2, default=str)
+    os.replace(tmp, path)
+    return path
+
+
+def profile_query(name: str, sql: str, engine, write, explain: bool = True, profile_dir: Path = None) -> dict:
+    """
+    Run one query the way extract_and_save_query does, timing each stage.
+    write(df) -> Path writes the output file. explain=False skips EXPLAIN ANALYZE
+    (which runs the query again). The profile is saved to profile_dir/<name>.json.
+    """
+    start = time.perf_counter()
+    with engine.connect() as conn:
+        result = conn.execute(text(sql))
+        executed = time.perf_counter()
+        df = pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+        fetched = time.perf_counter()
+    out_path = write(df)
+    written = time.perf_counter()
+
+    profile = {
+        "query": name,
+        "profiled_at": datetime.now().isoformat(timespec="seconds"),
+        "wall_s": written - start,
+        "execute_s": executed - start,
+        "fetch_s": fetched - executed,
+        "serialize_s": written - fetched,
+        "rows": len(df),
+        "bytes": Path(out_path).stat().st_size,
+        "planning_ms": None, "db_execution_ms": None, "nodes": [], "plan": None,
+    }
+    if explain:
+        try:
+            with engine.connect() as conn:
+                plan = explain_analyze(conn, sql)
+            if plan:
+                profile.update({
+                    "plan": plan,
+                    "planning_ms": plan[0].get("Planning Time"),
+                    "db_execution_ms": plan[0].get("Execution Time"),
+                    "nodes": plan_nodes(plan)[:TOP_NODES],
+                })
+        except Exception as e:
+            logger.error("EXPLAIN ANALYZE failed for %s: %s", name, e)
+
+    save_profile(profile, profile_dir)
+    logger.info("Profiled %s: %.2fs wall (execute %.2fs, fetch %.2fs, serialize %.2fs), %d rows, %d bytes",
+                name, profile["wall_s"], profile["execute_s"], profile["fetch_s"], profile["serialize_s"],
+                profile["rows"], profile["bytes"])
+    return profile
+
+
+def load_profiles(profile_dir: Path = None) -> list:
+    profile_dir = Path(profile_dir or PROFILE_DIR)
+    profiles = []
+    for path in sorted(profile_dir.glob("*.json")):
+        with open(path) as f:
+            profiles.append(json.load(f))
+    return profiles
+
+
+def write_report(profile_dir: Path = None, top: int = TOP_NODES) -> Path:
+    """
+    Rank the saved profiles by wall time into profile_dir/query_profile.csv and a readable
+    profile_dir/report.txt listing each query's worst plan nodes. Returns the report path.
+    """
+    profile_dir = Path(profile_dir or PROFILE_DIR)
+    profiles = sorted(load_profiles(profile_dir), key=lambda p: p["wall_s"], reverse=True)
+    columns = ["query", "wall_s", "execute_s", "fetch_s", "serialize_s", "rows", "bytes",
+               "planning_ms", "db_execution_ms", "profiled_at"]
+    table = pd.DataFrame([{c: p.get(c) for c in columns} for p in profiles], columns=columns)
+    table.insert(0, "rank", range(1, len(table) + 1))
+    table.to_csv(profile_dir / "query_profile.csv", index=False)
+
+    lines = [f"{'rank':>4} {'query':35} {'wall':>8} {'execute':>8} {'fetch':>8} {'write':>8} "
+             f"{'rows':>9} {'MB':>8} {'db ms':>10}"]
+    for rank, p in enumerate(profiles, 1):
+        db_ms = f"{p['db_execution_ms']:.1f}" if p.get("db_execution_ms") is not None else "-"
+        lines.append(f"{rank:>4} {p['query']:35} {p['wall_s']:7.2f}s {p['execute_s']:7.2f}s "
+                     f"{p['fetch_s']:7.2f}s {p['serialize_s']:7.2f}s {p['rows']:>9} "
+                     f"{p['bytes'] / 2**20:8.2f} {db_ms:>10}")
+        for node in p.get("nodes", [])[:top]:
+            relation = f" on {node['relation']}" if node.get("relation") else ""
+            lines.append(f"{'':9}{node['exclusive_ms']:10.1f} ms  {node['node']}{relation} "
+                         f"(rows {node['rows']}, est {node['plan_rows']}, loops {node['loops']}, "
+                         f"read {node['shared_read_blocks']} / hit {node['shared_hit_blocks']} blocks)")
+    report = profile_dir / "report.txt"
+    report.write_text("\n".join(lines) + "\n")
+    logger.info("Query profile report (%d queries) → %s\n%s", len(profiles), report, "\n".join(lines[:21]))
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Ranked report of the profiles saved by a profiled extract")
+    parser.add_argument("--dir", type=Path, default=PROFILE_DIR)
+    parser.add_argument("--top", type=int, default=TOP_NODES, help="plan nodes listed per query")
+    args = parser.parse_args()
+    print(write_report(args.dir, args.top).read_text())
@@ -1,22 +1,95 @@
 import boto3
 import boto3
+from botocore.config import Config
 from botocore.exceptions import NoCredentialsError
 import logging
 import os
+import threading
 
 logging.basicConfig(level=logging.INFO)
 
+# --- Inventory cache ---
+# (bucket, prefix) -> {key: {"size": int, "etag": str, "last_modified": datetime}}
+# Filled by one paginated listing per prefix and reused for the rest of the run.
+_INVENTORY = {}
+
 # --- Setup S3 client ---
-def connect_s3():
+# boto3 clients are thread-safe, so the whole process shares one.
+# Size the HTTP pool for parallel files x parallel parts (see s3_transfer.py).
+MAX_POOL_CONNECTIONS = 32
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+def connect_s3(shared: bool = True):
     """
     Creates an S3 client using credentials from aws configure or env vars.
+    The client is built once and reused; pass shared=False for a private one.
     """
+    global _CLIENT
+    if shared and _CLIENT is not None:
+        return _CLIENT
+    s3 = None
     try:
-        s3 = boto3.client("s3")
+        s3 = boto3.client("s3", config=Config(max_pool_connections=MAX_POOL_CONNECTIONS))
     except Exception as e:
         logging.error("Error connecting to S3: %s", e)
+        return s3
+    if shared:
+        with _CLIENT_LOCK:
+            if _CLIENT is None:
+                _CLIENT = s3
+            s3 = _CLIENT
     return s3
 
+def list_objects(s3, bucket_name: str, prefix: str, refresh: bool = False) -> dict:
+    """
+    Return {key: {"size", "etag", "last_modified"}} for every object under prefix.
+    Lists once with pagination (no 1000-key cap) and caches the result for the run;
+    pass refresh=True to list again.
+    """
+    cache_key = (bucket_name, prefix)
+    if refresh or cache_key not in _INVENTORY:
+        objects = {}
+        paginator = s3.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                objects[obj["Key"]] = {
+                    "size": obj["Size"],
+                    "etag": obj["ETag"].strip('"'),
+                    "last_modified": obj["LastModified"],
+                }
+        logging.info("Listed %d objects under s3://%s/%s", len(objects), bucket_name, prefix)
+        _INVENTORY[cache_key] = objects
+    return _INVENTORY[cache_key]
+
+
+def _parent_prefix(s3_key: str) -> str:
+    return s3_key.rsplit("/", 1)[0] + "/" if "/" in s3_key else ""
+
+
+def object_info(s3, bucket_name: str, s3_key: str):
+    """Inventory entry for s3_key (listing its folder once), or None if it does not exist."""
+    return list_objects(s3, bucket_name, _parent_prefix(s3_key)).get(s3_key)
+
+
+def record_object(bucket_name: str, s3_key: str, size: int, etag: str = None):
+    """Keep a cached listing in step with an upload made during this run."""
+    objects = _INVENTORY.get((bucket_name, _parent_prefix(s3_key)))
+    if objects is not None:
+        objects[s3_key] = {"size": size, "etag": etag, "last_modified": None}
+
+
+def forget_object(bucket_name: str, s3_key: str):
+    """Drop a deleted key from the cached listing."""
+    objects = _INVENTORY.get((bucket_name, _parent_prefix(s3_key)))
+    if objects is not None:
+        objects.pop(s3_key, None)
+
+
+def clear_inventory():
+    _INVENTORY.clear()
+
+
 def upload_file(local_path: str, bucket_name: str, s3_key: str):
     """
     Upload a file from local_path to s3://bucket_name/s3_key
@@ -24,6 +97,7 @@ def upload_file(local_path: str, bucket_name: str, s3_key: str):
     s3 = connect_s3()
     try:
         s3.upload_file(local_path, bucket_name, s3_key)
+        record_object(bucket_name, s3_key, os.path.getsize(local_path))
         logging.info(f" Uploaded {local_path} to s3://{bucket_name}/{s3_key}")
     except FileNotFoundError:
         logging.error(" The file was not found: %s", local_path)
@@ -33,15 +107,17 @@ def upload_file(local_path: str, bucket_name: str, s3_key: str):
 
 def upload_all_csvs(bucket_name: str, folder="results/out_put_csvs"):
     """
-    Upload all CSV files from the local folder to the S3 bucket.
+    Upload all CSV files from the local folder to the S3 bucket, several at a time.
     Keeps the same file names.
     """
+    from s3_transfer import upload_files
+
     s3 = connect_s3()
-    for file in os.listdir(folder):
-        if file.endswith(".csv"):
-            local_path = os.path.join(folder, file)
-            s3_key = f"out_put_csvs/{file}"  # folder path inside S3
-            upload_file(local_path, bucket_name, s3_key)
+    files = [
+        (os.path.join(folder, file), f"out_put_csvs/{file}")  # folder path inside S3
+        for file in os.listdir(folder) if file.endswith(".csv")
+    ]
+    return upload_files(s3, bucket_name, files)
 
 def get_file(bucket_name: str, s3_key: str, local_path: str):
     """
@@ -58,19 +134,20 @@ def get_file(bucket_name: str, s3_key: str, local_path: str):
 
 def get_all_csvs(bucket_name: str, folder="results/out_put_csvs"):
     """
-    Download all CSV files from the S3 bucket folder to the local folder.
+    Download all CSV files from the S3 bucket folder to the local folder, several at a time.
     Keeps the same file names.
     """
+    from s3_transfer import download_files
+
     s3 = connect_s3()
     try:
-        response = s3.list_objects_v2(Bucket=bucket_name, Prefix="out_put_csvs/")
-        if 'Contents' in response:
-            for obj in response['Contents']:
-                s3_key = obj['Key']
-                if s3_key.endswith(".csv"):
-                    file_name = os.path.basename(s3_key)
-                    local_path = os.path.join(folder, file_name)
-                    get_file(bucket_name, s3_key, local_path)
+        objects = list_objects(s3, bucket_name, "out_put_csvs/")
+        if objects:
+            files = [
+                (s3_key, os.path.join(folder, os.path.basename(s3_key)))
+                for s3_key in objects if s3_key.endswith(".csv")
+            ]
+            return download_files(s3, bucket_name, files)
         else:
             logging.info("No files found in the specified S3 folder.")
     except NoCredentialsError:
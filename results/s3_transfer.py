@@ -0,0 +1,213 @@
+import logging
+import os
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from boto3.s3.transfer import TransferConfig
+
+from s3_methods import record_object
+
+logger = logging.getLogger(__name__)
+
+# --- Transfer tuning ---
+MB = 1024 * 1024
+MULTIPART_THRESHOLD_MB = 64   # files above this go multipart
+PART_SIZE_MB = 16             # multipart chunk size (S3 minimum is 5 MB)
+PART_CONCURRENCY = 8          # parallel parts per large file
+FILE_WORKERS = 4              # files transferred at the same time
+
+# --- Compression ---
+# codec -> (key suffix, Content-Encoding). zstd needs the optional `zstandard` package.
+CODECS = {"gzip": (".gz", "gzip"), "zstd": (".zst", "zstd")}
+READ_BLOCK = 1 * MB
+
+
+class _GzipReader:
+    """File-like wrapper that gzips another file as it is read (for upload_fileobj)."""
+
+    def __init__(self, raw):
+        self._raw = raw
+        self._zip = zlib.compressobj(6, zlib.DEFLATED, 31)   # wbits=31 → gzip container
+        self._buffer = b""
+        self._done = False
+
+    def read(self, size=-1):
+        while not self._done and (size < 0 or len(self._buffer) < size):
+            block = self._raw.read(READ_BLOCK)
+            if block:
+                self._buffer += self._zip.compress(block)
+            else:
+                self._buffer += self._zip.flush()
+                self._done = True
+        if size < 0:
+            out, self._buffer = self._buffer, b""
+        else:
+            out, self._buffer = self._buffer[:size], self._buffer[size:]
+        return out
+
+
+class _CountingReader:
+    """Counts the bytes read through it (the compressed size that goes on the wire)."""
+
+    def __init__(self, raw):
+        self._raw = raw
+        self.count = 0
+
+    def read(self, size=-1):
+        data = self._raw.read(size)
+        self.count += len(data)
+        return data
+
+
+def compressing_reader(raw, codec: str):
+    if codec == "gzip":
+        return _GzipReader(raw)
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor().stream_reader(raw)
+    raise ValueError(f"Unknown codec {codec!r}, expected one of {list(CODECS)}")
+
+
+def decompressor(codec: str):
+    """Object with .decompress(bytes) for streaming decompression."""
+    if codec == "gzip":
+        return zlib.decompressobj(47)   # 32 + 15: accept the gzip header
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompressobj()
+    raise ValueError(f"Unknown codec {codec!r}, expected one of {list(CODECS)}")
+
+
+def codec_of(s3_key: str):
+    """Codec implied by the key suffix, or None for plain objects."""
+    for codec, (suffix, _) in CODECS.items():
+        if s3_key.endswith(suffix):
+            return codec
+    return None
+
+
+def transfer_config(part_size_mb: int = PART_SIZE_MB,
+                    threshold_mb: int = MULTIPART_THRESHOLD_MB,
+                    concurrency: int = PART_CONCURRENCY) -> TransferConfig:
+    """boto3 TransferConfig for multipart uploads/downloads."""
+    return TransferConfig(
+        multipart_threshold=threshold_mb * MB,
+        multipart_chunksize=part_size_mb * MB,
+        max_concurrency=concurrency,
+        use_threads=True,
+    )
+
+
+def _log_throughput(direction: str, stats: dict):
+    mb = stats["bytes"] / MB
+    rate = mb / stats["seconds"] if stats["seconds"] > 0 else 0.0
+    stats["mb_per_s"] = rate
+    logger.info(
+        "%s %d file(s), %.1f MB in %.2fs (%.1f MB/s), %d failed",
+        direction, len(stats["succeeded"]), mb, stats["seconds"], rate, len(stats["failed"])
+    )
+
+
+def upload_files(s3, bucket_name: str, files, max_workers: int = FILE_WORKERS,
+                 config: TransferConfig = None, extra_args_for=None, compression: str = None) -> dict:
+    """
+    Upload [(local_path, s3_key), ...] in parallel over one shared client.
+    extra_args_for(local_path) can return per-file ExtraArgs (ContentType, ...).
+    compression="gzip"/"zstd" compresses while streaming (no compressed copy on disk) and
+    tags the object with Content-Encoding; the caller picks the key (see CODECS suffixes).
+    compression may also be a callable local_path -> codec or None, to compress only some files.
+    Returns {"succeeded": [...], "failed": [...], "bytes", "wire_bytes", "seconds", "mb_per_s"}.
+    """
+    config = config or transfer_config()
+    stats = {"succeeded": [], "failed": [], "bytes": 0, "wire_bytes": 0, "seconds": 0.0}
+
+    def _upload(local_path, s3_key):
+        extra_args = dict(extra_args_for(local_path)) if extra_args_for else {}
+        size = os.path.getsize(local_path)
+        codec = compression(local_path) if callable(compression) else compression
+        if codec is None:
+            s3.upload_file(str(local_path), bucket_name, s3_key, ExtraArgs=extra_args or None, Config=config)
+            wire = size
+        else:
+            extra_args["ContentEncoding"] = CODECS[codec][1]
+            extra_args["Metadata"] = {"codec": codec, "raw-size": str(size)}
+            with open(local_path, "rb") as raw:
+                body = _CountingReader(compressing_reader(raw, codec))
+                s3.upload_fileobj(body, bucket_name, s3_key, ExtraArgs=extra_args, Config=config)
+            wire = body.count
+        record_object(bucket_name, s3_key, wire)
+        return size, wire
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(_upload, local, key): (local, key) for local, key in files}
+        for future in as_completed(futures):
+            local, key = futures[future]
+            try:
+                size, wire = future.result()
+                stats["bytes"] += size
+                stats["wire_bytes"] += wire
+                stats["succeeded"].append(local)
+                logger.info("Uploaded %s → s3://%s/%s (%d → %d bytes)", local, bucket_name, key, size, wire)
+            except Exception as e:
+                stats["failed"].append(local)
+                logger.error("Error uploading %s: %s", local, e)
+    stats["seconds"] = time.perf_counter() - start
+    _log_throughput("Uploaded", stats)
+    return stats
+
+
+def _download_decompressed(s3, bucket_name: str, s3_key: str, local_path, codec: str) -> int:
+    """Stream an object through the decompressor straight into local_path."""
+    body = s3.get_object(Bucket=bucket_name, Key=s3_key)["Body"]
+    unzip = decompressor(codec)
+    tmp_path = f"{local_path}.part"
+    try:
+        with open(tmp_path, "wb") as out:
+            for block in iter(lambda: body.read(READ_BLOCK), b""):
+                out.write(unzip.decompress(block))
+            if hasattr(unzip, "flush"):
+                out.write(unzip.flush())
+        os.replace(tmp_path, local_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return os.path.getsize(local_path)
+
+
+def download_files(s3, bucket_name: str, files, max_workers: int = FILE_WORKERS,
+                   config: TransferConfig = None, decompress: bool = False) -> dict:
+    """
+    Download [(s3_key, local_path), ...] in parallel over one shared client.
+    With decompress=True, .gz/.zst objects are decompressed on the fly into local_path;
+    otherwise they are saved as-is (pandas reads .gz/.zst directly).
+    Returns the same stats dict as upload_files (succeeded/failed hold s3 keys).
+    """
+    config = config or transfer_config()
+    stats = {"succeeded": [], "failed": [], "bytes": 0, "seconds": 0.0}
+
+    def _download(s3_key, local_path):
+        os.makedirs(os.path.dirname(str(local_path)) or ".", exist_ok=True)
+        codec = codec_of(s3_key)
+        if decompress and codec:
+            return _download_decompressed(s3, bucket_name, s3_key, local_path, codec)
+        s3.download_file(bucket_name, s3_key, str(local_path), Config=config)
+        return os.path.getsize(local_path)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(_download, key, local): (key, local) for key, local in files}
+        for future in as_completed(futures):
+            key, local = futures[future]
+            try:
+                stats["bytes"] += future.result()
+                stats["succeeded"].append(key)
+                logger.info("Downloaded s3://%s/%s → %s", bucket_name, key, local)
+            except Exception as e:
+                stats["failed"].append(key)
+                logger.error("Failed to download %s: %s", key, e)
+    stats["seconds"] = time.perf_counter() - start
+    _log_throughput("Downloaded", stats)
+    return stats
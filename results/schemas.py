@@ -0,0 +1,155 @@
+import argparse
+import logging
+import time
+from pathlib import Path
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Column dtypes for every CSV/Parquet the pipeline reads, keyed by column name.
+# Names mean the same thing in every output (customer_id is always an id, customer_state
+# always a state), so one registry covers the base tables in rds-set-up/create_tables.sql
+# and the aliases the queries in queries/ produce.
+#   id, text  -> pyarrow-backed strings (no per-value Python objects)
+#   category  -> pandas categoricals for low-cardinality labels
+#   money     -> float64; sums are compared to the cent against Postgres
+#   float32   -> durations, ratios, scores, coordinates (7 significant digits is plenty)
+#   count     -> nullable Int32 (LEFT JOIN outputs can be NULL)
+#   flag      -> int8 0/1
+#   timestamp -> parsed datetime64
+ID = "string[pyarrow]"
+TEXT = "string[pyarrow]"
+CATEGORY = "category"
+MONEY = "float64"
+FLOAT = "float32"
+COUNT = "Int32"
+FLAG = "int8"
+TIMESTAMP = "timestamp"   # handled by parse_dates, not dtype=
+
+COLUMN_TYPES = {
+    # --- ids ---
+    "customer_id": ID, "customer_unique_id": ID, "order_id": ID, "product_id": ID,
+    "seller_id": ID, "review_id": ID,
+    "review_comment_title": TEXT, "review_comment_message": TEXT,
+
+    # --- labels ---
+    "customer_state": CATEGORY, "seller_state": CATEGORY, "geolocation_state": CATEGORY,
+    "state": CATEGORY, "customer_city": CATEGORY, "seller_city": CATEGORY,
+    "geolocation_city": CATEGORY, "order_status": CATEGORY, "payment_type": CATEGORY,
+    "primary_payment_type": CATEGORY, "preferred_payment_type": CATEGORY,
+    "product_category_name": CATEGORY, "product_category_name_english": CATEGORY,
+    "category": CATEGORY,
+
+    # --- zip prefixes (5 digits) ---
+    "customer_zip_code_prefix": "Int32", "seller_zip_code_prefix": "Int32",
+    "geolocation_zip_code_prefix": "Int32",
+
+    # --- money ---
+    "price": MONEY, "freight_value": MONEY, "payment_value": MONEY,
+    "total_spent": MONEY, "total_revenue": MONEY, "total_sales": MONEY,
+    "order_items_value": MONEY, "avg_order_value": MONEY, "aov": MONEY,
+    "avg_price": MONEY, "avg_freight": MONEY,
+
+    # --- durations, ratios, scores, coordinates ---
+    "hours_to_approval": FLOAT, "days_to_carrier": FLOAT, "days_carrier_to_customer": FLOAT,
+    "days_est_vs_actual": FLOAT, "freight_ratio": FLOAT, "tenure_days": FLOAT,
+    "avg_items_per_order": FLOAT, "avg_days_between_orders": FLOAT, "avg_installments": FLOAT,
+    "avg_review_score": FLOAT, "avg_ship_days": FLOAT, "avg_seller_review": FLOAT,
+    "recency": FLOAT, "frequency": FLOAT,
+    "geolocation_lat": FLOAT, "geolocation_lng": FLOAT, "avg_lat": FLOAT, "avg_lng": FLOAT,
+    "order_lat": FLOAT, "order_lng": FLOAT,
+
+    # --- counts ---
+    "total_orders": COUNT, "distinct_products": COUNT, "distinct_sellers": COUNT,
+    "total_items": COUNT, "max_installments": COUNT, "orders_per_product": COUNT,
+    "orders_fulfilled": COUNT, "num_orders": COUNT, "num_payments": COUNT,
+    "num_customers": COUNT, "total_customers": COUNT, "order_count": COUNT,
+    "order_item_id": COUNT, "payment_sequential": COUNT, "payment_installments": COUNT,
+    "review_score": COUNT, "product_name_length": COUNT, "product_description_length": COUNT,
+    "product_photos_qty": COUNT, "product_weight_g": COUNT, "product_length_cm": COUNT,
+    "product_height_cm": COUNT, "product_width_cm": COUNT, "n_points": COUNT,
+
+    # --- flags ---
+    "churned": FLAG, "freight_ratio_outlier": FLAG, "neg_days_to_carrier": FLAG,
+    "neg_days_carrier_to_customer": FLAG,
+
+    # --- timestamps ---
+    "order_purchase_timestamp": TIMESTAMP, "order_approved_at": TIMESTAMP,
+    "order_delivered_carrier_date": TIMESTAMP, "order_delivered_customer_date": TIMESTAMP,
+    "order_estimated_delivery_date": TIMESTAMP, "shipping_limit_date": TIMESTAMP,
+    "review_creation_date": TIMESTAMP, "review_answer_timestamp": TIMESTAMP,
+    "first_purchase_ts": TIMESTAMP, "last_purchase_ts": TIMESTAMP, "month": TIMESTAMP,
+    "last_order_date": TIMESTAMP, "first_order_date": TIMESTAMP,
+}
+
+
+def dtypes_for(columns) -> tuple:
+    """(dtype dict, parse_dates list) for the registered columns among `columns`."""
+    dtypes, dates = {}, []
+    for column in columns:
+        kind = COLUMN_TYPES.get(column)
+        if kind == TIMESTAMP:
+            dates.append(column)
+        elif kind is not None:
+            dtypes[column] = kind
+    return dtypes, dates
+
+
+def read_csv(path, columns: list = None, **kwargs):
+    """
+    pd.read_csv with the registry applied. columns limits the read (usecols);
+    other kwargs (chunksize, nrows, ...) pass through. Unregistered columns keep pandas' inference.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    selected = [c for c in header if columns is None or c in columns]
+    dtypes, dates = dtypes_for(selected)
+    return pd.read_csv(path, usecols=columns, dtype=dtypes, parse_dates=dates or None, **kwargs)
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Cast an already-loaded frame (SQL result, Parquet without the schema) to the registry."""
+    dtypes, dates = dtypes_for(df.columns)
+    casts = {c: t for c, t in dtypes.items() if str(df[c].dtype) != t}
+    if casts:
+        df = df.astype(casts)
+    for column in dates:
+        if not pd.api.types.is_datetime64_any_dtype(df[column]):
+            df[column] = pd.to_datetime(df[column])
+    return df
+
+
+def read_parquet(path, columns: list = None, **kwargs) -> pd.DataFrame:
+    return apply_schema(pd.read_parquet(path, columns=columns, **kwargs))
+
+
+def read_frame(path, columns: list = None, **kwargs) -> pd.DataFrame:
+    """CSV or Parquet (picked by suffix) with the registry applied."""
+    if Path(path).suffix.lower() == ".parquet":
+        return read_parquet(path, columns, **kwargs)
+    return read_csv(path, columns, **kwargs)
+
+
+def compare(path) -> dict:
+    """Parse a CSV with and without the registry and report memory and time for each."""
+    start = time.perf_counter()
+    plain = pd.read_csv(path)
+    plain_s = time.perf_counter() - start
+    start = time.perf_counter()
+    typed = read_csv(path)
+    typed_s = time.perf_counter() - start
+
+    plain_mb = plain.memory_usage(deep=True).sum() / 2**20
+    typed_mb = typed.memory_usage(deep=True).sum() / 2**20
+    logger.info("%s: %.1f MB in %.2fs untyped, %.1f MB in %.2fs typed (%.1fx smaller)",
+                Path(path).name, plain_mb, plain_s, typed_mb, typed_s, plain_mb / typed_mb if typed_mb else 0)
+    return {"plain_mb": plain_mb, "typed_mb": typed_mb, "plain_s": plain_s, "typed_s": typed_s}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Memory/parse-time of CSVs with and without the dtype registry")
+    parser.add_argument("paths", nargs="*", type=Path)
+    args = parser.parse_args()
+    for path in args.paths or sorted(Path("results/csvs_in").glob("*.csv")):
+        compare(path)
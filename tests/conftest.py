@@ -0,0 +1,82 @@
+import logging
+
+import boto3
+import pytest
+from moto import mock_aws
+
+import curated_ref as CR
+import expectations as EX
+import query_cache as qc   # also puts results/ on sys.path
+import s3_methods
+
+logger = logging.getLogger(__name__)
+
+S3_BUCKET = "test-brazil-retail-results"   # created by the s3 fixture
+
+
+# Session fixtures are lazy: tests that never ask for them (schemas, feature store, ...)
+# do not need a database.
+
+@pytest.fixture(scope="session")
+def engine():
+    from quick import generate_engine, pool_metrics
+    yield generate_engine()   # shared with anything else in this process that asks for one
+    logger.info("Connection pools: %s", pool_metrics())
+
+
+@pytest.fixture(scope="session")
+def db_snapshot(engine):
+    snapshot = qc.snapshot_id(engine)
+    if snapshot is not None:
+        removed = qc.prune(keep=snapshot)
+        if removed:
+            logger.info("Dropped query cache for old snapshots %s", removed)
+    logger.info("Database snapshot %s", snapshot)
+    return snapshot
+
+
+@pytest.fixture(scope="session")
+def run_query(engine, db_snapshot):
+    """run_query(name, path) -> DataFrame, executed at most once per snapshot."""
+    def run(name, path):
+        return qc.run_query(name, path, engine, db_snapshot)
+    return run
+
+
+@pytest.fixture(scope="session")
+def reference_values(engine, db_snapshot):
+    """expectations.compute_reference_values; shares the cached reference_metrics row."""
+    return EX.compute_reference_values(engine, db_snapshot)
+
+
+@pytest.fixture(scope="session")
+def ref(engine, db_snapshot):
+    """curated_ref.compute_reference_values; shares the cached reference_metrics row."""
+    return CR.compute_reference_values(engine, db_snapshot)
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    """moto S3 client with an empty S3_BUCKET and a cleared s3_methods inventory."""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=S3_BUCKET)
+        s3_methods.clear_inventory()
+        yield client
+    s3_methods.clear_inventory()
+
+
+@pytest.fixture
+def s3_store(s3, monkeypatch, tmp_path):
+    """s3, with extract_store uploading to S3_BUCKET from tmp_path/out and downloading to tmp_path/in."""
+    import extract_store
+
+    monkeypatch.setattr(extract_store, "BUCKET_NAME", S3_BUCKET)
+    monkeypatch.setattr(extract_store, "LOCAL_OUTPUT_DIR", tmp_path / "out")
+    monkeypatch.setattr(extract_store, "LOCAL_INPUT_DIR", tmp_path / "in")
+    monkeypatch.setattr(extract_store, "connect_s3", lambda: s3)
+    (tmp_path / "out").mkdir()
+    return s3
@@ -1,43 +1,10 @@
-import pandas as pd
-def compute_reference_values(engine):
-    ref = {}
-
-    # --- Core counts & totals ---
-    ref["total_customers"] = pd.read_sql(
-        "SELECT COUNT(DISTINCT customer_unique_id) AS n FROM customers", engine
-    )["n"].iloc[0]
-
-    ref["total_gross_revenue"] = pd.read_sql(
-        "SELECT SUM(oi.price) AS s FROM order_items oi", engine
-    )["s"].iloc[0]
-
-    ref["total_orders"] = pd.read_sql(
-        "SELECT COUNT(*) AS n FROM orders", engine
-    )["n"].iloc[0]
+from reference_metrics import CURATED_REFERENCE, reference_values
 
-    ref["total_revenue"] = pd.read_sql(
-        "SELECT SUM(payment_value) AS s FROM order_payments", engine
-    )["s"].iloc[0]
-
-    ref["total_products"] = pd.read_sql(
-        "SELECT COUNT(DISTINCT product_id) AS n FROM products", engine
-    )["n"].iloc[0]
-
-    ref["total_sellers"] = pd.read_sql(
-        "SELECT COUNT(DISTINCT seller_id) AS n FROM sellers", engine
-    )["n"].iloc[0]
-
-    ref["total_order_items"] = pd.read_sql(
-        "SELECT COUNT(*) AS n FROM order_items", engine
-    )["n"].iloc[0]
+def compute_reference_values(engine, snapshot=None):
+    ref = {}
 
-    # Dataset time span for tenure bounds
-    ref["dataset_span_days"] = pd.read_sql("""
-        SELECT EXTRACT(EPOCH FROM (
-            MAX(order_purchase_timestamp) - MIN(order_purchase_timestamp)
-        ))/86400 AS span
-        FROM orders
-    """, engine)["span"].iloc[0]
+    # --- Core counts & totals, dataset time span for tenure bounds ---
+    ref.update(reference_values(engine, CURATED_REFERENCE, snapshot))
 
     # Expected column lists for schema checks
     ref["expected_customer_cols"] = [
@@ -6,7 +6,8 @@ import logging
 # reference_values.py
 import pandas as pd
 
-
+from expectation_engine import non_negative, row_check, run_expectations
+from features_expectations import aov_mismatch
 
 logger = logging.getLogger(__name__)
 
@@ -27,45 +28,28 @@ def total_spent_sum_matches(df, ref):
     expected = round(ref["total_revenue"], 2)
     return [] if abs(actual - expected) <= 1e-4 else [f"total_spent sum {actual} != {expected}"]
 
-def avg_order_value_consistency(df, ref=None):
-    errors = []
-    
-    for idx, r in df.iterrows():
-        if r["total_orders"] > 0:
-            exp = r["total_spent"]/r["total_orders"]
-            if abs(r["avg_order_value"] - exp) > 1e-6:
-                errors.append(f"{r['customer_unique_id']} AOV mismatch")
+avg_order_value_consistency = row_check(
+    "avg_order_value_consistency", ["total_orders", "total_spent", "avg_order_value"],
+    aov_mismatch, "with avg_order_value inconsistency", sample_column="customer_unique_id",
+)
 
-                
-    if errors:
-        return [f"{len(errors)} rows with avg_order_value inconsistency: {errors[:5]}..."]
-    return []
+tenure_within_span = row_check(
+    "tenure_within_span", ["tenure_days"],
+    lambda cols, ref: cols["tenure_days"] > ref["dataset_span_days"] + 1e-6,
+    "have tenure_days > dataset span", sample_column="customer_unique_id",
+)
 
-def tenure_within_span(df, ref):
-    span = ref["dataset_span_days"]
-    invalid = df[df["tenure_days"] > span + 1e-6]
-    return [] if invalid.empty else [f"{len(invalid)} rows have tenure_days > dataset span {span}"]
+NON_NEGATIVE_COLS = ["total_orders","total_spent","avg_order_value",
+                     "avg_items_per_order","avg_installments","tenure_days"]
 
 def numeric_non_negative(df, ref=None):
-    cols = ["total_orders","total_spent","avg_order_value",
-            "avg_items_per_order","avg_installments","tenure_days"]
-    errors = []
-    for c in cols:
-        if c in df.columns:
-            neg = df[df[c] < 0]
-            if not neg.empty:
-                errors.append(f"{c} has {len(neg)} negative values")
-    return errors
+    checks = [non_negative(c) for c in NON_NEGATIVE_COLS if c in df.columns]
+    return run_expectations(df, checks, ref, fail_fast=False)
 
-def run_all_expectations(df, ref):
+def run_all_expectations(df, ref, fail_fast=None):
     checks = [
         columns_exist, customer_count_matches,
         total_orders_sum_matches, total_spent_sum_matches,
         avg_order_value_consistency, tenure_within_span,
-        numeric_non_negative
-    ]
-    errs=[]
-    for c in checks:
-        logger.info("Running %s", c.__name__)
-        errs.extend(c(df, ref))
-    return errs
+    ] + [non_negative(c) for c in NON_NEGATIVE_COLS if c in df.columns]
+    return run_expectations(df, checks, ref, fail_fast)
@@ -0,0 +1,116 @@
+# ============================================================
+# Vectorized expectation engine
+# ============================================================
+# Two kinds of check share the `check(df, ref) -> list[str]` contract used by
+# query_expectations.py:
+#   - row checks, built with row_check(): a predicate returns a boolean mask of the
+#     failing rows, evaluated on whole columns at once. A failure is reported once,
+#     as a count plus a sample of at most SAMPLE_SIZE offending rows.
+#   - aggregate checks: any plain function (sums vs reference values, column lists).
+# run_expectations() runs a list of both kinds over one frame in a single pass: every
+# numeric column is converted once and shared by all checks, and fail_fast stops at
+# the first failing check.
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# --- Config ---
+SAMPLE_SIZE = 5                                               # offending rows quoted per failure
+FAIL_FAST = os.environ.get("EXPECTATIONS_FAIL_FAST") == "1"   # default for run_expectations
+
+
+class Columns(dict):
+    """Float64 arrays of a frame's columns, converted on first use and cached for the run."""
+
+    def __init__(self, df: pd.DataFrame):
+        super().__init__()
+        self.df = df
+
+    def __missing__(self, column):
+        values = pd.to_numeric(self.df[column], errors="coerce")
+        values = values.to_numpy(dtype="float64", na_value=np.nan)
+        self[column] = values
+        return values
+
+
+def row_check(name: str, columns: list, predicate, message: str, limit: int = 0, sample_column: str = None):
+    """
+    Build a vectorized row check.
+    predicate(cols, ref) returns a boolean array, True for failing rows; cols[c] is column c
+    as float64 (NaN for nulls) and cols.df the original frame for non-numeric predicates.
+    The check fails when more than `limit` rows fail. The sample quotes sample_column
+    (default: the row index).
+    """
+    def check(df, ref=None):
+        return [str(f) for f in _evaluate(check, Columns(df), ref)]
+
+    check.__name__ = name
+    check.columns = list(columns)
+    check.predicate = predicate
+    check.message = message
+    check.limit = limit
+    check.sample_column = sample_column
+    return check
+
+
+def non_negative(column: str, limit: int = 0, name: str = None):
+    """Row check: `column` is never negative (NaN counts as passing)."""
+    return row_check(name or f"{column}_non_negative", [column],
+                     lambda cols, ref: cols[column] < 0,
+                     f"have negative {column}", limit)
+
+
+def between(column: str, low: float, high: float, limit: int = 0, name: str = None):
+    """Row check: low <= column <= high (NaN counts as passing)."""
+    return row_check(name or f"{column}_between", [column],
+                     lambda cols, ref: (cols[column] < low) | (cols[column] > high),
+                     f"have {column} outside [{low},{high}]", limit)
+
+
+def _sample(cols: Columns, mask: np.ndarray, sample_column: str, size: int) -> list:
+    positions = np.flatnonzero(mask)[:size]
+    if sample_column and sample_column in cols.df.columns:
+        return cols.df[sample_column].iloc[positions].tolist()
+    return cols.df.index[positions].tolist()
+
+
+def _evaluate(check, cols: Columns, ref, sample_size: int = SAMPLE_SIZE) -> list:
+    """Failures (as strings) of one row check."""
+    missing = [c for c in check.columns if c not in cols.df.columns]
+    if missing:
+        return [f"{check.__name__}: missing columns {missing}"]
+    mask = np.asarray(check.predicate(cols, ref), dtype=bool)
+    count = int(mask.sum())
+    if count <= check.limit:
+        return []
+    sample = _sample(cols, mask, check.sample_column, sample_size)
+    return [f"{count} rows {check.message} (e.g. {sample})"]
+
+
+def run_expectations(df: pd.DataFrame, checks: list, ref=None, fail_fast: bool = None,
+                     sample_size: int = SAMPLE_SIZE) -> list:
+    """
+    Run every check over df and return all error strings.
+    Row checks share one Columns cache; aggregate checks are called as check(df, ref).
+    fail_fast=True returns as soon as one check has failed.
+    """
+    fail_fast = FAIL_FAST if fail_fast is None else fail_fast
+    cols = Columns(df)
+    errors = []
+    for check in checks:
+        start = time.perf_counter()
+        if hasattr(check, "predicate"):
+            found = _evaluate(check, cols, ref, sample_size)
+        else:
+            found = check(df, ref) or []
+        logger.info("%s: %d errors in %.3fs", check.__name__, len(found), time.perf_counter() - start)
+        errors.extend(found)
+        if found and fail_fast:
+            logger.info("Stopping after %s (fail_fast)", check.__name__)
+            break
+    return errors
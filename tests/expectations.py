@@ -1,59 +1,10 @@
 import logging
 logger = logging.getLogger(__name__)
-def compute_reference_values(engine):
-    from sqlalchemy import text
-    REFERENCE_VALUES = {}
-    with engine.connect() as conn:
-        REFERENCE_VALUES["total_revenue"] = float(conn.execute(
-            text("SELECT SUM(price) FROM order_items")
-        ).scalar())
-
-
-        REFERENCE_VALUES["total_customers"] = float(conn.execute(
-            text("SELECT COUNT(DISTINCT customer_id) FROM customers")
-        ).scalar())         
-
-        REFERENCE_VALUES["total_orders"] = float(conn.execute(
-            text("SELECT COUNT(*) FROM orders")
-        ).scalar()) 
-
-        REFERENCE_VALUES["total_products"] = float(conn.execute(
-            text("SELECT COUNT(*) FROM products")
-        ).scalar())
-
-        REFERENCE_VALUES["total_active_customers"] = float(conn.execute(
-            text("""
-                SELECT COUNT(DISTINCT o.customer_id) AS total_customers
-                FROM orders o
-                JOIN order_items oi ON o.order_id = oi.order_id
-            """)
-        ).scalar())
-
-        REFERENCE_VALUES["total_payments"] = float(conn.execute(
-            text("""
-                SELECT COUNT(*) FROM order_payments
-            """)
-        ).scalar())
-
-        REFERENCE_VALUES["total_inactive_customers"] = float(conn.execute(
-            text("""
-                SELECT COUNT(DISTINCT c.customer_id) AS total_customers
-                FROM customers c
-                LEFT JOIN orders o ON c.customer_id = o.customer_id
-                LEFT JOIN order_items oi ON o.order_id = oi.order_id
-                WHERE o.order_id IS NULL OR oi.order_item_id IS NULL
-            """)
-        ).scalar())
-
-        REFERENCE_VALUES["total_states"] = float(conn.execute(
-            text("SELECT COUNT(DISTINCT customer_state) FROM customers")
-        ).scalar())
-
-        REFERENCE_VALUES["total_categories"] = float(conn.execute(
-            text("SELECT COUNT(DISTINCT product_category_name) FROM products")
-        ).scalar())
-
-    return REFERENCE_VALUES
+def compute_reference_values(engine, snapshot=None):
+    """Reference totals for the query checks; one round trip via reference_metrics."""
+    from reference_metrics import QUERY_REFERENCE, reference_values
+    REFERENCE_VALUES = reference_values(engine, QUERY_REFERENCE, snapshot)
+    return {key: float(value) for key, value in REFERENCE_VALUES.items()}
 
 
 def not_empty(df):
@@ -3,13 +3,14 @@
 # --------------------
 import logging
 
+import numpy as np
+
+from expectation_engine import non_negative, row_check, run_expectations
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def orders_non_negative(df, ref=None):
-    """Check total_orders is never negative."""
-    negatives = df[df["total_orders"] < 0]
-    return [] if negatives.empty else [f"{len(negatives)} rows have negative total_orders"]
+orders_non_negative = non_negative("total_orders", name="orders_non_negative")
 
 def orders_le_reference(df, ref):
     """Check total_orders sum <= reference total_orders."""
@@ -23,10 +24,7 @@ def orders_le_reference(df, ref):
 # Revenue / Spend
 # --------------------
 
-def total_spent_non_negative(df, ref=None):
-    """Ensure total_spent is never negative."""
-    negatives = df[df["total_spent"] < 0]
-    return [] if negatives.empty else [f"{len(negatives)} rows have negative total_spent"]
+total_spent_non_negative = non_negative("total_spent")
 
 def total_spent_consistent(df, ref):
     """Check total_spent sum <= reference revenue."""
@@ -37,65 +35,45 @@ def total_spent_consistent(df, ref):
     return []
 
 
-def avg_order_value_valid(df, ref=None):
-    """Check avg_order_value is consistent with total_spent / total_orders."""
-    errors = []
-    for idx, row in df.iterrows():
-        if row["total_orders"] > 0:
-            expected = row["total_spent"] / row["total_orders"]
-            if abs(row["avg_order_value"] - expected) > 1e-6:
-                errors.append(
-                    f"Row {idx}: AOV mismatch, got {row['avg_order_value']}, expected {expected}"
-                )
-    return errors
+def aov_mismatch(cols, ref=None):
+    """Rows with orders whose avg_order_value is not total_spent / total_orders."""
+    orders = cols["total_orders"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        expected = cols["total_spent"] / orders
+    return (orders > 0) & (np.abs(cols["avg_order_value"] - expected) > 1e-6)
+
+
+avg_order_value_valid = row_check(
+    "avg_order_value_valid", ["total_orders", "total_spent", "avg_order_value"],
+    aov_mismatch, "have avg_order_value != total_spent / total_orders", sample_column="customer_id",
+)
 
 
 # --------------------
 # Recency & Frequency
 # --------------------
 
-def recency_non_negative(df, ref=None):
-    logger.info("Checking recency non-negativity...")
-    """Ensure recency (days since last order) is never negative."""
-    negatives = df[df["recency"] < 0]
-    return [] if negatives.empty else [f"{len(negatives)} rows have negative recency"]
-
-def frequency_non_negative(df, ref=None):
-    logger.info("Checking frequency non-negativity...")
-    """Ensure frequency (orders/month) is never negative."""
-    negatives = df[df["frequency"] < 0]
-    return [] if negatives.empty else [f"{len(negatives)} rows have negative frequency"]
+recency_non_negative = non_negative("recency")       # days since last order
+frequency_non_negative = non_negative("frequency")   # orders per month
 
 
 # --------------------
 # Product Diversity
 # --------------------
 
-def distinct_products_non_negative(df, ref=None):
-    logger.info("Checking distinct_products non-negativity...")
-    """Ensure distinct_products is never negative."""
-    negatives = df[df["distinct_products"] < 0]
-    return [] if negatives.empty else [f"{len(negatives)} rows have negative distinct_products"]
+distinct_products_non_negative = non_negative("distinct_products")
 
 
 # --------------------
 # State Features (one-hot)
 # --------------------
 
-def state_dummies_valid(df, ref=None):
-    logger.info("Checking state dummy validity...")
-    errors = []
-    """
-   Make sure state column is not null and 2 letter state codes.
-   """
-    if "customer_state" not in df.columns:
-        errors.append("Missing 'customer_state' column")
-    else:
-        invalid_states = df[~df["customer_state"].str.match(r"^[A-Z]{2}$")]
-        if not invalid_states.empty:
-            errors.append(f"Invalid state codes found: {invalid_states['customer_state'].unique()}")
-
-    return errors
+# Make sure state column is not null and 2 letter state codes.
+state_dummies_valid = row_check(
+    "state_dummies_valid", ["customer_state"],
+    lambda cols, ref: ~cols.df["customer_state"].astype("string").str.fullmatch(r"[A-Z]{2}").fillna(False).to_numpy(bool),
+    "have an invalid customer_state", sample_column="customer_state",
+)
 
 
 # --------------------
@@ -141,13 +119,11 @@ def state_dummies_valid(df, ref=None):
 #         return [f"Global top-5 spend {df_total} > total revenue {ref_total}"]
 #     return []
 
-def churned_binary_valid(df, ref=None):
-    logger.info("Checking churned binary validity...")
-    """Check churned column is binary 0/1."""
-    if "churned" not in df.columns:
-        return ["Missing 'churned' column"]
-    invalid = df[~df["churned"].isin([0, 1])]
-    return [] if invalid.empty else [f"'churned' has {len(invalid)} invalid values outside [0,1]"]
+churned_binary_valid = row_check(
+    "churned_binary_valid", ["churned"],
+    lambda cols, ref: ~np.isin(cols["churned"], [0, 1]),
+    "have churned outside [0,1]", sample_column="churned",
+)
 
 def churned_consistent(df, ref=None):
     logger.info("Checking churned consistency...")
@@ -159,28 +135,22 @@ def churned_consistent(df, ref=None):
     #check to see if there are any 0s and 1s in churned column
     if df["churned"].nunique() < 2:
         return ["'churned' column does not have both 0 and 1 values"]
-    
+    return []
+
     # churned_count = df["churned"].sum()
     # expected_churned = ref["total_customers"] - ref["active_customers"]
     # if churned_count != expected_churned:
     #     return [f"Churned count {churned_count} inconsistent with expected {expected_churned}"]
 
-def run_all_expectations(df, expectations, ref):
+def run_all_expectations(df, expectations, ref, fail_fast=None):
     logger.info("Running all expectations...")
-    errors = []
-    for expect in expectations:
-        errors.extend(expect(df, ref))
-    return errors
+    return run_expectations(df, expectations, ref, fail_fast)
 
 
 def check_non_null(df, ref=None):
     logger.info("Checking for null values...")
-    errors = []
-    for column in df.columns:
-        null_count = df[column].isnull().sum()
-        if null_count > 0:
-            errors.append(f"Column {column} has {null_count} null values.")
-    return errors
+    null_counts = df.isna().sum()
+    return [f"Column {column} has {count} null values." for column, count in null_counts[null_counts > 0].items()]
 
 def check_churn_distribution(df, ref=None):
    logger = logging.getLogger(__name__)
@@ -192,4 +162,16 @@ def check_churn_distribution(df, ref=None):
        errors.append("Churned class 0 is missing.")
    if churn_counts.get(1, 0) == 0:
        errors.append("Churned class 1 is missing.")
-   return errors
\ No newline at end of file
+   return errors
+
+
+CHURN_FEATURE_CHECKS = [
+    total_spent_non_negative, total_spent_consistent, avg_order_value_valid,
+    recency_non_negative, frequency_non_negative, distinct_products_non_negative,
+    state_dummies_valid, churned_binary_valid, churned_consistent, check_non_null,
+]
+
+
+def run_churn_expectations(df, ref, fail_fast=None):
+    """Every ML_churn_features check in one pass over df."""
+    return run_expectations(df, CHURN_FEATURE_CHECKS, ref, fail_fast)
@@ -1,5 +1,8 @@
 import logging, numpy as np
 import pandas as pd
+
+from expectation_engine import between, non_negative, run_expectations
+
 logger = logging.getLogger(__name__)
 
 def columns_exist(df, ref):
@@ -24,29 +27,20 @@ def order_items_value_sum(df, ref):
         return [f"Items value sum {actual} far from revenue {expected}"]
     return []
 
-def freight_ratio_bounds(df, ref=None):
-    outliers = df[(df["freight_ratio"] < 0) | (df["freight_ratio"] > 2)]
-    print(df["freight_ratio"].describe())
-    if len(outliers) > 500:
-        return [f"freight_ratio has {len(outliers)} outliers"]
-    return []
+freight_ratio_bounds = between("freight_ratio", 0, 2, limit=500, name="freight_ratio_bounds")
+
+# a handful of orders have carrier/approval timestamps out of order in the source data
+TIMING_CHECKS = [
+    non_negative(c, limit=1500)
+    for c in ["hours_to_approval","days_to_carrier","days_carrier_to_customer"]
+]
 
 def timing_non_negative(df, ref=None):
-    cols = ["hours_to_approval","days_to_carrier","days_carrier_to_customer"]
-    errs=[]
-    for c in cols:
-        neg = df[df[c] < 0]
-        if len(neg) > 1500:
-            errs.append(f"{c} has {len(neg)} negative values")
-    return errs
-
-def run_all_expectations(df, ref):
+    return run_expectations(df, TIMING_CHECKS, ref, fail_fast=False)
+
+def run_all_expectations(df, ref, fail_fast=None):
     checks = [
         columns_exist, order_count_matches, order_items_value_sum,
-        freight_ratio_bounds, timing_non_negative
+        freight_ratio_bounds, *TIMING_CHECKS
     ]
-    errs=[]
-    for c in checks:
-        logger.info("Running %s", c.__name__)
-        errs.extend(c(df, ref))
-    return errs
+    return run_expectations(df, checks, ref, fail_fast)
@@ -1,4 +1,7 @@
 import logging, numpy as np
+
+from expectation_engine import between, non_negative, row_check, run_expectations
+
 logger = logging.getLogger(__name__)
 
 # --------------------
@@ -12,34 +15,34 @@ def product_columns_exist(df, ref):
 # --------------------
 # Basic Sanity Checks
 # --------------------
+# Ensure key numeric fields are not negative.
+NON_NEGATIVE_CHECKS = [
+    non_negative(col, limit=1000)
+    for col in ["avg_price","avg_freight","orders_per_product",
+                "avg_review_score","orders_fulfilled","avg_ship_days"]
+]
+
 def product_non_negative(df, ref=None):
     """Ensure key numeric fields are not negative."""
-    errors = []
-    for col in ["avg_price","avg_freight","orders_per_product",
-                "avg_review_score","orders_fulfilled","avg_ship_days"]:
-        negatives = df[df[col] < 0]
-        if len(negatives) > 1000:
-            errors.append(f"{col} has {len(negatives)} negative values")
-    return errors
+    return run_expectations(df, NON_NEGATIVE_CHECKS, ref, fail_fast=False)
 
-def product_avg_review_bounds(df, ref=None):
-    """Check review scores are within 1–5."""
-    out = df[(df["avg_review_score"] < 1) | (df["avg_review_score"] > 5)]
-    return [] if out.empty else [f"{len(out)} avg_review_score outside [1,5]"]
+# Check review scores are within 1–5.
+product_avg_review_bounds = between("avg_review_score", 1, 5, name="product_avg_review_bounds")
 
-def product_ship_days_reasonable(df, ref=None):
-    """Check avg_ship_days is within a practical window (0–60 days)."""
-    out = df[(df["avg_ship_days"] < 0) | (df["avg_ship_days"] > 60)]
-    return [] if len(out) < 1000 else [f"{len(out)} avg_ship_days outside [0,60]"]
+# Check avg_ship_days is within a practical window (0–60 days).
+product_ship_days_reasonable = between("avg_ship_days", 0, 60, limit=999, name="product_ship_days_reasonable")
 
-def product_price_freight_ratio(df, ref=None):
-    """
-    Check that avg_freight is not wildly larger than avg_price.
-    We allow freight to be up to twice the price as a sanity bound.
-    """
-    out = df[(df["avg_price"] > 0) &
-             (df["avg_freight"] / df["avg_price"] > 2)]
-    return [] if len(out) < 1000 else [f"{len(out)} products with freight/price ratio > 2"]
+def _freight_over_twice_price(cols, ref=None):
+    price = cols["avg_price"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (price > 0) & (cols["avg_freight"] / price > 2)
+
+# Check that avg_freight is not wildly larger than avg_price.
+# We allow freight to be up to twice the price as a sanity bound.
+product_price_freight_ratio = row_check(
+    "product_price_freight_ratio", ["avg_price", "avg_freight"],
+    _freight_over_twice_price, "with freight/price ratio > 2", limit=999, sample_column="product_id",
+)
 
 # --------------------
 # Reference Consistency
@@ -59,16 +62,12 @@ def product_order_totals(df, ref):
 # --------------------
 # Runner
 # --------------------
-def run_all_expectations(df, ref):
+def run_all_expectations(df, ref, fail_fast=None):
     checks = [
         product_columns_exist,
-        product_non_negative,
+        *NON_NEGATIVE_CHECKS,
         product_avg_review_bounds,
         product_ship_days_reasonable,
         product_price_freight_ratio,
     ]
-    errors = []
-    for c in checks:
-        logger.info("Running %s", c.__name__)
-        errors.extend(c(df, ref))
-    return errors
+    return run_expectations(df, checks, ref, fail_fast)
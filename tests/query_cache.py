@@ -0,0 +1,143 @@
+# ============================================================
+# Query-result cache for the test suite
+# ============================================================
+# Each query (and each reference-value computation) runs at most once per database
+# snapshot. Results are pickled under CACHE_DIR/<snapshot>/<name>-<sql hash>.pkl, where
+# the snapshot id hashes manifest.table_versions(), so any load that touches a table
+# starts a fresh cache. A per-entry file lock (where the platform has one) makes pytest-xdist
+# workers wait for the one worker computing an entry instead of running the same query in parallel, and
+# entries are written to a temp file and renamed so a reader never sees half a pickle.
+import copy
+import inspect
+import json
+import logging
+import os
+import pickle
+import shutil
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "results"))
+import manifest as mf
+
+# Cross-process locking: flock on POSIX, msvcrt byte locks on Windows. With neither,
+# the cache still works, xdist workers may just compute the same entry in parallel.
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+logger = logging.getLogger(__name__)
+
+# --- Config ---
+CACHE_DIR = Path(os.environ.get("QUERY_CACHE_DIR", Path(__file__).resolve().parent / ".query_cache"))
+ENABLED = os.environ.get("QUERY_CACHE", "1") != "0"   # QUERY_CACHE=0 always hits the database
+
+_MEMORY = {}   # entries already loaded by this process
+
+
+def snapshot_id(engine) -> str:
+    """Hash of every known table's version, or None when the versions cannot be read."""
+    versions = mf.table_versions(engine, sorted(mf.KNOWN_TABLES))
+    if not any(versions.values()):
+        logger.warning("No table versions available; query results will not be cached")
+        return None
+    return mf.sha256_text(json.dumps(versions, sort_keys=True))[:16]
+
+
+def source_hash(obj) -> str:
+    """Short hash of a function's or module's source, so edits invalidate its cached results."""
+    return mf.sha256_text(inspect.getsource(obj))[:16]
+
+
+def query_key(name: str, sql: str) -> str:
+    return f"{name}-{mf.sha256_text(sql)[:16]}"
+
+
+@contextmanager
+def _locked(path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + ".lock"), "w") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            while True:
+                try:
+                    msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:   # LK_LOCK gives up after ~10s; a slow query can hold it longer
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _load(path: Path):
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except Exception as e:   # truncated by a crash, or written by another pandas version
+        logger.warning("Ignoring unreadable cache entry %s: %s", path, e)
+        return None
+
+
+def _save(path: Path, value):
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def cached(key: str, snapshot: str, compute, cache_dir: Path = None):
+    """
+    compute() once per (key, snapshot) across the session and every xdist worker.
+    Each call returns a copy, so a check that edits its frame cannot leak into the next test.
+    snapshot=None (or QUERY_CACHE=0) skips the cache.
+    """
+    if snapshot is None or not ENABLED:
+        return compute()
+    path = Path(cache_dir or CACHE_DIR) / snapshot / f"{key}.pkl"
+    if path in _MEMORY:
+        return copy.deepcopy(_MEMORY[path])
+
+    value = _load(path) if path.exists() else None
+    if value is None:
+        with _locked(path):
+            value = _load(path) if path.exists() else None   # another worker may have finished it
+            if value is None:
+                start = time.perf_counter()
+                value = compute()
+                _save(path, value)
+                logger.info("Cached %s in %.2fs", key, time.perf_counter() - start)
+    _MEMORY[path] = value
+    return copy.deepcopy(value)
+
+
+def run_query(name: str, path, engine, snapshot: str, cache_dir: Path = None) -> pd.DataFrame:
+    """Result of one .sql file, from the cache when this snapshot already ran it."""
+    sql = Path(path).read_text()
+    return cached(query_key(name, sql), snapshot, lambda: pd.read_sql_query(sql, engine), cache_dir)
+
+
+def prune(keep: str = None, cache_dir: Path = None) -> list:
+    """Delete every snapshot directory except `keep`. Returns the removed snapshot ids."""
+    cache_dir = Path(cache_dir or CACHE_DIR)
+    if not cache_dir.exists():
+        return []
+    removed = [p.name for p in cache_dir.iterdir() if p.is_dir() and p.name != keep]
+    for snapshot in removed:
+        shutil.rmtree(cache_dir / snapshot, ignore_errors=True)
+    return removed
@@ -40,10 +40,7 @@ QUERY_TESTS = {
     "payments_distribution": [EX.payments_distribution],
 
     # --- Features ---
-    "ML_churn_features": [
-        FE.total_spent_non_negative, FE.total_spent_consistent,
-        FE.avg_order_value_valid, FE.recency_non_negative, FE.frequency_non_negative, FE.distinct_products_non_negative, FE.state_dummies_valid, FE.churned_binary_valid, FE.churned_consistent, FE.check_non_null
-    ],
+    "ML_churn_features": [FE.run_churn_expectations],   # FE.CHURN_FEATURE_CHECKS in one pass
 }
 
 
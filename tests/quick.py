@@ -1,27 +1,16 @@
+# The engine provider lives in the repo-root quick.py. This file shadows it for code run
+# from tests/, so it loads that module and re-exports it: tests, extraction and loading
+# all share the same engines and pools.
+import importlib.util
+import sys
+from pathlib import Path
 
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR))   # duckdb_backend, for PIPELINE_BACKEND=duckdb
 
-def generate_engine():
-    print("Generating DB engine...")
-    import os
-    from sqlalchemy import create_engine
-    import json
-
-    config_txt = os.path.join(os.path.dirname(__file__), "..", "creds", "db_config.json")
-    print(f"Loading DB config from {config_txt}")
-    with open(config_txt) as f:
-        config = json.load(f)
-
-    DB_HOST = config["DB_HOST"]
-    DB_PORT = config["DB_PORT"]
-    DB_NAME = config["DB_NAME"]
-    DB_USER = config["DB_USER"]
-    DB_PASS = config["DB_PASS"]
-
-    print(f"Connecting to DB {DB_NAME} at {DB_HOST}:{DB_PORT} as user {DB_USER}")
-    engine = create_engine(
-        f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-    )
-    print("Connection Sucessful")
-    return engine
-
+if "pipeline_quick" not in sys.modules:
+    _spec = importlib.util.spec_from_file_location("pipeline_quick", ROOT_DIR / "quick.py")
+    sys.modules["pipeline_quick"] = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(sys.modules["pipeline_quick"])
 
+globals().update({k: v for k, v in vars(sys.modules["pipeline_quick"]).items() if not k.startswith("__")})
@@ -0,0 +1,116 @@
+# ============================================================
+# Reference metrics in one round trip
+# ============================================================
+# Every reference aggregate the expectations compare against is declared in METRICS
+# as (source, SQL aggregate). build_query() groups the metrics by source into one-row
+# CTEs and cross joins them, so the whole set is a single SELECT with one scan per
+# source. To add a reference value, add a METRICS entry (and a SOURCES entry if it needs
+# a new join); the alias maps below then expose it under the name a check expects.
+import logging
+from decimal import Decimal
+
+from sqlalchemy import text
+
+import query_cache as qc
+
+logger = logging.getLogger(__name__)
+
+# source -> FROM clause (a base table or a derived table)
+SOURCES = {
+    "customers": "customers",
+    "orders": "orders",
+    "order_items": "order_items",
+    "order_payments": "order_payments",
+    "products": "products",
+    "sellers": "sellers",
+    # one pass over customers ⟕ orders ⟕ order_items, one row per customer
+    "customer_activity": """(
+        SELECT c.customer_id,
+               BOOL_OR(oi.order_item_id IS NOT NULL) AS has_items,
+               BOOL_OR(o.order_id IS NULL OR oi.order_item_id IS NULL) AS has_gap
+        FROM customers c
+        LEFT JOIN orders o ON c.customer_id = o.customer_id
+        LEFT JOIN order_items oi ON o.order_id = oi.order_id
+        GROUP BY c.customer_id
+    ) a""",
+}
+
+# metric -> (source, aggregate over that source)
+METRICS = {
+    "customer_ids": ("customers", "COUNT(DISTINCT customer_id)"),
+    "unique_customers": ("customers", "COUNT(DISTINCT customer_unique_id)"),
+    "customer_states": ("customers", "COUNT(DISTINCT customer_state)"),
+    "orders": ("orders", "COUNT(*)"),
+    "dataset_span_days": ("orders", "EXTRACT(EPOCH FROM (MAX(order_purchase_timestamp) - MIN(order_purchase_timestamp)))/86400"),
+    "order_items": ("order_items", "COUNT(*)"),
+    "item_revenue": ("order_items", "SUM(price)"),
+    "payments": ("order_payments", "COUNT(*)"),
+    "payment_revenue": ("order_payments", "SUM(payment_value)"),
+    "products": ("products", "COUNT(*)"),
+    "distinct_products": ("products", "COUNT(DISTINCT product_id)"),
+    "categories": ("products", "COUNT(DISTINCT product_category_name)"),
+    "sellers": ("sellers", "COUNT(DISTINCT seller_id)"),
+    "active_customers": ("customer_activity", "COUNT(*) FILTER (WHERE has_items)"),
+    "inactive_customers": ("customer_activity", "COUNT(*) FILTER (WHERE has_gap)"),
+}
+
+# reference-dict key -> metric, for expectations.compute_reference_values
+QUERY_REFERENCE = {
+    "total_revenue": "item_revenue",
+    "total_customers": "customer_ids",
+    "total_orders": "orders",
+    "total_products": "products",
+    "total_active_customers": "active_customers",
+    "total_payments": "payments",
+    "total_inactive_customers": "inactive_customers",
+    "total_states": "customer_states",
+    "total_categories": "categories",
+}
+
+# reference-dict key -> metric, for curated_ref.compute_reference_values
+CURATED_REFERENCE = {
+    "total_customers": "unique_customers",
+    "total_gross_revenue": "item_revenue",
+    "total_orders": "orders",
+    "total_revenue": "payment_revenue",
+    "total_products": "distinct_products",
+    "total_sellers": "sellers",
+    "total_order_items": "order_items",
+    "dataset_span_days": "dataset_span_days",
+}
+
+
+def build_query(metrics: dict = None) -> str:
+    """One SELECT returning a single row with a column per metric."""
+    metrics = metrics or METRICS
+    by_source = {}
+    for name, (source, expression) in metrics.items():
+        by_source.setdefault(source, []).append(f"{expression} AS {name}")
+    ctes = [
+        f"m_{source} AS (\n    SELECT {', '.join(columns)}\n    FROM {SOURCES[source]}\n)"
+        for source, columns in by_source.items()
+    ]
+    return "WITH " + ",\n".join(ctes) + "\nSELECT *\nFROM " + " CROSS JOIN ".join(f"m_{s}" for s in by_source)
+
+
+def _number(value):
+    # NUMERIC sums and EXTRACT come back as Decimal
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def compute_metrics(engine, snapshot: str = None) -> dict:
+    """{metric: value} for every METRICS entry, cached per database snapshot when one is given."""
+    sql = build_query()
+
+    def run():
+        with engine.connect() as conn:
+            row = conn.execute(text(sql)).mappings().one()
+        return {name: _number(value) for name, value in row.items()}
+
+    return qc.cached(qc.query_key("reference_metrics", sql), snapshot, run)
+
+
+def reference_values(engine, aliases: dict, snapshot: str = None) -> dict:
+    """{key: metric value} for an alias map such as QUERY_REFERENCE."""
+    metrics = compute_metrics(engine, snapshot)
+    return {key: metrics[metric] for key, metric in aliases.items()}
@@ -0,0 +1,108 @@
+import sys
+from pathlib import Path
+
+import joblib
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "results" / "ML" / "churn_prediction" / "v1"))
+import batch_score
+
+
+def _features(n):
+    return pd.DataFrame({
+        "customer_id": [f"c{i}" for i in range(n)],
+        "total_orders": [1 + i % 3 for i in range(n)],
+        "total_spent": [float(i % 50) for i in range(n)],
+        "customer_state": ["SP"] * n,
+        "churned": [i % 2 for i in range(n)],
+    })
+
+
+def _pipeline():
+    train = _features(200)
+    return Pipeline([
+        ("preprocessor", ColumnTransformer([("num", StandardScaler(), ["total_orders", "total_spent"])])),
+        ("classifier", LogisticRegression()),
+    ]).fit(train.drop(columns=["customer_id", "churned"]), train["churned"])
+
+
+class _Engine:
+    """Records the statements batch_score runs outside COPY."""
+
+    def __init__(self):
+        self.statements = []
+
+    def begin(self):
+        engine = self
+
+        class _Conn:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def exec_driver_sql(self, sql):
+                engine.statements.append(sql)
+
+        return _Conn()
+
+
+def test_batch_score_streams_chunks(tmp_path):
+    pipeline = _pipeline()
+    model_dir = tmp_path / "models"
+    model_dir.mkdir()
+    joblib.dump(pipeline, model_dir / "logistic_regression_20240101_000000.joblib")
+    joblib.dump(pipeline, model_dir / "logistic_regression_20240301_000000.joblib")
+    source = tmp_path / "ML_churn_features.csv"
+    _features(1_003).to_csv(source, index=False)
+
+    model = batch_score.latest_model(model_dir=model_dir)
+    assert model.name == "logistic_regression_20240301_000000.joblib"
+
+    stats = batch_score.batch_score(model, source, tmp_path / "scores.parquet", chunk_size=100)
+    assert stats["rows"] == 1_003
+    assert stats["rows_per_sec"] > 0
+    scores = pd.read_parquet(tmp_path / "scores.parquet")
+    assert list(scores["customer_id"][:3]) == ["c0", "c1", "c2"]
+    assert scores["churn_probability"].between(0, 1).all()
+    assert not (tmp_path / "scores.parquet.part").exists()
+
+
+@pytest.mark.parametrize("fail_after", [None, 3])
+def test_table_is_swapped_in_only_after_a_full_run(tmp_path, monkeypatch, fail_after):
+    import load_data
+
+    model = tmp_path / "logistic_regression_20240101_000000.joblib"
+    joblib.dump(_pipeline(), model)
+    source = tmp_path / "ML_churn_features.csv"
+    _features(1_003).to_csv(source, index=False)
+    copied = []
+
+    def fake_copy(table_name, chunks, engine):
+        for i, chunk in enumerate(chunks):
+            if i == fail_after:
+                raise RuntimeError("connection lost")
+            copied.append((table_name, len(chunk)))
+
+    monkeypatch.setattr(load_data, "copy_frames_to_table", fake_copy)
+    engine = _Engine()
+    run = lambda: batch_score.batch_score(model, source, tmp_path / "scores.parquet", chunk_size=100,
+                                          table="churn_scores", engine=engine)
+
+    if fail_after is None:
+        assert run()["rows"] == 1_003
+        assert sum(n for _, n in copied) == 1_003
+        assert {t for t, _ in copied} == {"churn_scores_staging"}
+        assert engine.statements[-2:] == ['DROP TABLE IF EXISTS "churn_scores"',
+                                          'ALTER TABLE "churn_scores_staging" RENAME TO "churn_scores"']
+    else:
+        with pytest.raises(RuntimeError):
+            run()
+        assert engine.statements == ['DROP TABLE IF EXISTS "churn_scores_staging"']   # no swap
+        assert not (tmp_path / "scores.parquet").exists()
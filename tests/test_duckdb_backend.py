@@ -0,0 +1,120 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import duckdb_backend as DB
+
+
+def test_translate_postgres_constructs():
+    sql = """
+        SELECT MODE() WITHIN GROUP (ORDER BY p.payment_type) AS primary_payment_type,
+               EXTRACT(EPOCH FROM (o.a - o.b))/3600 AS hours,
+               DATE_PART('day', anchor.anchor_ts - a.last_order_date) AS recency,
+               DATE_PART('month', anchor.anchor_ts - a.first_order_date) AS customer_age
+        FROM t
+    """
+    out = DB.translate_sql(sql)
+
+    assert "MODE(p.payment_type) AS primary_payment_type" in out
+    assert "EPOCH((o.a - o.b))/3600" in out
+    assert "pg_date_part_day( anchor.anchor_ts - a.last_order_date)" in out
+    assert "DATE_PART('month'" in out
+    assert DB.translate_sql("ANALYZE customer_order_agg") == "SELECT 1"
+
+
+def test_ddl_drops_foreign_keys_and_widens_float():
+    ddl = DB.table_ddl()
+
+    assert set(DB.DATA_FILES) <= set(ddl)
+    assert "REFERENCES" not in ddl["orders"]
+    assert "PRIMARY KEY (order_id, order_item_id)" in ddl["order_items"]
+    assert "geolocation_lat DOUBLE" in ddl["geolocation"]
+
+
+def _write_csvs(data_dir):
+    files = {
+        "customers": "customer_id,customer_unique_id,customer_zip_code_prefix,customer_city,customer_state\n"
+                     "c1,u1,1001,sao paulo,SP\nc2,u2,2002,rio,RJ\n",
+        "sellers": "seller_id,seller_zip_code_prefix,seller_city,seller_state\ns1,1001,sao paulo,SP\n",
+        "orders": "order_id,customer_id,order_status,order_purchase_timestamp,order_approved_at,"
+                  "order_delivered_carrier_date,order_delivered_customer_date,order_estimated_delivery_date\n"
+                  "o1,c1,delivered,2018-01-01 10:00:00,2018-01-01 16:00:00,2018-01-03 10:00:00,"
+                  "2018-01-08 10:00:00,2018-01-10 00:00:00\n"
+                  "o2,c2,delivered,2018-03-01 10:00:00,,,,2018-03-20 00:00:00\n",
+        "order_items": "order_id,order_item_id,product_id,seller_id,shipping_limit_date,price,freight_value\n"
+                       "o1,1,p1,s1,2018-01-02 00:00:00,10.50,2.00\no2,1,p1,s1,2018-03-02 00:00:00,4.50,1.00\n",
+        "products": "product_id,product_category_name,product_name_length,product_description_length,"
+                    "product_photos_qty,product_weight_g,product_length_cm,product_height_cm,product_width_cm\n"
+                    "p1,toys,10,100,1,500,10,10,10\n",
+        "geolocation": "geolocation_zip_code_prefix,geolocation_lat,geolocation_lng,geolocation_city,geolocation_state\n"
+                       "1001,-23.5,-46.6,sao paulo,SP\n1001,-23.5,-46.6,sao paulo,SP\n1001,-23.7,-46.8,sao paulo,SP\n"
+                       "9999,-1.0,-1.0,x,AM\n",
+        "order_payments": "order_id,payment_sequential,payment_type,payment_installments,payment_value\n"
+                          "o1,1,credit_card,2,12.50\no2,1,boleto,1,5.50\n",
+        "order_reviews": "review_id,order_id,review_score,review_comment_title,review_comment_message,"
+                         "review_creation_date,review_answer_timestamp\n"
+                         "r1,o1,5,,,2018-01-09 00:00:00,2018-01-10 00:00:00\n"
+                         "r1,o2,1,,,2018-03-21 00:00:00,2018-03-22 00:00:00\n",
+        "product_category_name_translation": "product_category_name,product_category_name_english\ntoys,toys\n",
+    }
+    for table, body in files.items():
+        (data_dir / f"{DB.DATA_FILES[table]}.csv").write_text(body)
+
+
+def test_load_and_run_queries_offline(tmp_path):
+    _write_csvs(tmp_path)
+    engine = DB.generate_engine(tmp_path / "olist.duckdb", load=False)
+    DB.load_csvs(engine, data_dir=tmp_path)
+
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT COUNT(*) FROM order_reviews").scalar() == 1
+        assert conn.exec_driver_sql("SELECT COUNT(*) FROM geolocation_filtered").scalar() == 2
+        assert conn.exec_driver_sql("SELECT n_points FROM zip_centroids").scalar() == 2
+
+    queries = DB.ROOT_DIR / "queries"
+    orders = pd.read_sql_query((queries / "orders" / "curated.sql").read_text(), engine).set_index("order_id")
+    assert orders.loc["o1", "hours_to_approval"] == pytest.approx(6)
+    assert orders.loc["o1", "primary_payment_type"] == "credit_card"
+
+    churn = pd.read_sql_query((queries / "ML" / "churn_features.sql").read_text(), engine).set_index("customer_id")
+    # anchor = day of the latest order (2018-03-01 00:00); 58 days 14 hours -> day field 58, as in Postgres
+    assert churn.loc["c1", "recency"] == 58
+    assert churn.loc["c2", "recency"] == 0
+    assert churn["churned"].tolist() == [0, 0]
+    engine.dispose()
+
+
+def test_every_query_runs_offline(tmp_path):
+    _write_csvs(tmp_path)
+    engine = DB.generate_engine(tmp_path / "olist.duckdb", load=False)
+    DB.load_csvs(engine, data_dir=tmp_path)
+
+    failed = {}
+    for path in sorted((DB.ROOT_DIR / "queries").rglob("*.sql")):
+        try:
+            pd.read_sql_query(path.read_text(), engine)
+        except Exception as e:
+            failed[str(path.relative_to(DB.ROOT_DIR))] = str(e).splitlines()[0]
+    engine.dispose()
+    assert failed == {}
+
+
+def test_failed_first_load_leaves_no_database(tmp_path, monkeypatch):
+    _write_csvs(tmp_path)
+    monkeypatch.setattr(DB, "DATA_DIR", tmp_path)
+    (tmp_path / f"{DB.DATA_FILES['order_reviews']}.csv").unlink()
+    path = tmp_path / "olist.duckdb"
+
+    with pytest.raises(FileNotFoundError):
+        DB.generate_engine(path)
+    assert sorted(p.name for p in tmp_path.glob("olist.duckdb*")) == []
+
+    _write_csvs(tmp_path)   # fixed: the next open loads from scratch
+    engine = DB.generate_engine(path)
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT COUNT(*) FROM order_reviews").scalar() == 1
+    engine.dispose()
+    assert sorted(p.name for p in tmp_path.glob("olist.duckdb*")) == ["olist.duckdb"]
@@ -0,0 +1,89 @@
+import sys
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+import quick   # tests/quick.py re-exports the repo-root module
+provider = sys.modules["pipeline_quick"]
+
+
+@pytest.fixture
+def fake_postgres(monkeypatch):
+    built = []
+
+    def fake(**settings):
+        built.append(settings)
+        return create_engine("sqlite://", poolclass=provider.MeteredQueuePool,
+                             pool_size=settings["pool_size"], max_overflow=settings["max_overflow"])
+
+    monkeypatch.setattr(provider, "_postgres_engine", fake)
+    monkeypatch.setattr(provider, "_ENGINES", {})
+    return built
+
+
+def test_engines_are_shared_per_settings(fake_postgres):
+    first = quick.generate_engine(backend="postgres")
+    again = quick.generate_engine(backend="postgres")
+    sized = quick.generate_engine(backend="postgres", pool_size=8, max_overflow=0)
+
+    assert first is again
+    assert sized is not first
+    assert [s["pool_size"] for s in fake_postgres] == [provider.POOL_SIZE, 8]
+
+
+def test_pool_metrics_record_waits_and_timeouts(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}", poolclass=provider.MeteredQueuePool,
+                           pool_size=1, max_overflow=0, pool_timeout=0.2)
+    held = engine.connect()
+
+    def release():
+        time.sleep(0.1)
+        held.close()
+
+    threading.Thread(target=release).start()
+    with engine.connect() as conn:   # waits ~0.1s for the held connection
+        conn.execute(text("SELECT 1"))
+    held = engine.connect()
+    with pytest.raises(PoolTimeout):
+        engine.connect()
+    held.close()
+
+    stats = engine.pool.metrics.summary()
+    assert stats["checkouts"] == 3
+    assert stats["timeouts"] == 1
+    assert stats["waits"] == 2
+    assert stats["max_wait_seconds"] >= 0.05
+    assert stats["peak_checked_out"] == 1
+
+    engine.dispose()   # a recreated pool keeps counting into the same metrics
+    assert engine.pool.metrics.summary()["checkouts"] == 3
+
+
+def test_connection_errors_are_not_timeouts():
+    def refuse():
+        raise ConnectionRefusedError("connection refused")
+
+    engine = create_engine("sqlite://", poolclass=provider.MeteredQueuePool, creator=refuse,
+                           pool_size=1, max_overflow=0)
+    for _ in range(3):
+        with pytest.raises(Exception):
+            engine.connect()
+
+    stats = engine.pool.metrics.summary()
+    assert stats["errors"] == 3
+    assert stats["timeouts"] == 0 and stats["checkouts"] == 0
+
+
+def test_pool_metrics_name_every_engine(fake_postgres):
+    quick.generate_engine(backend="postgres")
+    quick.generate_engine(backend="postgres", pool_timeout=5)
+    quick.generate_engine(backend="postgres", statement_timeout_ms=1000)
+    quick.generate_engine(backend="postgres", echo=False)
+
+    names = list(quick.pool_metrics())
+    size = f"postgres:{provider.POOL_SIZE}+{provider.MAX_OVERFLOW}"
+    assert names == [size, f"{size} (pool_timeout=5)", f"{size} (statement_timeout_ms=1000)",
+                     f"{size} ([('echo', False)])"]
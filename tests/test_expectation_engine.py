@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+import customer_features as CF
+import expectation_engine
+import features_expectations as FE
+from expectation_engine import non_negative, row_check, run_expectations
+
+
+def churn_frame(n=100_000, bad=0):
+    orders = np.arange(n) % 5 + 1
+    spent = orders * 10.0
+    df = pd.DataFrame({
+        "customer_id": [f"c{i:06d}" for i in range(n)],
+        "customer_state": ["SP", "RJ"] * (n // 2),
+        "total_orders": pd.array(orders, dtype="Int32"),
+        "total_spent": spent,
+        "avg_order_value": spent / orders,
+        "recency": np.ones(n, dtype="float32"),
+        "frequency": np.ones(n, dtype="float32"),
+        "distinct_products": pd.array(orders, dtype="Int32"),
+        "churned": np.array([0, 1] * (n // 2), dtype="int8"),
+    })
+    df.loc[df.index < bad, "avg_order_value"] += 1.0
+    return df
+
+
+def test_aov_mismatch_is_one_error_with_count_and_capped_sample():
+    df = churn_frame(bad=1_000)
+
+    errors = FE.avg_order_value_valid(df)
+
+    assert len(errors) == 1
+    assert errors[0].startswith("1000 rows")
+    assert "c000000" in errors[0] and "c000004" in errors[0] and "c000005" not in errors[0]
+
+
+def test_aov_ignores_customers_without_orders():
+    df = churn_frame(n=4)
+    df["total_orders"] = pd.array([0, 0, None, 1], dtype="Int32")
+    df["total_spent"] = [0.0, 0.0, 0.0, 5.0]
+    df["avg_order_value"] = [0.0, 123.0, None, 5.0]
+    df["customer_unique_id"] = df["customer_id"]
+
+    assert FE.avg_order_value_valid(df) == []
+    assert CF.avg_order_value_consistency(df) == []
+
+
+def test_run_churn_expectations_passes_on_clean_frame():
+    df = churn_frame()
+    ref = {"total_revenue": float(df["total_spent"].sum())}
+    assert FE.run_churn_expectations(df, ref) == []
+
+
+def test_fail_fast_stops_at_first_failure():
+    calls = []
+
+    def aggregate(df, ref=None):
+        calls.append("aggregate")
+        return []
+
+    df = pd.DataFrame({"a": [-1.0, 2.0], "b": [-1.0, -2.0]})
+    checks = [non_negative("a"), non_negative("b"), aggregate]
+
+    assert len(run_expectations(df, checks, fail_fast=False)) == 2
+    assert calls == ["aggregate"]
+    assert len(run_expectations(df, checks, fail_fast=True)) == 1
+    assert calls == ["aggregate"]
+
+
+def test_limit_missing_columns_and_shared_conversion(monkeypatch):
+    df = pd.DataFrame({"x": ["1", "-2", "-3", None]})
+    conversions = []
+    original = expectation_engine.Columns.__missing__
+
+    def counting(self, column):
+        conversions.append(column)
+        return original(self, column)
+
+    monkeypatch.setattr(expectation_engine.Columns, "__missing__", counting)
+    checks = [
+        non_negative("x", limit=2),
+        row_check("x_small", ["x"], lambda cols, ref: cols["x"] > 0, "are positive"),
+        non_negative("missing"),
+    ]
+
+    errors = run_expectations(df, checks)
+
+    assert errors == ["1 rows are positive (e.g. [0])", "missing_non_negative: missing columns ['missing']"]
+    assert conversions == ["x"]
@@ -0,0 +1,52 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "results"))
+import extract_store as ES
+
+
+def test_parquet_chunks_type_a_late_populated_column(tmp_path):
+    path = tmp_path / "orders.parquet"
+    writer = ES._ChunkWriter(path, "parquet")
+    writer.write(pd.DataFrame({"order_id": ["a", "b"], "order_delivered_customer_date": [None, None]}))
+    writer.write(pd.DataFrame({"order_id": ["c"], "order_delivered_customer_date": [pd.Timestamp("2018-01-02")]}))
+    writer.write(pd.DataFrame({"order_id": ["d"], "order_delivered_customer_date": [None]}))
+    writer.close()
+
+    df = pd.read_parquet(path)
+    assert pa.types.is_timestamp(pq.read_schema(path).field("order_delivered_customer_date").type)
+    assert list(df["order_id"]) == ["a", "b", "c", "d"]
+    assert df["order_delivered_customer_date"].isna().tolist() == [True, True, False, True]
+    assert df["order_delivered_customer_date"][2] == pd.Timestamp("2018-01-02")
+
+
+def test_parquet_column_null_in_every_chunk(tmp_path):
+    path = tmp_path / "orders.parquet"
+    writer = ES._ChunkWriter(path, "parquet")
+    for _ in range(2):
+        writer.write(pd.DataFrame({"order_id": ["a"], "order_approved_at": [None]}))
+    writer.close()
+
+    assert len(pd.read_parquet(path)) == 2
+
+
+def test_extractors_return_the_rows_written(tmp_path, monkeypatch):
+    from sqlalchemy import create_engine
+
+    monkeypatch.chdir(tmp_path)   # outputs go to the relative results/csvs_out
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE orders (order_id TEXT)")
+        conn.exec_driver_sql("INSERT INTO orders VALUES ('a'), ('b'), ('c')")
+    query = tmp_path / "all.sql"
+    query.write_text("SELECT * FROM orders")
+
+    assert ES.extract_and_save_query("orders_all", query, engine, "csv") == 3
+    assert ES.stream_query_to_file("orders_stream", query, engine, "parquet", chunk_size=2) == 3
+    assert len(pd.read_parquet(ES.output_path("orders_stream", "parquet"))) == 3
+    assert ES.extract_and_save_query("broken", tmp_path / "missing.sql", engine, "csv") is None
+    engine.dispose()
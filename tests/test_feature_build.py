@@ -0,0 +1,57 @@
+import os
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, text
+
+# Same throwaway Postgres as test_copy_loader.py
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "rds-set-up"))
+import feature_build
+
+TABLES = ["customer_order_agg", "feature_build_state", "order_items", "orders"]
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(TEST_DATABASE_URL)
+    with engine.begin() as conn:
+        for table in TABLES:
+            conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        conn.execute(text("CREATE TABLE orders (order_id VARCHAR PRIMARY KEY, customer_id VARCHAR, "
+                          "order_purchase_timestamp TIMESTAMP)"))
+        conn.execute(text("CREATE TABLE order_items (order_id VARCHAR, order_item_id INT, "
+                          "product_id VARCHAR, price NUMERIC)"))
+        conn.execute(text("""
+            INSERT INTO orders VALUES ('o1', 'c1', '2018-01-01'), ('o2', 'c2', '2018-03-01');
+            INSERT INTO order_items VALUES ('o1', 1, 'p1', 10), ('o1', 2, 'p2', 30), ('o2', 1, 'p1', 5);
+        """))
+    yield engine
+    with engine.begin() as conn:
+        for table in TABLES:
+            conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+    engine.dispose()
+
+
+def test_incremental_refresh_only_touches_recent_customers(engine):
+    first = feature_build.refresh_churn_features(engine)
+    assert first["full"] and first["customers"] == 2
+    assert first["anchor_date"] == date(2018, 3, 1)
+
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO orders VALUES ('o3', 'c3', '2018-06-01')"))
+        conn.execute(text("INSERT INTO order_items VALUES ('o3', 1, 'p3', 7), ('o3', 2, 'p3', 7)"))
+
+    second = feature_build.refresh_churn_features(engine, anchor_date=date(2018, 7, 1))
+    assert not second["full"]
+    assert second["customers"] == 2   # c3, plus c2 inside the LOOKBACK_DAYS window; not c1
+
+    with engine.connect() as conn:
+        row = conn.execute(text("SELECT * FROM customer_order_agg WHERE customer_id = 'c3'")).one()
+        anchor = conn.execute(text("SELECT anchor_date FROM feature_build_state")).scalar()
+    assert (row.total_orders, row.total_spent, row.distinct_products) == (2, 14, 1)
+    assert anchor == date(2018, 7, 1)
@@ -0,0 +1,71 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "results"))
+import feature_store
+
+
+@pytest.fixture
+def churn_csv(tmp_path):
+    path = tmp_path / "ML_churn_features.csv"
+    pd.DataFrame({
+        "customer_id": [f"c{i:05d}" for i in range(20_000)][::-1],   # unsorted on purpose
+        "customer_state": ["SP", "RJ"] * 10_000,
+        "total_orders": range(20_000),
+        "churned": [0, 1] * 10_000,
+    }).to_csv(path, index=False)
+    return path
+
+
+def test_ingest_sorts_and_lists_snapshots(churn_csv, tmp_path):
+    store = tmp_path / "store"
+    feature_store.ingest("churn", "2024-01-01", churn_csv, store)
+    feature_store.ingest("churn", "2024-02-01", churn_csv, store)
+
+    assert feature_store.snapshots("churn", store) == ["2024-01-01", "2024-02-01"]
+    df = feature_store.read_features("churn", store_dir=store)
+    assert df["customer_id"].is_monotonic_increasing
+    assert len(df) == 20_000
+
+
+def test_point_lookup_and_projection(churn_csv, tmp_path):
+    store = tmp_path / "store"
+    feature_store.ingest("churn", "2024-01-01", churn_csv, store)
+
+    rows = feature_store.get_features("churn", ["c00007", "c19999", "missing"], ["total_orders"], store_dir=store)
+    assert list(rows.columns) == ["total_orders"]
+    assert rows.loc["c00007", "total_orders"] == 19_992
+    assert "missing" not in rows.index
+
+    projected = feature_store.read_features("churn", ["churned"], store_dir=store)
+    assert list(projected.columns) == ["customer_id", "churned"]
+
+
+def test_prune_keeps_newest(churn_csv, tmp_path):
+    store = tmp_path / "store"
+    for month in ("01", "02", "03"):
+        feature_store.ingest("churn", f"2024-{month}-01", churn_csv, store)
+
+    assert feature_store.prune("churn", keep=1, store_dir=store) == ["2024-01-01", "2024-02-01"]
+    assert feature_store.snapshots("churn", store) == ["2024-03-01"]
+
+
+def test_newer_source_is_reingested(churn_csv, tmp_path):
+    import os
+    from datetime import date
+
+    store = tmp_path / "store"
+    old = feature_store.ingest("churn", "2024-01-01", churn_csv, store)
+    os.utime(churn_csv, (old.stat().st_mtime - 60,) * 2)
+
+    assert feature_store.resolve_snapshot("churn", store_dir=store, source_dir=tmp_path) == old
+
+    pd.DataFrame({"customer_id": ["c1"], "churned": [1]}).to_csv(churn_csv, index=False)
+    os.utime(churn_csv, (old.stat().st_mtime + 60,) * 2)   # a fresh download
+
+    path = feature_store.resolve_snapshot("churn", store_dir=store, source_dir=tmp_path)
+    assert path == feature_store.snapshot_path("churn", date.today().isoformat(), store)
+    assert len(pd.read_parquet(path)) == 1
@@ -0,0 +1,188 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, text
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR / "rds-set-up"))
+import load_data
+
+# Same throwaway Postgres as test_copy_loader.py
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+needs_db = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+
+def test_reload_includes_referencing_tables():
+    assert load_data.tables_to_reload(["customers"]) == ["customers", "orders", "order_items",
+                                                         "order_payments", "order_reviews"]
+    assert load_data.tables_to_reload(["products"]) == ["order_items", "products"]
+    assert load_data.tables_to_reload(["geolocation"]) == ["geolocation"]
+    # resume: loaded tables are skipped, but a reloaded parent still takes its children
+    assert load_data.tables_to_reload(list(load_data.DATA_FILES), ["customers", "orders", "sellers"]) == \
+        ["order_items", "products", "geolocation", "order_payments", "order_reviews",
+         "product_category_name_translation"]
+
+
+class _Raw:
+    """raw_connection() stand-in recording the statements copy_frames_to_table sends."""
+
+    def __init__(self):
+        self.sql = []
+
+    def cursor(self):
+        raw = self
+
+        class _Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, sql):
+                raw.sql.append(sql)
+
+            def copy_expert(self, sql, buffer):
+                raw.sql.append(sql)
+
+        return _Cursor()
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize("exists, truncate, expected", [
+    (True, False, ["COPY"]),                 # load_tables already emptied it: append, keep DDL
+    (True, True, ["TRUNCATE", "COPY"]),
+    (False, False, ["CREATE", "COPY"]),
+])
+def test_copy_frames_only_recreates_missing_tables(monkeypatch, exists, truncate, expected):
+    import pandas as pd
+
+    raw = _Raw()
+    engine = type("Engine", (), {"raw_connection": lambda self: raw})()
+    created = []
+    monkeypatch.setattr(load_data, "inspect", lambda engine: type("I", (), {"has_table": lambda self, t: exists})())
+    monkeypatch.setattr(pd.DataFrame, "to_sql", lambda df, *a, **kw: created.append(kw))
+
+    load_data.copy_frames_to_table("orders", [pd.DataFrame({"order_id": ["a"]})], engine, truncate=truncate)
+
+    steps = ["CREATE"] * len(created) + [sql.split()[0] for sql in raw.sql]
+    assert steps == expected
+
+
+@pytest.fixture
+def calls(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setattr(load_data, "STATE_FILE", str(tmp_path / "state.json"))
+    monkeypatch.setattr(load_data, "generate_engine", lambda **kw: "engine")
+    monkeypatch.setattr(load_data.indexes, "drop_indexes", lambda engine, tables: calls.append(("drop", tables)))
+    monkeypatch.setattr(load_data.indexes, "create_indexes", lambda engine, tables: {})
+    monkeypatch.setattr(load_data, "truncate_tables", lambda engine, tables: calls.append(("truncate", tables)))
+    monkeypatch.setattr(load_data, "load_table",
+                        lambda table, engine, method, truncate: calls.append(("load", table, truncate)))
+    monkeypatch.setattr(load_data.feature_build, "refresh_churn_features",
+                        lambda engine, full: calls.append(("features", full)))
+    return calls
+
+
+def test_partial_load_reloads_children_and_features(calls):
+    result = load_data.load_tables(["customers"], workers=2)
+
+    reloaded = ["customers", "orders", "order_items", "order_payments", "order_reviews"]
+    assert calls[0] == ("drop", reloaded)
+    assert calls[1] == ("truncate", reloaded)
+    loads = [c[1] for c in calls if c[0] == "load"]
+    assert loads[:2] == ["customers", "orders"] and sorted(loads[2:]) == sorted(reloaded[2:])
+    assert all(c[2] is False for c in calls if c[0] == "load")   # already truncated, no CASCADE per table
+    assert calls[-1] == ("features", True)
+    assert sorted(result["loaded"]) == sorted(reloaded)
+    assert set(result["seconds"]) == set(reloaded)
+
+
+def test_independent_table_skips_feature_refresh(calls):
+    load_data.load_tables(["geolocation"])
+
+    assert ("truncate", ["geolocation"]) in calls
+    assert not [c for c in calls if c[0] == "features"]
+
+
+def test_benchmark_load_compares_in_place_and_deferred(monkeypatch):
+    import indexes
+
+    runs = []
+
+    def fake_load(tables, workers, defer_indexes):
+        runs.append(defer_indexes)
+        load = 1.0 if defer_indexes else 3.0
+        return {"seconds": {"orders": load}, "index_seconds": 0.5 if defer_indexes else 0.0}
+
+    monkeypatch.setattr(load_data, "generate_engine", lambda **kw: "engine")
+    monkeypatch.setattr(load_data, "load_tables", fake_load)
+    monkeypatch.setattr(indexes, "create_indexes", lambda engine, tables=None: {})
+
+    result = indexes.benchmark_load(["orders"])
+
+    assert runs == [False, True]
+    assert result["in place"] == {"orders": 3.0, "(index build)": 0.0}
+    assert result["deferred"] == {"orders": 1.0, "(index build)": 0.5}
+
+
+@pytest.fixture
+def olist_db(monkeypatch, tmp_path):
+    """The create_tables.sql/feature_tables.sql schema on TEST_DATABASE_URL, with the DuckDB tests' sample CSVs as DATA_FILES."""
+    from test_duckdb_backend import DB, _write_csvs
+
+    tables = list(load_data.DATA_FILES) + ["customer_order_agg", "feature_build_state"]
+    engine = create_engine(TEST_DATABASE_URL)
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {', '.join(tables)} CASCADE"))
+        for ddl in ("create_tables.sql", "feature_tables.sql"):
+            conn.exec_driver_sql((ROOT_DIR / "rds-set-up" / ddl).read_text())
+
+    _write_csvs(tmp_path)
+    for table in load_data.DATA_FILES:
+        monkeypatch.setitem(load_data.DATA_FILES, table, str(tmp_path / f"{DB.DATA_FILES[table]}.csv"))
+    monkeypatch.setattr(load_data, "STATE_FILE", str(tmp_path / "state.json"))
+    monkeypatch.setattr(load_data, "generate_engine", lambda **kw: engine)
+    yield engine
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {', '.join(tables)} CASCADE"))
+    engine.dispose()
+
+
+@needs_db
+def test_in_place_load_keeps_indexes_and_keys(olist_db):
+    import indexes
+
+    def snapshot():
+        with olist_db.connect() as conn:
+            names = conn.execute(text("SELECT indexname FROM pg_indexes WHERE schemaname = 'public'")).scalars()
+            fks = conn.execute(text("SELECT COUNT(*) FROM pg_constraint WHERE contype = 'f'")).scalar()
+            rows = {t: conn.execute(text(f"SELECT COUNT(*) FROM {t}")).scalar() for t in load_data.DATA_FILES}
+        return set(names), fks, rows
+
+    built = indexes.create_indexes(olist_db)   # skips the ones a primary key already covers
+    before, fks_before, _ = snapshot()
+    assert len(built) == len(indexes.INDEXES) - 1 and set(built) <= before
+
+    load_data.load_tables(defer_indexes=False)
+    after, fks_after, rows = snapshot()
+    assert after == before and fks_after == fks_before   # COPY appended into the existing tables
+    assert rows["orders"] == 2 and rows["order_reviews"] == 1
+
+    result = indexes.benchmark_load()
+
+    assert snapshot() == (before, fks_before, rows)
+    for run in ("in place", "deferred"):
+        assert set(result[run]) == set(load_data.DATA_FILES) | {"(index build)"}
+    assert result["in place"]["(index build)"] == 0.0
+    assert result["deferred"]["(index build)"] > 0
@@ -0,0 +1,89 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "results"))
+import extract_store as ES
+import manifest as mf
+from conftest import S3_BUCKET as BUCKET
+
+
+def _uploaded_keys(s3):
+    return sorted(o["Key"] for o in s3.list_objects_v2(Bucket=BUCKET).get("Contents", []))
+
+
+def test_tables_read_ignores_ctes_and_unknown_names():
+    sql = """
+        WITH recent AS (SELECT * FROM orders o JOIN order_items oi ON o.order_id = oi.order_id)
+        SELECT * FROM recent r
+        LEFT JOIN Customers c ON r.customer_id = c.customer_id
+        JOIN staging_table s ON TRUE
+    """
+    assert mf.tables_read(sql) == ["customers", "order_items", "orders"]
+
+
+def test_stale_reason():
+    entry = {"sql_sha256": "abc", "tables": {"orders": "1:10:0:0"}}
+
+    assert mf.stale_reason(None, "abc", {}) == "no manifest entry"
+    assert mf.stale_reason(entry, "def", {"orders": "1:10:0:0"}) == "query text changed"
+    assert mf.stale_reason(entry, "abc", {"orders": "1:11:0:0"}) == "upstream tables changed: ['orders']"
+    # a table whose stats are missing (stats reset, new table) counts as changed
+    assert mf.stale_reason(entry, "abc", {"orders": None}) == "upstream tables changed: ['orders']"
+    assert mf.stale_reason(entry, "abc", {"orders": "1:10:0:0"}) is None
+
+
+def test_upload_skips_unchanged_outputs(s3_store):
+    out = ES.LOCAL_OUTPUT_DIR / "orders_all.csv"
+    out.write_text("order_id\na\n")
+
+    ES.upload_new_to_s3()
+    assert _uploaded_keys(s3_store) == ["results/manifest.json", "results/output_csvs/orders_all.csv"]
+
+    s3_store.delete_object(Bucket=BUCKET, Key="results/output_csvs/orders_all.csv")
+    ES.upload_new_to_s3()   # same checksum: nothing uploaded
+    assert _uploaded_keys(s3_store) == ["results/manifest.json"]
+
+    out.write_text("order_id\na\nb\n")
+    ES.upload_new_to_s3()
+    assert _uploaded_keys(s3_store) == ["results/manifest.json", "results/output_csvs/orders_all.csv"]
+
+
+def test_download_skips_current_copies(s3_store, monkeypatch):
+    (ES.LOCAL_OUTPUT_DIR / "orders_all.csv").write_text("order_id\na\n")
+    ES.upload_new_to_s3()
+
+    downloads = []
+    real_download = ES.download_files
+    monkeypatch.setattr(ES, "download_files",
+                        lambda s3, bucket, files, **kw: downloads.append(files) or real_download(s3, bucket, files, **kw))
+
+    ES.download_new_from_s3()
+    local = ES.LOCAL_INPUT_DIR / "orders_all.csv"
+    assert local.read_text() == "order_id\na\n"
+    assert [key for key, _ in downloads[-1]] == ["results/output_csvs/orders_all.csv"]
+
+    ES.download_new_from_s3()   # matches the published checksum
+    assert downloads[-1] == []
+
+    local.write_text("edited locally\n")
+    ES.download_new_from_s3()   # no longer matches: fetched again
+    assert [key for key, _ in downloads[-1]] == ["results/output_csvs/orders_all.csv"]
+    assert local.read_text() == "order_id\na\n"
+
+
+def test_compression_switch_replaces_the_local_copy(s3_store, monkeypatch):
+    out = ES.LOCAL_OUTPUT_DIR / "orders_curated.csv"
+    out.write_text("order_id\na\n")
+    ES.upload_new_to_s3()
+    ES.download_new_from_s3()
+    assert (ES.LOCAL_INPUT_DIR / "orders_curated.csv").exists()
+
+    out.write_text("order_id\na\nb\n")
+    ES.upload_new_to_s3(compression="gzip")
+    ES.download_new_from_s3()
+
+    assert sorted(p.name for p in ES.LOCAL_INPUT_DIR.glob("orders_curated*")) == ["orders_curated.csv.gz"]
+    local = mf.load_manifest(ES.LOCAL_INPUT_DIR / mf.MANIFEST_NAME)
+    assert "orders_curated.csv" not in local["outputs"]
+    df = ES.load_csv_as_df(str(ES.LOCAL_INPUT_DIR / "orders_curated.csv"))
+    assert list(df["order_id"]) == ["a", "b"]
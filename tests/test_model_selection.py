@@ -0,0 +1,43 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "results" / "ML" / "churn_prediction" / "v1"))
+import model_selection
+import pre_proccess
+
+
+def test_leaderboard_covers_every_candidate(tmp_path, monkeypatch):
+    n = 300
+    csv_path = tmp_path / "ML_churn_features.csv"
+    pd.DataFrame({
+        "customer_id": [f"c{i}" for i in range(n)],
+        "total_orders": [1 + i % 4 for i in range(n)],
+        "total_spent": [float(i % 60) for i in range(n)],
+        "avg_order_value": [float(i % 30) for i in range(n)],
+        "distinct_products": [1 + i % 2 for i in range(n)],
+        "frequency": [1 + i % 4 for i in range(n)],
+        "recency": [i % 200 for i in range(n)],
+        "customer_state": ["SP", "RJ", "MG"] * (n // 3),
+        "churned": [int(i % 60 > 25) for i in range(n)],
+    }).to_csv(csv_path, index=False)
+    monkeypatch.setattr(pre_proccess, "ARTIFACT_DIR", tmp_path / "artifacts")
+    monkeypatch.setattr(model_selection, "N_SPLITS", 3)
+    monkeypatch.setattr(model_selection, "CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(model_selection, "SEARCH_SPACES", {
+        "logistic_regression": (LogisticRegression(max_iter=500), {"classifier__C": [0.1, 1.0]}),
+        "random_forest": (RandomForestClassifier(random_state=0), {"classifier__n_estimators": [10, 20]}),
+    })
+
+    board = model_selection.select_churn_model(csv_path, tmp_path, n_jobs=1, save_best=True)
+
+    assert len(board) == 4
+    assert list(board["rank"]) == [1, 2, 3, 4]
+    assert board["cv_roc_auc_mean"].is_monotonic_decreasing
+    assert (board["mean_fit_time_s"] > 0).all()
+    assert board["test_roc_auc"].notna().sum() == 2   # the best candidate of each family
+    assert (tmp_path / "csvs" / "churn_model_leaderboard.csv").exists()
+    assert len(list((tmp_path / "models").glob(f"{board.loc[0, 'model']}_*.joblib"))) == 1
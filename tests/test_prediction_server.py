@@ -0,0 +1,71 @@
+import json
+import sys
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+import joblib
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "results" / "ML"))
+import prediction_server
+import feature_store
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    features = pd.DataFrame({
+        "customer_id": [f"c{i}" for i in range(500)],
+        "total_orders": [1 + i % 3 for i in range(500)],
+        "total_spent": [float(i % 40) for i in range(500)],
+        "churned": [i % 2 for i in range(500)],
+    })
+    source = tmp_path / "ML_churn_features.csv"
+    features.to_csv(source, index=False)
+    monkeypatch.setattr(feature_store, "STORE_DIR", tmp_path / "store")
+    feature_store.ingest("churn", "2024-01-01", source)
+
+    pipeline = Pipeline([
+        ("preprocessor", ColumnTransformer([("num", StandardScaler(), ["total_orders", "total_spent"])])),
+        ("classifier", LogisticRegression()),
+    ]).fit(features[["total_orders", "total_spent"]], features["churned"])
+    model_path = tmp_path / "logistic_regression_20240101_000000.joblib"
+    joblib.dump(pipeline, model_path)
+
+    return prediction_server.PredictionService(["churn"], {"churn": model_path})
+
+
+def test_concurrent_requests_are_batched(service):
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        results = list(pool.map(lambda i: service.predict("churn", f"c{i}"), range(200)))
+
+    assert all(0 <= p <= 1 for p in results)
+    assert service.predict("churn", "unknown") is None
+    metrics = service.metrics()["churn"]
+    assert metrics["count"] == 201
+    assert metrics["p50_ms"] <= metrics["p99_ms"]
+    assert metrics["mean_batch_size"] > 1
+
+
+def test_http_endpoints(service):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), prediction_server.make_handler(service))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        body = json.loads(urllib.request.urlopen(f"{base}/churn?id=c7").read())
+        assert body["id"] == "c7" and 0 <= body["probability"] <= 1
+
+        request = urllib.request.Request(f"{base}/churn", data=json.dumps({"ids": ["c1", "c2"]}).encode())
+        assert set(json.loads(urllib.request.urlopen(request).read())["probabilities"]) == {"c1", "c2"}
+
+        assert "p99_ms" in json.loads(urllib.request.urlopen(f"{base}/metrics").read())["churn"]
+    finally:
+        server.shutdown()
+        server.server_close()
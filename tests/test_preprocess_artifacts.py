@@ -0,0 +1,58 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "results" / "ML" / "churn_prediction" / "v1"))
+import pre_proccess
+
+
+def _write_features(path, n=200, spend_offset=0.0):
+    pd.DataFrame({
+        "customer_id": [f"c{i}" for i in range(n)],
+        "total_orders": [1 + i % 4 for i in range(n)],
+        "total_spent": [float(i % 60) + spend_offset for i in range(n)],
+        "avg_order_value": [float(i % 30) for i in range(n)],
+        "distinct_products": [1 + i % 2 for i in range(n)],
+        "frequency": [1 + i % 4 for i in range(n)],
+        "recency": [i % 200 for i in range(n)],
+        "customer_state": ["SP", "RJ"] * (n // 2),
+        "churned": [i % 2 for i in range(n)],
+    }).to_csv(path, index=False)
+
+
+@pytest.fixture
+def artifacts(tmp_path, monkeypatch):
+    monkeypatch.setattr(pre_proccess, "ARTIFACT_DIR", tmp_path / "artifacts")
+    monkeypatch.setattr(pre_proccess, "_ARTIFACTS", {})
+    return tmp_path / "artifacts"
+
+
+def test_artifact_is_reused_from_memory_and_disk(tmp_path, artifacts):
+    csv_path = tmp_path / "ML_churn_features.csv"
+    _write_features(csv_path)
+
+    first = pre_proccess.prepare_churn_data(csv_path)
+    assert pre_proccess.prepare_churn_data(csv_path) is first
+    assert len(list(artifacts.glob("churn_*.joblib"))) == 1
+
+    pre_proccess._ARTIFACTS.clear()
+    from_disk = pre_proccess.prepare_churn_data(csv_path)
+    assert from_disk["key"] == first["key"]
+    np.testing.assert_array_equal(from_disk["Xt_train"], first["Xt_train"])
+
+    lr = pre_proccess.train_churn_model(csv_path, "logistic_regression")
+    rf = pre_proccess.train_churn_model(csv_path, "random_forest")
+    assert lr["pipeline"].named_steps["preprocessor"] is rf["pipeline"].named_steps["preprocessor"]
+
+
+def test_key_changes_with_input_and_seed(tmp_path, artifacts):
+    csv_path = tmp_path / "ML_churn_features.csv"
+    _write_features(csv_path)
+    base = pre_proccess.prepare_churn_data(csv_path)["key"]
+
+    assert pre_proccess.prepare_churn_data(csv_path, seed=7)["key"] != base
+    _write_features(csv_path, spend_offset=1.0)
+    assert pre_proccess.prepare_churn_data(csv_path)["key"] != base
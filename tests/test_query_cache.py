@@ -0,0 +1,88 @@
+import multiprocessing
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import query_cache as qc
+
+
+def _count_call(counter_path):
+    with open(counter_path, "a") as f:
+        f.write("x")
+    return pd.DataFrame({"n": [1, 2, 3]})
+
+
+def _worker(cache_dir, counter_path, out):
+    qc._MEMORY.clear()
+    df = qc.cached("slow_query", "snap", lambda: _count_call(counter_path), cache_dir)
+    out.put(int(df["n"].sum()))
+
+
+def test_cached_computes_once_and_returns_copies(tmp_path):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return pd.DataFrame({"n": [1, 2, 3]})
+
+    first = qc.cached("q", "snap", compute, tmp_path)
+    first["n"] = 0   # a check that edits its frame
+    qc._MEMORY.clear()   # a fresh process reads the pickle
+    second = qc.cached("q", "snap", compute, tmp_path)
+
+    assert len(calls) == 1
+    assert second["n"].tolist() == [1, 2, 3]
+    assert qc.cached("q", "snap", compute, tmp_path)["n"].tolist() == [1, 2, 3]
+    assert list((tmp_path / "snap").glob("*.tmp")) == []
+
+
+def test_new_snapshot_or_no_snapshot_recomputes(tmp_path):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"total_orders": 10}
+
+    qc.cached("ref", "snap-a", compute, tmp_path)
+    qc.cached("ref", "snap-b", compute, tmp_path)
+    qc.cached("ref", None, compute, tmp_path)
+
+    assert len(calls) == 3
+    assert qc.prune(keep="snap-b", cache_dir=tmp_path) == ["snap-a"]
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_parallel_workers_run_the_query_once(tmp_path):
+    counter = tmp_path / "calls.txt"
+    ctx = multiprocessing.get_context("fork")
+    out = ctx.Queue()
+    workers = [ctx.Process(target=_worker, args=(tmp_path, counter, out)) for _ in range(4)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join(30)
+
+    assert [out.get(timeout=5) for _ in workers] == [6] * 4
+    assert counter.read_text() == "x"
+
+
+def test_query_key_tracks_sql():
+    assert qc.query_key("a", "SELECT 1") == qc.query_key("a", "SELECT 1")
+    assert qc.query_key("a", "SELECT 1") != qc.query_key("a", "SELECT 2")
+
+
+def test_imports_and_caches_without_fcntl(tmp_path, monkeypatch):
+    # e.g. Windows: importing the module (so collecting the suite) must not need fcntl
+    blocked = "import sys; sys.modules['fcntl'] = None; import query_cache"
+    subprocess.run([sys.executable, "-c", blocked], cwd=Path(qc.__file__).parent, check=True)
+
+    monkeypatch.setattr(qc, "fcntl", None)
+    monkeypatch.setattr(qc, "msvcrt", None)
+    calls = []
+    qc.cached("q", "snap", lambda: calls.append(1) or {"n": 1}, tmp_path)
+    qc._MEMORY.clear()
+    assert qc.cached("q", "snap", lambda: calls.append(1) or {"n": 1}, tmp_path) == {"n": 1}
+    assert len(calls) == 1
@@ -0,0 +1,49 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "results"))
+import query_profiler as qp
+
+
+PLAN = [{
+    "Planning Time": 0.4,
+    "Execution Time": 120.0,
+    "Plan": {
+        "Node Type": "Hash Join", "Actual Total Time": 120.0, "Actual Loops": 1, "Actual Rows": 100,
+        "Plans": [
+            {"Node Type": "Seq Scan", "Relation Name": "orders", "Actual Total Time": 70.0,
+             "Actual Loops": 1, "Actual Rows": 1000, "Shared Read Blocks": 40},
+            {"Node Type": "Index Scan", "Relation Name": "customers", "Actual Total Time": 2.0,
+             "Actual Loops": 10, "Actual Rows": 1},
+        ],
+    },
+}]
+
+
+def _profile(name, wall_s, nodes=()):
+    return {"query": name, "wall_s": wall_s, "execute_s": wall_s / 2, "fetch_s": wall_s / 4,
+            "serialize_s": wall_s / 4, "rows": 10, "bytes": 2048, "planning_ms": None,
+            "db_execution_ms": None, "profiled_at": "2024-01-01T00:00:00", "nodes": list(nodes)}
+
+
+def test_plan_nodes_exclusive_time_slowest_first():
+    nodes = qp.plan_nodes(PLAN)
+
+    assert [n["node"] for n in nodes] == ["Seq Scan", "Hash Join", "Index Scan"]
+    # join: 120 - (70 + 2 * 10 loops)
+    assert nodes[1]["exclusive_ms"] == 30.0
+    assert nodes[2]["total_ms"] == 20.0 and nodes[2]["rows"] == 10
+    assert nodes[0]["relation"] == "orders" and nodes[0]["shared_read_blocks"] == 40
+
+
+def test_report_ranks_by_wall_time(tmp_path):
+    qp.save_profile(_profile("fast", 0.5), tmp_path)
+    qp.save_profile(_profile("slow", 3.0, qp.plan_nodes(PLAN)[:1]), tmp_path)
+
+    report = qp.write_report(tmp_path).read_text().splitlines()
+    ranking = (tmp_path / "query_profile.csv").read_text().splitlines()
+
+    assert ranking[1].startswith("1,slow") and ranking[2].startswith("2,fast")
+    assert "slow" in report[1] and "Seq Scan on orders" in report[2] and "fast" in report[3]
+    assert json.loads((tmp_path / "slow.json").read_text())["wall_s"] == 3.0
@@ -0,0 +1,68 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine, text
+
+import reference_metrics as RM
+
+# Same throwaway Postgres as test_copy_loader.py
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+needs_db = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+TABLES = ["order_payments", "order_items", "orders", "customers", "products", "sellers"]
+
+
+def test_query_scans_each_source_once():
+    sql = RM.build_query()
+
+    assert sql.count("WITH ") == 1
+    assert sql.count("FROM orders\n") == 1
+    assert sql.count("LEFT JOIN order_items") == 1   # active and inactive share one join
+    for name in RM.METRICS:
+        assert f" AS {name}" in sql
+    for aliases in (RM.QUERY_REFERENCE, RM.CURATED_REFERENCE):
+        assert set(aliases.values()) <= set(RM.METRICS)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(TEST_DATABASE_URL)
+    with engine.begin() as conn:
+        for table in TABLES:
+            conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        conn.execute(text("""
+            CREATE TABLE customers (customer_id VARCHAR, customer_unique_id VARCHAR, customer_state VARCHAR);
+            CREATE TABLE orders (order_id VARCHAR, customer_id VARCHAR, order_purchase_timestamp TIMESTAMP);
+            CREATE TABLE order_items (order_id VARCHAR, order_item_id INT, price NUMERIC);
+            CREATE TABLE order_payments (order_id VARCHAR, payment_value NUMERIC);
+            CREATE TABLE products (product_id VARCHAR, product_category_name VARCHAR);
+            CREATE TABLE sellers (seller_id VARCHAR);
+            INSERT INTO customers VALUES ('c1', 'u1', 'SP'), ('c2', 'u1', 'RJ'), ('c3', 'u3', 'SP');
+            INSERT INTO orders VALUES ('o1', 'c1', '2018-01-01'), ('o2', 'c2', '2018-01-11');
+            INSERT INTO order_items VALUES ('o1', 1, 10.50), ('o1', 2, 4.50);
+            INSERT INTO order_payments VALUES ('o1', 15), ('o2', 7.25);
+            INSERT INTO products VALUES ('p1', 'toys'), ('p2', NULL), ('p3', 'toys');
+            INSERT INTO sellers VALUES ('s1'), ('s2');
+        """))
+    yield engine
+    with engine.begin() as conn:
+        for table in TABLES:
+            conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+    engine.dispose()
+
+
+@needs_db
+def test_metrics_match_the_individual_queries(engine):
+    metrics = RM.compute_metrics(engine)
+
+    assert metrics["customer_ids"] == 3
+    assert metrics["unique_customers"] == 2
+    assert metrics["customer_states"] == 2
+    assert metrics["orders"] == 2
+    assert metrics["dataset_span_days"] == pytest.approx(10)
+    assert metrics["item_revenue"] == pytest.approx(15.0)
+    assert metrics["payment_revenue"] == pytest.approx(22.25)
+    assert metrics["categories"] == 1
+    assert metrics["sellers"] == 2
+    assert metrics["active_customers"] == 1     # c1
+    assert metrics["inactive_customers"] == 2   # c2 (order without items), c3 (no orders)
@@ -0,0 +1,39 @@
+import sys
+from pathlib import Path
+
+# s3_methods lives in results/ and is imported the same way extract_store does it
+sys.path.append(str(Path(__file__).resolve().parent.parent / "results"))
+import s3_methods
+
+from conftest import S3_BUCKET as BUCKET
+
+PREFIX = "results/output_csvs/"
+
+
+def test_listing_is_paginated(s3):
+    for i in range(1005):
+        s3.put_object(Bucket=BUCKET, Key=f"{PREFIX}file_{i}.csv", Body=b"a\n1\n")
+
+    objects = s3_methods.list_objects(s3, BUCKET, PREFIX)
+
+    assert len(objects) == 1005
+    assert objects[f"{PREFIX}file_0.csv"]["size"] == 4
+
+
+def test_listing_is_cached_until_refresh(s3):
+    s3.put_object(Bucket=BUCKET, Key=f"{PREFIX}a.csv", Body=b"x")
+    assert list(s3_methods.list_objects(s3, BUCKET, PREFIX)) == [f"{PREFIX}a.csv"]
+
+    s3.put_object(Bucket=BUCKET, Key=f"{PREFIX}b.csv", Body=b"x")
+    assert len(s3_methods.list_objects(s3, BUCKET, PREFIX)) == 1
+    assert len(s3_methods.list_objects(s3, BUCKET, PREFIX, refresh=True)) == 2
+
+
+def test_object_info_and_record_object(s3):
+    s3.put_object(Bucket=BUCKET, Key=f"{PREFIX}a.csv", Body=b"abc")
+
+    assert s3_methods.object_info(s3, BUCKET, f"{PREFIX}a.csv")["size"] == 3
+    assert s3_methods.object_info(s3, BUCKET, f"{PREFIX}missing.csv") is None
+
+    s3_methods.record_object(BUCKET, f"{PREFIX}new.csv", 10)
+    assert s3_methods.object_info(s3, BUCKET, f"{PREFIX}new.csv")["size"] == 10
@@ -0,0 +1,92 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "results"))
+import s3_transfer
+
+from conftest import S3_BUCKET as BUCKET
+
+PREFIX = "results/output_csvs/"
+
+
+@pytest.fixture
+def local_files(tmp_path):
+    files = []
+    for i in range(5):
+        path = tmp_path / f"small_{i}.csv"
+        path.write_text("a,b\n" + f"{i},{i}\n" * 100)
+        files.append(path)
+    # big enough for three 5 MB parts
+    big = tmp_path / "big.csv"
+    big.write_bytes(os.urandom(12 * s3_transfer.MB))
+    files.append(big)
+    return files
+
+
+def test_round_trip_with_multipart(s3, local_files, tmp_path):
+    config = s3_transfer.transfer_config(part_size_mb=5, threshold_mb=5, concurrency=4)
+    pairs = [(f, f"{PREFIX}{f.name}") for f in local_files]
+
+    up = s3_transfer.upload_files(s3, BUCKET, pairs, max_workers=3, config=config,
+                                  extra_args_for=lambda _: {"ContentType": "text/csv"})
+    assert sorted(up["succeeded"]) == sorted(local_files)
+    assert up["failed"] == []
+    assert up["bytes"] == sum(f.stat().st_size for f in local_files)
+    assert up["mb_per_s"] > 0
+    # the multipart ETag has a "-<parts>" suffix
+    assert s3.head_object(Bucket=BUCKET, Key=f"{PREFIX}big.csv")["ETag"].strip('"').endswith("-3")
+
+    out_dir = tmp_path / "downloaded"
+    down = s3_transfer.download_files(
+        s3, BUCKET, [(key, out_dir / Path(key).name) for _, key in pairs],
+        max_workers=3, config=config
+    )
+    assert down["failed"] == []
+    for f in local_files:
+        assert (out_dir / f.name).read_bytes() == f.read_bytes()
+
+
+def test_failures_are_isolated(s3, local_files, tmp_path):
+    pairs = [(f, f"{PREFIX}{f.name}") for f in local_files[:2]]
+    pairs.append((tmp_path / "missing.csv", f"{PREFIX}missing.csv"))
+
+    stats = s3_transfer.upload_files(s3, BUCKET, pairs)
+
+    assert len(stats["succeeded"]) == 2
+    assert stats["failed"] == [tmp_path / "missing.csv"]
+
+
+def test_gzip_upload_and_streaming_decompress(s3, local_files, tmp_path):
+    import gzip
+
+    small = local_files[0]
+    key = f"{PREFIX}{small.name}.gz"
+
+    up = s3_transfer.upload_files(s3, BUCKET, [(small, key)], compression="gzip")
+    assert up["wire_bytes"] < up["bytes"]
+    head = s3.head_object(Bucket=BUCKET, Key=key)
+    assert head["ContentEncoding"] == "gzip"
+    assert head["Metadata"]["codec"] == "gzip"
+
+    kept = tmp_path / "kept" / f"{small.name}.gz"
+    s3_transfer.download_files(s3, BUCKET, [(key, kept)])
+    assert gzip.decompress(kept.read_bytes()) == small.read_bytes()
+
+    plain = tmp_path / "plain" / small.name
+    down = s3_transfer.download_files(s3, BUCKET, [(key, plain)], decompress=True)
+    assert down["failed"] == []
+    assert plain.read_bytes() == small.read_bytes()
+
+
+def test_failed_decompress_leaves_no_partial_file(s3, tmp_path):
+    key = f"{PREFIX}broken.csv.gz"
+    s3.put_object(Bucket=BUCKET, Key=key, Body=b"not gzip data")
+
+    target = tmp_path / "broken.csv"
+    down = s3_transfer.download_files(s3, BUCKET, [(key, target)], decompress=True)
+
+    assert down["failed"] == [key]
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,54 @@
+import re
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT_DIR / "results"))
+import schemas
+
+
+def test_registry_covers_every_base_table_column():
+    ddl = (ROOT_DIR / "rds-set-up" / "create_tables.sql").read_text()
+    columns = set()
+    for body in re.findall(r"CREATE TABLE \w+ \((.*?)\);", ddl, re.S):
+        for line in body.splitlines():
+            line = line.split("--")[0].strip()
+            name = line.split(" ", 1)[0]
+            if name and name.upper() != "PRIMARY":
+                columns.add(name)
+    assert sorted(columns - set(schemas.COLUMN_TYPES)) == []
+
+
+def test_read_csv_applies_the_registry(tmp_path):
+    path = tmp_path / "orders_curated.csv"
+    n = 5_000
+    pd.DataFrame({
+        "order_id": [f"{i:032x}" for i in range(n)],
+        "customer_state": ["SP", "RJ", "MG", "BA"] * (n // 4),
+        "order_items_value": [19.99] * n,
+        "freight_ratio": [0.25] * n,
+        "total_items": [1] * (n - 1) + [None],
+        "freight_ratio_outlier": [0] * n,
+        "order_purchase_timestamp": ["2018-01-02 10:11:12"] * n,
+        "unregistered": ["x"] * n,
+    }).to_csv(path, index=False)
+
+    df = schemas.read_csv(path)
+
+    assert str(df["order_id"].dtype) == "string"
+    assert df["customer_state"].dtype == "category"
+    assert df["order_items_value"].dtype == "float64"
+    assert df["freight_ratio"].dtype == "float32"
+    assert str(df["total_items"].dtype) == "Int32" and df["total_items"].isna().sum() == 1
+    assert df["freight_ratio_outlier"].dtype == "int8"
+    assert pd.api.types.is_datetime64_any_dtype(df["order_purchase_timestamp"])
+    # unregistered columns keep whatever pandas infers (object, or str on pandas 3)
+    assert df["unregistered"].dtype == pd.read_csv(path, usecols=["unregistered"])["unregistered"].dtype
+
+    projected = schemas.read_csv(path, columns=["order_id", "freight_ratio"])
+    assert list(projected.columns) == ["order_id", "freight_ratio"]
+
+    stats = schemas.compare(path)
+    assert stats["typed_mb"] < stats["plain_mb"]